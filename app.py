@@ -1,17 +1,65 @@
-from flask import Flask, jsonify
+import logging
+import os
+import time
+
+from flask import Flask, Response, current_app, jsonify
 from flask_cors import CORS
-from routes import dashboard_bp
+from werkzeug.utils import import_string
+
+from db import database, instrumentation
+from services import serialization
+
+logger = logging.getLogger('mey.app')
 
-app = Flask(__name__)
-CORS(app)
+# blueprints the app serves, as "module:attribute" import paths, e.g. BLUEPRINTS=routes:dashboard_bp
+BLUEPRINTS = [path.strip() for path in os.getenv('BLUEPRINTS', 'routes:dashboard_bp').split(',') if path.strip()]
 
 
-@app.route('/', methods=['GET'])
 def online():
     return jsonify({'message': 'mey-flask-api online!'})
 
 
-app.register_blueprint(dashboard_bp)
+def pool_metrics():
+    """Return connection pool checkout/overflow counters as JSON."""
+    return jsonify(database.get_pool_status()), 200
+
+
+def metrics():
+    """Expose per-endpoint request/SQL histograms, pool gauges and startup time in Prometheus text format."""
+    pool = database.get_pool_status()
+    gauges = [f"mey_db_pool_{name} {pool[name]}" for name in ('size', 'checkedin', 'checkedout', 'overflow')
+              if name in pool]
+    gauges.append(f"mey_app_startup_seconds {current_app.config['STARTUP_SECONDS']:.6f}")
+    return Response(instrumentation.render_metrics(gauges), mimetype='text/plain; version=0.0.4')
+
+
+def create_app(config=None):
+    """
+    Builds the Flask app. ``config`` overrides settings such as ``BLUEPRINTS``; nothing here
+    connects to the database, the engine is created by the first request that needs it.
+    """
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.config['BLUEPRINTS'] = BLUEPRINTS
+    app.config.update(config or {})
+
+    CORS(app)
+    database.init_app(app)
+    database.on_engine_created(instrumentation.instrument_engine)
+    serialization.init_app(app)
+    instrumentation.init_app(app)
+
+    app.add_url_rule('/', view_func=online, methods=['GET'])
+    app.add_url_rule('/api/metrics/pool', view_func=pool_metrics, methods=['GET'])
+    app.add_url_rule('/metrics', view_func=metrics, methods=['GET'])
+    for path in app.config['BLUEPRINTS']:
+        app.register_blueprint(import_string(path))
+
+    app.config['STARTUP_SECONDS'] = time.perf_counter() - started
+    logger.info("App created in %.0f ms with blueprints %s", app.config['STARTUP_SECONDS'] * 1000,
+                ', '.join(app.blueprints) or 'none')
+    return app
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,34 @@
+from quart import Quart, jsonify
+
+from db.async_database import dispose_async_engine, warm_pool
+from routes.async_dashboard_routes import async_dashboard_bp
+
+# ASGI entry point serving the async dashboard read endpoints and the /api/changes event stream,
+# whose open connections only cost a queue on the event loop here:
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+app = Quart(__name__)
+
+
+@app.before_serving
+async def startup():
+    await warm_pool()
+
+
+@app.after_serving
+async def shutdown():
+    await dispose_async_engine()
+
+
+@app.after_request
+async def allow_cross_origin(response):
+    # same default policy as flask_cors.CORS(app) on the WSGI app
+    response.headers.setdefault('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@app.route('/', methods=['GET'])
+async def online():
+    return jsonify({'message': 'mey-flask-api online!'})
+
+
+app.register_blueprint(async_dashboard_bp)
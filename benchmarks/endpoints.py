@@ -0,0 +1,311 @@
+"""
+Endpoint benchmarks for the dashboard blueprint against a seeded local database.
+
+    python -m benchmarks.endpoints run --scale 1 --output before.json
+    python -m benchmarks.endpoints run --scale 1 --output after.json
+    python -m benchmarks.endpoints compare before.json after.json
+
+``run`` seeds a deterministic dataset (SQLite by default, or any --database-url such as a local
+MySQL container), then drives every GET route of ``dashboard_bp`` through the Flask test client
+and through a threaded HTTP load generator, and writes latency percentiles, throughput, queries
+per request and peak RSS as JSON. ``compare`` exits non-zero when a run regressed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# dataset size for --scale 1, other scales multiply every count
+BASE_DATASET = {'designers': 20, 'inventory': 5000, 'workorders': 2000}
+
+# query string arguments a route answers 400 without, filled from the sampled values
+QUERY_ARGUMENTS = {'search_everything': ('q',)}
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def summarize(latencies, elapsed, queries=None):
+    """Latency percentiles in milliseconds plus throughput for one endpoint."""
+    summary = {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+    }
+    if queries is not None:
+        summary['queries_per_request'] = round(statistics.fmean(queries), 2)
+    return summary
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return round(usage / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def configure_environment(database_url, cache_backend):
+    """Point the app at the benchmark database; must run before the app is imported."""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['CACHE_BACKEND'] = cache_backend
+
+
+def seed_database(engine, scale, seed):
+    """Create the schema and a deterministic dataset unless the database already holds one."""
+    from sqlalchemy import func, select
+
+    from db import migrations
+    from models import FeeRollup, Workorder
+    from models.dev.generate import generate
+    from services.billing import rebuild
+
+    # brings databases seeded by older runs up to the current schema as well
+    migrations.upgrade(engine)
+    with engine.begin() as connection:
+        if connection.scalar(select(func.count(Workorder.id))):
+            # datasets generated before the generator filled the billing rollups
+            if not connection.scalar(select(func.count()).select_from(FeeRollup)):
+                rebuild(connection)
+            return None
+    counts = {name: max(1, int(count * scale)) for name, count in BASE_DATASET.items()}
+    return generate(engine, seed=seed, workers=0, **counts)
+
+
+def sample_urls(app, engine, blueprint, samples, seed):
+    """Build concrete URLs for every GET route of the blueprint from ids present in the database."""
+    from sqlalchemy import select
+
+    from models import Inventory, Sidemark, Workorder
+
+    rng = random.Random(seed)
+    with engine.connect() as connection:
+        sidemarks = connection.execute(select(Sidemark.id, Sidemark.designer_id)).all()
+        workorders = connection.scalars(select(Workorder.id)).all()
+        designers = connection.scalars(select(Inventory.designer_id).distinct()).all()
+        inventory = connection.scalars(select(Inventory.id).limit(1000)).all()
+        skus = connection.scalars(select(Inventory.sku).where(Inventory.sku.isnot(None)).limit(1000)).all()
+
+    urls = {}
+    adapter = app.url_map.bind('localhost')
+    for rule in app.url_map.iter_rules():
+        if not rule.endpoint.startswith(f"{blueprint}.") or 'GET' not in rule.methods:
+            continue
+        # media blobs have no ids to sample
+        if not rule.arguments <= {'designer_id', 'sidemark_id', 'workorder_id', 'inventory_id'}:
+            continue
+        arguments = rule.arguments | set(QUERY_ARGUMENTS.get(rule.endpoint.partition('.')[2], ()))
+        endpoint_urls = []
+        for _ in range(samples):
+            sidemark_id, sidemark_designer = rng.choice(sidemarks)
+            values = {'designer_id': rng.choice(designers), 'sidemark_id': sidemark_id,
+                      'workorder_id': rng.choice(workorders), 'inventory_id': rng.choice(inventory),
+                      'q': rng.choice(skus)}
+            if 'sidemark_id' in rule.arguments:
+                values['designer_id'] = sidemark_designer
+            # values that are not part of the rule end up in the query string
+            endpoint_urls.append(adapter.build(rule.endpoint, {name: values[name] for name in arguments}))
+        urls[rule.endpoint] = endpoint_urls
+    return urls
+
+
+class QueryCounter:
+    """Counts statements executed on the engine between resets."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        self._lock = threading.Lock()
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            count, self.count = self.count, 0
+        return count
+
+
+def bench_test_client(app, urls, counter, iterations):
+    """Sequential requests through the Flask test client, measuring latency and queries per request."""
+    client = app.test_client()
+    results = {}
+    for endpoint, endpoint_urls in urls.items():
+        for url in endpoint_urls[:3]:
+            client.get(url).get_data()  # warm up
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for index in range(iterations):
+            url = endpoint_urls[index % len(endpoint_urls)]
+            counter.reset()
+            request_started = time.perf_counter()
+            response = client.get(url)
+            # streamed responses (exports) only run their queries while the body is read
+            response.get_data()
+            latencies.append(time.perf_counter() - request_started)
+            queries.append(counter.reset())
+            if response.status_code >= 500:
+                raise RuntimeError(f"{url} answered {response.status_code}")
+        results[endpoint] = summarize(latencies, time.perf_counter() - started, queries)
+    return results
+
+
+def bench_http(app, urls, concurrency, iterations):
+    """Concurrent requests over real HTTP against a threaded werkzeug server."""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def fetch(url):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + url) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            # 4xx answers are measured like any other response, as in bench_test_client
+            error.read()
+            status = error.code
+        if status >= 500:
+            raise RuntimeError(f"{url} answered {status}")
+        return time.perf_counter() - started, status
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(concurrency) as executor:
+            for endpoint, endpoint_urls in urls.items():
+                targets = [endpoint_urls[index % len(endpoint_urls)] for index in range(iterations)]
+                started = time.perf_counter()
+                latencies, statuses = zip(*executor.map(fetch, targets))
+                results[endpoint] = summarize(latencies, time.perf_counter() - started)
+                results[endpoint]['statuses'] = {str(status): count for status, count in Counter(statuses).items()}
+    finally:
+        server.shutdown()
+    return results
+
+
+def run(args):
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.gettempdir(), f'mey-bench-{args.scale}-{args.seed}.db')}"
+    configure_environment(database_url, args.cache)
+
+    from app import create_app
+    from db.database import get_engine
+
+    app = create_app()
+    engine = get_engine()
+
+    seeded = seed_database(engine, args.scale, args.seed)
+    urls = sample_urls(app, engine, args.blueprint, args.samples, args.seed)
+    counter = QueryCounter(engine)
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'database': engine.url.render_as_string(hide_password=True),
+            'python': platform.python_version(),
+            'scale': args.scale,
+            'seed': args.seed,
+            'seeded_rows': seeded,
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'cache': args.cache,
+        },
+        'test_client': bench_test_client(app, urls, counter, args.iterations),
+    }
+    if args.concurrency:
+        report['http'] = bench_http(app, urls, args.concurrency, args.iterations)
+    report['peak_rss_mb'] = peak_rss_mb()
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output)
+    print(output)
+
+
+def compare_reports(baseline, candidate, threshold):
+    """List the metrics of ``candidate`` that are worse than ``baseline`` by more than ``threshold``."""
+    regressions = []
+    for mode in ('test_client', 'http'):
+        for endpoint, before in baseline.get(mode, {}).items():
+            after = candidate.get(mode, {}).get(endpoint)
+            if after is None:
+                continue
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+                if before[metric] and after[metric] > before[metric] * (1 + threshold):
+                    regressions.append({'mode': mode, 'endpoint': endpoint, 'metric': metric,
+                                        'before': before[metric], 'after': after[metric]})
+            if after.get('queries_per_request', 0) > before.get('queries_per_request', 0):
+                regressions.append({'mode': mode, 'endpoint': endpoint, 'metric': 'queries_per_request',
+                                    'before': before['queries_per_request'], 'after': after['queries_per_request']})
+    if candidate.get('peak_rss_mb', 0) > baseline.get('peak_rss_mb', 0) * (1 + threshold):
+        regressions.append({'metric': 'peak_rss_mb', 'before': baseline['peak_rss_mb'],
+                            'after': candidate['peak_rss_mb']})
+    return regressions
+
+
+def compare(args):
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+
+    regressions = compare_reports(baseline, candidate, args.threshold)
+    print(json.dumps({'threshold': args.threshold, 'regressions': regressions}, indent=2))
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard endpoints.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="seed the database and benchmark every endpoint")
+    run_parser.add_argument('--database-url', default=None, help="defaults to a SQLite file in the temp dir")
+    run_parser.add_argument('--scale', type=float, default=1.0, help=f"multiplier for {BASE_DATASET}")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--iterations', type=int, default=200, help="requests per endpoint")
+    run_parser.add_argument('--samples', type=int, default=20, help="distinct URLs per endpoint")
+    run_parser.add_argument('--concurrency', type=int, default=8, help="HTTP load threads, 0 skips the HTTP run")
+    run_parser.add_argument('--cache', default='none', choices=('none', 'memory'),
+                            help="response cache backend while benchmarking")
+    run_parser.add_argument('--blueprint', default='dashboard')
+    run_parser.add_argument('--output', default=None)
+
+    compare_parser = commands.add_parser('compare', help="flag regressions between two runs")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help="allowed relative slowdown")
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
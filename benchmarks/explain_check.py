@@ -0,0 +1,110 @@
+"""
+Query plan check for the dashboard routes.
+
+    python -m benchmarks.explain_check [--database-url mysql+pymysql://...] [--scale 1]
+
+Seeds the benchmark dataset, requests every GET route of ``dashboard_bp`` once, captures the
+SELECT statements each route executes and runs ``EXPLAIN`` on them (``EXPLAIN QUERY PLAN`` on
+SQLite). Exits non-zero when a statement falls back to a full table scan, so a dropped or
+unusable index is caught before it reaches production.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+from benchmarks.endpoints import configure_environment, sample_urls, seed_database
+
+# routes whose full scan is inherent to what they return; single statements that scan on purpose
+# say so with an ``allow_full_scan`` execution option instead (e.g. services.search index refresh)
+ALLOWED_FULL_SCANS = {
+    'dashboard.get_designer_names': 'lists every designer',
+}
+
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)$")
+
+
+def capture_statements(app, engine, urls):
+    """
+    Returns {endpoint: [(statement, parameters)]} for the SELECTs each route runs, leaving out
+    statements executed with the ``allow_full_scan`` option.
+    """
+    from sqlalchemy import event
+
+    captured = {}
+    current = {'endpoint': None}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if context.execution_options.get('allow_full_scan'):
+            return
+        if current['endpoint'] and statement.lstrip().upper().startswith('SELECT'):
+            captured.setdefault(current['endpoint'], []).append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    client = app.test_client()
+    try:
+        for endpoint, endpoint_urls in urls.items():
+            current['endpoint'] = endpoint
+            # reading the body runs the queries of streamed responses too
+            client.get(endpoint_urls[0]).get_data()
+    finally:
+        current['endpoint'] = None
+        event.remove(engine, 'before_cursor_execute', on_execute)
+    return captured
+
+
+def full_scans(connection, statement, parameters):
+    """Names of the tables the statement reads with a full table scan."""
+    if connection.dialect.name == 'sqlite':
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        return [match.group(1) for match in (_SQLITE_FULL_SCAN.match(row[-1]) for row in plan) if match]
+    plan = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+    return [row['table'] for row in plan if row['type'] == 'ALL']
+
+
+def check(engine, captured):
+    failures = []
+    with engine.connect() as connection:
+        for endpoint, statements in captured.items():
+            if endpoint in ALLOWED_FULL_SCANS:
+                continue
+            for statement, parameters in statements:
+                tables = full_scans(connection, statement, parameters)
+                if tables:
+                    failures.append({'endpoint': endpoint, 'tables': tables, 'statement': statement})
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when a dashboard route query does a full table scan.")
+    parser.add_argument('--database-url', default=None, help="defaults to the benchmark SQLite file")
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--blueprint', default='dashboard')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.gettempdir(), f'mey-bench-{args.scale}-{args.seed}.db')}"
+    configure_environment(database_url, 'none')
+
+    from app import create_app
+    from db.database import get_engine
+
+    app = create_app()
+    engine = get_engine()
+
+    seed_database(engine, args.scale, args.seed)
+    captured = capture_statements(app, engine, sample_urls(app, engine, args.blueprint, 1, args.seed))
+    failures = check(engine, captured)
+
+    print(json.dumps({
+        'checked': {endpoint: len(statements) for endpoint, statements in captured.items()},
+        'allowed': ALLOWED_FULL_SCANS,
+        'full_scans': failures,
+    }, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
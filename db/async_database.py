@@ -0,0 +1,67 @@
+import asyncio
+import os
+import threading
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from db.database import DATABASE_URL, POOL_SIZE, engine_options
+
+# async drivers standing in for the sync ones of DATABASE_URL
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(url):
+    """Maps the sync DATABASE_URL to the matching async driver, e.g. pymysql -> aiomysql."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
+_async_engine = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_engine():
+    """Returns the async engine, creating it on first use like ``db.database.get_engine``."""
+    global _async_engine
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                url = os.getenv('ASYNC_DATABASE_URL') or async_database_url(DATABASE_URL)
+                _async_engine = create_async_engine(url, **engine_options(url))
+    return _async_engine
+
+
+async def dispose_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+class LazyAsyncSessionmaker(async_sessionmaker):
+    """An async_sessionmaker that binds itself to ``get_async_engine()`` when the first session is made."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get('bind') is None:
+            self.configure(bind=get_async_engine())
+        return super().__call__(**local_kw)
+
+
+AsyncSessionLocal = LazyAsyncSessionmaker(autoflush=False, expire_on_commit=False)
+
+
+async def warm_pool(size=None):
+    """
+    Opens pool connections concurrently before serving, so the first polls don't queue on connects.
+    """
+    engine = get_async_engine()
+    size = size or (1 if engine.url.drivername.startswith('sqlite') else POOL_SIZE)
+    connections = await asyncio.gather(*(engine.connect() for _ in range(size)))
+    for connection in connections:
+        await connection.exec_driver_sql('SELECT 1')
+    await asyncio.gather(*(connection.close() for connection in connections))
+    return size
@@ -1,16 +1,102 @@
+from flask import g, has_app_context
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 import os
+import threading
 
 load_dotenv()
 
-engine = create_engine(f"mysql+pymysql://{os.getenv('DATABASE_USER')}:{os.getenv('DATABASE_PASSWORD')}"
-                       f"@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DATABASE')}")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+def _env_bool(name, default):
+    """
+    Reads a boolean flag from the environment, accepting 1/true/yes/on.
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+DATABASE_URL = os.getenv('DATABASE_URL') or (
+    f"mysql+pymysql://{os.getenv('DATABASE_USER')}:{os.getenv('DATABASE_PASSWORD')}"
+    f"@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DATABASE')}"
+)
+
+# connection pool settings, tunable per deployment
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 20))
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', True)
+
+
+def engine_options(url):
+    """
+    Builds the create_engine keyword arguments for the given database URL.
+    """
+    options = {'pool_pre_ping': POOL_PRE_PING, 'pool_recycle': POOL_RECYCLE}
+    # sqlite (local runs, benchmarks) does not use a sized QueuePool
+    if not url.startswith('sqlite'):
+        options.update(pool_size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+    return options
+
+
+# the engine is only built when something first talks to the database, so importing the app,
+# the models or a CLI module needs neither a driver nor a reachable server
+_engine = None
+_engine_lock = threading.Lock()
+_engine_hooks = []
+
+
+def on_engine_created(hook):
+    """
+    Registers ``hook(engine)`` to run once the engine exists, right away if it already does.
+    """
+    with _engine_lock:
+        if hook in _engine_hooks:
+            return
+        _engine_hooks.append(hook)
+        engine = _engine
+    if engine is not None:
+        hook(engine)
+
+
+def get_engine():
+    """
+    Returns the application engine, creating it on first use.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+                for hook in _engine_hooks:
+                    hook(engine)
+                _engine = engine
+    return _engine
+
+
+def dispose_engine(close=True):
+    """
+    Drops the engine's pooled connections, if the engine has been created at all.
+    """
+    if _engine is not None:
+        _engine.dispose(close=close)
+
+
+class LazySessionmaker(sessionmaker):
+    """
+    A sessionmaker that binds itself to ``get_engine()`` when the first session is made.
+    """
+
+    def __call__(self, **local_kw):
+        if self.kw.get('bind') is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
 
 
 def get_db():
@@ -24,12 +110,68 @@ def get_db():
         database.close()
 
 
+def get_request_session():
+    """
+    Returns the session bound to the current Flask app context, opening it on first use.
+    """
+    if 'db_session' not in g:
+        g.db_session = SessionLocal()
+    return g.db_session
+
+
+def close_request_session(exception=None):
+    """
+    Releases the app context session back to the pool, rolling back if the request failed.
+    """
+    session = g.pop('db_session', None)
+    if session is not None:
+        if exception is not None:
+            session.rollback()
+        session.close()
+
+
+def init_app(app):
+    """
+    Registers the request-scoped session teardown on the Flask app.
+    """
+    app.teardown_appcontext(close_request_session)
+
+
+def warm_pool(size=None):
+    """
+    Opens pool connections up front so the first requests after a (re)start don't pay for them.
+    """
+    size = size or (1 if DATABASE_URL.startswith('sqlite') else POOL_SIZE)
+    engine = get_engine()
+    connections = [engine.connect() for _ in range(size)]
+    for connection in connections:
+        connection.exec_driver_sql('SELECT 1')
+    for connection in connections:
+        connection.close()
+    return size
+
+
+def get_pool_status():
+    """
+    Returns checkout and overflow counters of the engine's connection pool.
+    """
+    pool = get_engine().pool
+    stats = {'pool': type(pool).__name__, 'status': pool.status()}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            stats[name] = counter()
+    return stats
+
+
 class DatabaseSession:
     def __init__(self):
         """
-        Initializes a new DatabaseSession instance with a new session.
+        Initializes a new DatabaseSession instance. Inside a Flask app context the request-scoped
+        session is reused, otherwise (scripts, streamed responses) a new session is opened.
         """
-        self.session = SessionLocal()
+        self.owns_session = not has_app_context()
+        self.session = SessionLocal() if self.owns_session else get_request_session()
 
     def __enter__(self):
         """
@@ -39,9 +181,10 @@ class DatabaseSession:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
-        Handles exiting the context management, by closing the session.
+        Handles exiting the context management, by closing an owned session. A request-scoped
+        session is only rolled back on error and is closed in the app context teardown.
         """
-        self.session.close()
-
-
-db_session = get_db().__next__()
+        if self.owns_session:
+            self.session.close()
+        elif exc_type is not None:
+            self.session.rollback()
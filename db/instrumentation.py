@@ -0,0 +1,177 @@
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('mey.sql')
+
+# thresholds for the slow query log and the N+1 detector
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+SLOW_REQUEST_DB_MS = float(os.getenv('SLOW_REQUEST_DB_MS', 250))
+SLOW_REQUEST_QUERY_COUNT = int(os.getenv('SLOW_REQUEST_QUERY_COUNT', 50))
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 10))
+SLOWEST_STATEMENTS = int(os.getenv('SLOWEST_STATEMENTS', 3))
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_IN_LIST = re.compile(r"\bIN \((?:[^()]*?)\)", re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """Normalizes a statement so executions that only differ by parameters compare equal."""
+    shape = _IN_LIST.sub('IN (?)', statement)
+    shape = _LITERALS.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class RequestQueryStats:
+    """Statements executed while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest = []
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement_shape(statement)] += 1
+        entry = (duration, self.count, statement)
+        if len(self.slowest) < SLOWEST_STATEMENTS:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def slowest_statements(self):
+        return [{'ms': round(duration * 1000, 2), 'statement': statement}
+                for duration, _, statement in sorted(self.slowest, reverse=True)]
+
+    def repeated_shapes(self, threshold=N_PLUS_ONE_THRESHOLD):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with one series per label value."""
+
+    def __init__(self, name, documentation, buckets, label='endpoint'):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.label = label
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.setdefault(label_value, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                labels = f'{self.label}="{label_value}"'
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+
+REQUEST_DURATION = Histogram('mey_request_duration_seconds', "Request duration per endpoint.", DURATION_BUCKETS)
+REQUEST_DB_TIME = Histogram('mey_request_db_seconds', "Database time per request per endpoint.", DURATION_BUCKETS)
+REQUEST_QUERIES = Histogram('mey_request_db_queries', "Statements executed per request per endpoint.",
+                            QUERY_COUNT_BUCKETS)
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_DB_TIME, REQUEST_QUERIES)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    if duration * 1000 >= SLOW_QUERY_MS:
+        logger.warning(json.dumps({'event': 'slow_query', 'ms': round(duration * 1000, 2), 'statement': statement}))
+    # streamed responses and scripts run outside a request and are only covered by the slow query log
+    if has_app_context() and 'query_stats' in g:
+        g.query_stats.record(statement, duration)
+
+
+def instrument_engine(engine):
+    """Attaches the timing listeners to an engine."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _start_request():
+    g.query_stats = RequestQueryStats()
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    stats = g.pop('query_stats', None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - g.pop('request_started')
+    endpoint = request.endpoint or 'unmatched'
+
+    response.headers.add('Server-Timing', f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries"')
+    response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.2f}')
+
+    REQUEST_DURATION.observe(endpoint, elapsed)
+    REQUEST_DB_TIME.observe(endpoint, stats.total_time)
+    REQUEST_QUERIES.observe(endpoint, stats.count)
+
+    if stats.total_time * 1000 >= SLOW_REQUEST_DB_MS or stats.count >= SLOW_REQUEST_QUERY_COUNT:
+        logger.warning(json.dumps({
+            'event': 'slow_request',
+            'endpoint': endpoint,
+            'path': request.full_path,
+            'status': response.status_code,
+            'ms': round(elapsed * 1000, 2),
+            'db_ms': round(stats.total_time * 1000, 2),
+            'queries': stats.count,
+            'slowest': stats.slowest_statements(),
+        }))
+    for shape, count in stats.repeated_shapes():
+        logger.warning(json.dumps({
+            'event': 'n_plus_one',
+            'endpoint': endpoint,
+            'path': request.full_path,
+            'repeats': count,
+            'statement': shape,
+        }))
+    return response
+
+
+def render_metrics(extra_lines=()):
+    """Prometheus text exposition of the request histograms of this process."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.extend(extra_lines)
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Collects per-request SQL statistics on the Flask app; engines are timed by ``instrument_engine``."""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,9 @@
+"""Creates the original tables on an empty database."""
+from models.base import Base
+import models  # noqa: F401  registers every model on Base.metadata
+
+BASELINE_TABLES = ('designers', 'sidemarks', 'inventory', 'photo', 'workorders', 'shipments', 'workorder_items')
+
+
+def upgrade(connection):
+    Base.metadata.create_all(connection, tables=[Base.metadata.tables[name] for name in BASELINE_TABLES])
@@ -0,0 +1,9 @@
+"""Adds the version/updated_at columns used for ETags and optimistic concurrency."""
+from db.migrations import add_column
+from models import Designer, Inventory, Sidemark, Workorder, WorkorderItem
+
+
+def upgrade(connection):
+    for model in (Designer, Sidemark, Workorder, WorkorderItem, Inventory):
+        add_column(connection, model.__table__.c.version)
+        add_column(connection, model.__table__.c.updated_at)
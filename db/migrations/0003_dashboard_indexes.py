@@ -0,0 +1,19 @@
+"""Composite indexes for the dashboard filters and joins."""
+from db.migrations import create_index
+from models import Designer, Inventory, Shipment, Sidemark, Workorder, WorkorderItem
+
+INDEXES = {
+    Designer: ('ix_designers_company',),
+    Sidemark: ('ix_sidemarks_designer',),
+    Inventory: ('ix_inventory_designer', 'ix_inventory_designer_active'),
+    Workorder: ('ix_workorders_designer_sidemark', 'ix_workorders_sidemark_status', 'ix_workorders_status_date'),
+    WorkorderItem: ('ix_workorder_items_workorder_inventory',),
+    Shipment: ('ix_shipments_workorder',),
+}
+
+
+def upgrade(connection):
+    for model, names in INDEXES.items():
+        for index in model.__table__.indexes:
+            if index.name in names:
+                create_index(connection, index)
@@ -0,0 +1,9 @@
+"""Creates the storage/fee rollup tables and fills them from the existing rows."""
+from models.billing import BillingRun, FeeRollup, StorageRollup
+from services.billing import rebuild
+
+
+def upgrade(connection):
+    for model in (StorageRollup, FeeRollup, BillingRun):
+        model.__table__.create(connection, checkfirst=True)
+    rebuild(connection)
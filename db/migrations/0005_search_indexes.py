@@ -0,0 +1,14 @@
+"""SKU lookup index and the MySQL FULLTEXT index behind inventory search."""
+from db.migrations import create_index
+from models import Inventory
+
+INDEXES = ('ix_inventory_sku', 'ft_inventory_search')
+
+
+def upgrade(connection):
+    for index in Inventory.__table__.indexes:
+        if index.name not in INDEXES:
+            continue
+        if index.name.startswith('ft_') and connection.dialect.name != 'mysql':
+            continue
+        create_index(connection, index)
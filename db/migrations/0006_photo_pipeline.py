@@ -0,0 +1,13 @@
+"""Storage, variant and processing columns for uploaded photos."""
+from db.migrations import add_column, create_index
+from models import Photo
+
+COLUMNS = ('storage_key', 'content_type', 'size_bytes', 'width', 'height', 'status', 'thumbnail_key',
+           'variant_key', 'variant_width', 'created_at')
+
+
+def upgrade(connection):
+    for name in COLUMNS:
+        add_column(connection, Photo.__table__.c[name])
+    for index in Photo.__table__.indexes:
+        create_index(connection, index)
@@ -0,0 +1,6 @@
+"""Creates the background job queue table."""
+from models.jobs import Job
+
+
+def upgrade(connection):
+    Job.__table__.create(connection, checkfirst=True)
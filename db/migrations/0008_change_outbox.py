@@ -0,0 +1,6 @@
+"""Creates the change outbox behind the live dashboard feed."""
+from models.changes import Change
+
+
+def upgrade(connection):
+    Change.__table__.create(connection, checkfirst=True)
@@ -0,0 +1,7 @@
+"""Creates the archive tables that completed and inactive records are moved to."""
+from models.archive import InventoryArchive, ShipmentArchive, WorkorderArchive, WorkorderItemArchive
+
+
+def upgrade(connection):
+    for model in (WorkorderArchive, WorkorderItemArchive, ShipmentArchive, InventoryArchive):
+        model.__table__.create(connection, checkfirst=True)
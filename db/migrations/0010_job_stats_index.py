@@ -0,0 +1,9 @@
+"""Index for the per-kind job counts of /api/jobs/stats."""
+from db.migrations import create_index
+from models.jobs import Job
+
+
+def upgrade(connection):
+    for index in Job.__table__.indexes:
+        if index.name == 'ix_jobs_status_kind':
+            create_index(connection, index)
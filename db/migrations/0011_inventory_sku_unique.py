@@ -0,0 +1,33 @@
+"""Makes SKUs unique per designer; existing duplicates keep the oldest item's SKU, the others are renamed."""
+import logging
+
+from sqlalchemy import func, select, update
+
+from db.migrations import create_index
+from models import Inventory
+
+
+def upgrade(connection):
+    duplicates = connection.execute(
+        select(Inventory.designer_id, Inventory.sku)
+        .where(Inventory.sku.isnot(None))
+        .group_by(Inventory.designer_id, Inventory.sku)
+        .having(func.count(Inventory.id) > 1)
+    ).all()
+    renamed = 0
+    for designer_id, sku in duplicates:
+        ids = connection.scalars(
+            select(Inventory.id).where(Inventory.designer_id == designer_id, Inventory.sku == sku)
+            .order_by(Inventory.id)
+        ).all()
+        for inventory_id in ids[1:]:
+            suffix = f"-DUP{inventory_id}"
+            connection.execute(update(Inventory).where(Inventory.id == inventory_id)
+                               .values(sku=sku[:255 - len(suffix)] + suffix, version=Inventory.version + 1))
+            renamed += 1
+    if renamed:
+        logging.warning("Renamed %s duplicate SKU(s) to <sku>-DUP<id>", renamed)
+
+    for index in Inventory.__table__.indexes:
+        if index.name == 'uq_inventory_designer_sku':
+            create_index(connection, index)
@@ -0,0 +1,86 @@
+"""
+Versioned schema migrations.
+
+Each ``NNNN_name.py`` module in this package defines ``upgrade(connection)`` and is applied once,
+in version order, by ``python -m db.migrations upgrade``. Applied versions are recorded in the
+``schema_migrations`` table. Migrations use the helpers below so they are safe to run against
+databases that were created with ``Base.metadata.create_all``.
+"""
+import importlib
+import logging
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+
+logger = logging.getLogger('mey.migrations')
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', migration_metadata,
+    Column('version', String(16), primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+def available_migrations():
+    """Returns (version, name, module) for every migration module, sorted by version."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        version, _, name = module_info.name.partition('_')
+        if version.isdigit():
+            migrations.append((version, name, importlib.import_module(f"{__name__}.{module_info.name}")))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def applied_versions(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.scalars(select(schema_migrations.c.version)))
+
+
+def upgrade(engine, target=None):
+    """Applies pending migrations up to ``target`` (inclusive), each in its own transaction."""
+    with engine.begin() as connection:
+        applied = applied_versions(connection)
+
+    performed = []
+    for version, name, module in available_migrations():
+        if version in applied or (target and version > target):
+            continue
+        logger.info("Applying migration %s_%s", version, name)
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(version=version, name=name))
+        performed.append(f"{version}_{name}")
+    return performed
+
+
+def status(engine):
+    with engine.begin() as connection:
+        applied = applied_versions(connection)
+    return [(f"{version}_{name}", version in applied) for version, name, _ in available_migrations()]
+
+
+# helpers for migration modules
+
+def column_exists(connection, table_name, column_name):
+    return any(column['name'] == column_name for column in inspect(connection).get_columns(table_name))
+
+
+def index_exists(connection, table_name, index_name):
+    return any(index['name'] == index_name for index in inspect(connection).get_indexes(table_name))
+
+
+def add_column(connection, column):
+    """Adds a model column to its existing table unless it is already there."""
+    if not column_exists(connection, column.table.name, column.name):
+        ddl = CreateColumn(column).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN {ddl}"))
+
+
+def create_index(connection, index):
+    """Creates a model index unless it already exists."""
+    if not index_exists(connection, index.table.name, index.name):
+        index.create(connection)
@@ -0,0 +1,27 @@
+import argparse
+import logging
+
+from db.database import get_engine
+from db.migrations import status, upgrade
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply or inspect versioned schema migrations.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    upgrade_parser = commands.add_parser('upgrade', help="apply pending migrations")
+    upgrade_parser.add_argument('--target', default=None, help="stop after this version, e.g. 0002")
+    commands.add_parser('status', help="list migrations and whether they are applied")
+    args = parser.parse_args(argv)
+
+    if args.command == 'upgrade':
+        performed = upgrade(get_engine(), args.target)
+        logging.info("Applied %s migration(s)", len(performed))
+    else:
+        for migration, applied in status(get_engine()):
+            print(f"{'applied' if applied else 'pending':8} {migration}")
+
+
+if __name__ == '__main__':
+    main()
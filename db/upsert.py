@@ -0,0 +1,35 @@
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+
+def upsert(connection, table, rows, update_columns, conflict_columns=None, increment=False, set_values=None):
+    """
+    Inserts ``rows`` into ``table`` and, for rows whose key already exists, sets ``update_columns``
+    to the inserted values (or adds them to the stored values when ``increment`` is true) and
+    applies ``set_values``, a dict of column name -> SQL expression such as ``version + 1``.
+    Renders ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL and ``ON CONFLICT DO UPDATE`` on
+    SQLite/PostgreSQL, where ``conflict_columns`` defaults to the primary key.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        statement = mysql.insert(table)
+        incoming = statement.inserted
+    elif dialect in ('sqlite', 'postgresql'):
+        statement = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+        incoming = statement.excluded
+    else:
+        raise NotImplementedError(f"upsert is not supported on {dialect}")
+
+    values = {
+        column: (table.c[column] + incoming[column]) if increment else incoming[column]
+        for column in update_columns
+    }
+    values.update(set_values or {})
+    if dialect == 'mysql':
+        statement = statement.on_duplicate_key_update(values)
+    else:
+        conflict_columns = conflict_columns or [column.name for column in table.primary_key.columns]
+        statement = statement.on_conflict_do_update(index_elements=conflict_columns, set_=values)
+    connection.execute(statement, rows)
@@ -0,0 +1,36 @@
+import multiprocessing
+import os
+
+# Production WSGI serving: gunicorn -c gunicorn.conf.py 'app:create_app()'
+# Keep workers * threads per worker within DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW of each worker's pool.
+# The /api/changes event stream is served by the ASGI app (asgi.py), where open streams hold no thread;
+# in compose, nginx.conf routes it there.
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def on_starting(server):
+    # the memory cache is invalidated only in the process that wrote, other workers would serve stale data
+    from services.cache import CACHE_BACKEND
+    if CACHE_BACKEND == 'memory' and server.cfg.workers > 1:
+        raise RuntimeError("CACHE_BACKEND=memory needs GUNICORN_WORKERS=1, use redis with more workers")
+
+
+def post_fork(server, worker):
+    # connections inherited from a preloaded master must not be shared between processes
+    from db.database import dispose_engine
+    dispose_engine(close=False)
+
+
+def post_worker_init(worker):
+    from db.database import warm_pool
+    size = warm_pool()
+    worker.log.info("Warmed %s database connection(s)", size)
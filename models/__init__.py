@@ -1,7 +1,7 @@
-from flask import Blueprint
-
-models = Blueprint('models', __name__)
-
 from .inventory import *
 from .orders import *
 from .designer import *
+from .billing import *
+from .jobs import *
+from .changes import *
+from .archive import *
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, DateTime, Index, Table
+
+from .base import Base
+from .inventory import Inventory
+from .orders import Shipment, Workorder, WorkorderItem
+
+
+def archive_table(source, *indexes):
+    """
+    ``<source>_archive``: the columns of a hot table without its keys to other tables, plus the
+    time the row was moved. Rows keep their ids, so references between archived rows still hold.
+    """
+    columns = [Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False,
+                      nullable=column.nullable)
+               for column in source.columns]
+    return Table(f"{source.name}_archive", Base.metadata, *columns, Column('archived_at', DateTime, nullable=False),
+                 *indexes)
+
+
+# Completed or inactive workorders moved out of the hot tables by services.archive, with their
+# items and shipments; read only through routes.archive_routes
+class WorkorderArchive(Base):
+    __table__ = archive_table(
+        Workorder.__table__,
+        Index('ix_workorders_archive_designer_sidemark', 'designer_id', 'sidemark_id'),
+        Index('ix_workorders_archive_workorder_id', 'workorder_id'),
+        Index('ix_workorders_archive_date', 'workorder_date'),
+    )
+
+
+class WorkorderItemArchive(Base):
+    __table__ = archive_table(
+        WorkorderItem.__table__,
+        Index('ix_workorder_items_archive_workorder', 'workorder_id'),
+    )
+
+
+class ShipmentArchive(Base):
+    __table__ = archive_table(
+        Shipment.__table__,
+        Index('ix_shipments_archive_workorder', 'workorder_id'),
+    )
+
+
+# Inactive inventory that nothing in the hot tables refers to any more
+class InventoryArchive(Base):
+    __table__ = archive_table(
+        Inventory.__table__,
+        Index('ix_inventory_archive_designer', 'designer_id'),
+    )
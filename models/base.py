@@ -1,3 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import declared_attr
 
 Base = declarative_base()
+
+
+class VersionedMixin:
+    """
+    Adds a row version and last update timestamp. The ORM bumps ``version`` on every flushed
+    update, so aggregates over these columns change whenever the underlying rows do.
+    """
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @declared_attr
+    def __mapper_args__(cls):
+        return {'version_id_col': cls.version}
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, Float, Date, DateTime, Enum
+
+from .base import Base
+
+
+# Daily per-designer storage snapshot, written by the storage job and adjusted as inventory changes
+class StorageRollup(Base):
+    __tablename__ = 'storage_rollups'
+    designer_id = Column(Integer, primary_key=True, autoincrement=False)
+    day = Column(Date, primary_key=True)
+    items_in_storage = Column(Integer, nullable=False, default=0)
+    cubic_footage = Column(Float, nullable=False, default=0)
+    item_days = Column(Integer, nullable=False, default=0)
+
+
+# Workorder item fees per designer, sidemark, workorder day and status, kept current on every change
+class FeeRollup(Base):
+    __tablename__ = 'fee_rollups'
+    designer_id = Column(Integer, primary_key=True, autoincrement=False)
+    sidemark_id = Column(Integer, primary_key=True, autoincrement=False)
+    day = Column(Date, primary_key=True)
+    status = Column(Enum('pending', 'processing', 'completed'), primary_key=True)
+    item_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    total_fee = Column(Float, nullable=False, default=0)
+
+
+# Days the storage job already ran, so days_in_storage is only advanced once per day
+class BillingRun(Base):
+    __tablename__ = 'billing_runs'
+    day = Column(Date, primary_key=True)
+    ran_at = Column(DateTime, default=datetime.utcnow)
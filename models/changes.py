@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+
+from .base import Base
+
+
+# Outbox of workorder and inventory changes, appended in the writing transaction and tailed by
+# services.changes to push live updates to the dashboard
+class Change(Base):
+    __tablename__ = 'change_outbox'
+    __table_args__ = (
+        Index('ix_change_outbox_created_at', 'created_at'),
+    )
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(64), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    designer_id = Column(Integer)
+    sidemark_id = Column(Integer)
+    workorder_id = Column(Integer)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
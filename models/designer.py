@@ -1,11 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
-from .base import Base
+from .base import Base, VersionedMixin
 
 
-class Designer(Base):
+class Designer(VersionedMixin, Base):
     __tablename__ = 'designers'
+    __table_args__ = (
+        Index('ix_designers_company', 'company'),
+    )
     id = Column(Integer, primary_key=True)
     company = Column(String(56))
     abbreviation = Column(String(12))
@@ -27,8 +30,11 @@ class Designer(Base):
         }
 
 
-class Sidemark(Base):
+class Sidemark(VersionedMixin, Base):
     __tablename__ = 'sidemarks'
+    __table_args__ = (
+        Index('ix_sidemarks_designer', 'designer_id'),
+    )
     id = Column(Integer, primary_key=True)
     designer_id = Column(Integer, ForeignKey('designers.id'))
     name = Column(String(255))
@@ -0,0 +1,380 @@
+"""
+Seeded synthetic data generator for production sized datasets.
+
+Rows are generated in deterministic chunks (the same --seed always produces the same data,
+whatever the number of workers) by a process pool and written with chunked Core executemany
+INSERTs, or staged as CSV files and loaded with MySQL ``LOAD DATA LOCAL INFILE``. Those writes
+bypass the incremental billing rollups, so they are rebuilt from the tables at the end.
+
+    python -m models.dev.generate --seed 7 --designers 500 --inventory 1000000 --workorders 200000 --workers 8
+"""
+import argparse
+import csv
+import logging
+import os
+import random
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+from db.database import DATABASE_URL, get_engine
+from models import Designer, Inventory, Sidemark, Workorder, WorkorderItem
+from services.billing import rebuild
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Predefined lists for generating varied names
+colors = ["Red", "Blue", "Green", "Yellow", "Black", "White", "Brown", "Gray", "Purple"]
+materials = ["Wooden", "Metal", "Plastic", "Glass", "Leather", "Fabric", "Marble"]
+furniture_types = ["Chair", "Table", "Sofa", "Bed", "Cabinet", "Desk", "Shelf", "Bench"]
+first_names = ["Ava", "Liam", "Noah", "Emma", "Mia", "Lucas", "Zoe", "Ethan", "Ivy", "Owen", "Ruby", "Leo",
+               "Nora", "Eli", "Hazel", "Jude", "Iris", "Felix", "June", "Theo"]
+last_names = ["Hart", "Stone", "Reyes", "Khan", "Novak", "Brooks", "Price", "Lowe", "Marsh", "Quinn", "Vance",
+              "Wolfe", "Ellis", "Frost", "Garza", "Hayes", "Ibarra", "Kerr", "Lang", "Moss"]
+company_words = ["Atelier", "Studio", "Interiors", "Design", "Living", "House", "Home", "Works"]
+manufacturers = ["Arhaus", "Bernhardt", "Century", "Hickory Chair", "Lee Industries", "Vanguard", "Baker",
+                 "Theodore Alexander", "Hooker", "Visual Comfort"]
+description_words = ["solid", "oak", "walnut", "upholstered", "tufted", "brass", "hardware", "performance",
+                     "linen", "finish", "custom", "frame", "cushion", "hand", "rubbed", "lacquer"]
+
+WORKORDER_STATUSES = ('pending', 'processing', 'completed')
+WORKORDER_ID_SPACE = 26 ** 5
+# multiplier coprime with 26 ** 5 so consecutive indexes map to scattered but unique letter codes
+WORKORDER_ID_STRIDE = 7919
+
+
+def unique_label(index, *word_lists, separator=' '):
+    """
+    Maps an index to a distinct combination of one word from each list. Once every combination is
+    used a series number is appended, so labels never run out and never repeat.
+    """
+    words = []
+    remainder = index
+    for word_list in word_lists:
+        remainder, position = divmod(remainder, len(word_list))
+        words.append(word_list[position])
+    label = separator.join(words)
+    return f"{label} {remainder + 1}" if remainder else label
+
+
+def furniture_name(index):
+    return unique_label(index, colors, materials, furniture_types)
+
+
+def workorder_code(index, rng):
+    """Generate a unique workorder ID in the format 'WO-ABCDE-12345' for the given row index."""
+    cycle, slot = divmod(index, WORKORDER_ID_SPACE)
+    slot = (slot * WORKORDER_ID_STRIDE) % WORKORDER_ID_SPACE
+    letters = ''
+    for _ in range(5):
+        slot, position = divmod(slot, 26)
+        letters += chr(ord('A') + position)
+    code = f"WO-{letters}-{rng.randint(10000, 99999)}"
+    return f"{code}-{cycle + 1}" if cycle else code
+
+
+def generate_sku(rng, row_id):
+    # the row id keeps SKUs unique per designer at any scale
+    letters = ''.join(chr(ord('A') + rng.randrange(26)) for _ in range(3))
+    return f"{letters}{rng.randint(10, 99)}-{row_id:05d}"
+
+
+def _chunk_rng(seed, table, chunk_index):
+    return random.Random(f"{seed}:{table}:{chunk_index}")
+
+
+# state shared with worker processes through the pool initializer
+_worker_state = {}
+
+
+def _init_worker(state):
+    _worker_state.update(state)
+
+
+def inventory_chunk(task):
+    """Generate one chunk of inventory rows with explicit primary keys."""
+    seed, chunk_index, first_id, count = task
+    rng = _chunk_rng(seed, 'inventory', chunk_index)
+    designer_ids = _worker_state['designer_ids']
+    now = datetime.utcnow()
+
+    rows = []
+    for row_id in range(first_id, first_id + count):
+        length, width, height = rng.randint(10, 200), rng.randint(10, 200), rng.randint(10, 200)
+        cubic_inches = length * width * height
+        in_storage = rng.random() < 0.6
+        rows.append({
+            'id': row_id,
+            'item_name': furniture_name(row_id),
+            'sku': generate_sku(rng, row_id),
+            'manufacture': rng.choice(manufacturers),
+            'quantity': rng.randint(1, 100),
+            'description': ' '.join(rng.choices(description_words, k=rng.randint(6, 20))),
+            'received_by_admin': rng.random() < 0.8,
+            'length': length,
+            'width': width,
+            'height': height,
+            'active': rng.random() < 0.7,
+            'designer_id': designer_ids[rng.randrange(len(designer_ids))],
+            'cubic_sq_inches': float(cubic_inches),
+            'cubic_sq_footage': round(cubic_inches / 1728, 2),
+            'in_storage': in_storage,
+            'days_in_storage': rng.randint(0, 365) if in_storage else 0,
+            'size': rng.choice(("S", "M", "L")),
+            'weight': rng.randint(5, 100),
+            'ground_receive': rng.randint(0, 1),
+            'freight_receive': rng.randint(0, 1),
+            'assembled': rng.randint(0, 1),
+            'unpacked': rng.randint(0, 1),
+            'assembly_time': rng.randint(0, 120),
+            'version': 1,
+            'updated_at': now,
+        })
+    return 'inventory', rows, []
+
+
+def workorder_chunk(task):
+    """Generate one chunk of workorders with explicit primary keys, plus their items."""
+    seed, chunk_index, first_id, count = task
+    rng = _chunk_rng(seed, 'workorders', chunk_index)
+    sidemarks = _worker_state['sidemarks']
+    inventory_ids = _worker_state['inventory_ids']
+    min_items, max_items = _worker_state['items_per_workorder']
+    history_days = _worker_state['history_days']
+    now = datetime.utcnow()
+
+    workorders, items = [], []
+    for row_id in range(first_id, first_id + count):
+        sidemark_id, designer_id = sidemarks[rng.randrange(len(sidemarks))]
+        workorders.append({
+            'id': row_id,
+            'workorder_id': workorder_code(row_id, rng),
+            'designer_id': designer_id,
+            'sidemark_id': sidemark_id,
+            'workorder_date': now - timedelta(days=rng.uniform(0, history_days)),
+            'status': rng.choice(WORKORDER_STATUSES),
+            'services_recorded': False,
+            'active': True,
+            'email_sent': False,
+            'tagged': False,
+            'version': 1,
+            'updated_at': now,
+        })
+        for _ in range(rng.randint(min_items, max_items)):
+            items.append({
+                'workorder_id': row_id,
+                'inventory_id': inventory_ids[rng.randrange(len(inventory_ids))],
+                'quantity': rng.randint(1, 10),
+                'assembly_time': rng.randint(0, 120),
+                'unpacked': rng.randint(0, 1),
+                'assembled': rng.randint(0, 1),
+                'total_fee': round(rng.uniform(100.0, 5000.0), 2),
+                'shipment_id': None,
+                'version': 1,
+                'updated_at': now,
+            })
+    return 'workorders', workorders, items
+
+
+def _bounded_map(executor, fn, tasks, window):
+    """Like executor.map, but keeps at most ``window`` chunks in flight so memory stays flat."""
+    pending = []
+    for task in tasks:
+        pending.append(executor.submit(fn, task))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+class ChunkWriter:
+    """Writes generated chunks with Core executemany INSERTs or stages them for LOAD DATA."""
+
+    def __init__(self, engine, load_data=False):
+        self.engine = engine
+        self.load_data = load_data
+        self.staging_dir = tempfile.mkdtemp(prefix='mey-generate-') if load_data else None
+        self.files = 0
+
+    def write(self, table, rows):
+        if not rows:
+            return
+        if self.load_data:
+            self._load_csv(table, rows)
+        else:
+            with self.engine.begin() as connection:
+                connection.execute(insert(table), rows)
+
+    def _load_csv(self, table, rows):
+        columns = list(rows[0])
+        self.files += 1
+        path = os.path.join(self.staging_dir, f"{table.name}-{self.files}.csv")
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            for row in rows:
+                writer.writerow([_csv_value(row[column]) for column in columns])
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(text(
+                    f"LOAD DATA LOCAL INFILE :path INTO TABLE {table.name} "
+                    f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\r\\n' "
+                    f"({', '.join(columns)})"
+                ), {'path': path})
+        finally:
+            os.remove(path)
+
+
+def _csv_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    return value
+
+
+def _next_id(connection, model):
+    return (connection.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def create_designers(connection, rng, count, sidemarks_per_designer):
+    """Create designers with unique names and their sidemarks; small enough for the main process."""
+    existing_names = set(connection.scalars(select(Designer.designer_name)))
+    designer_id = _next_id(connection, Designer)
+    sidemark_id = _next_id(connection, Sidemark)
+    designers, sidemarks = [], []
+    index = 0
+    for _ in range(count):
+        name = unique_label(index, first_names, last_names)
+        while name in existing_names:
+            index += 1
+            name = unique_label(index, first_names, last_names)
+        existing_names.add(name)
+        index += 1
+        designers.append({
+            'id': designer_id,
+            'company': f"{rng.choice(last_names)} {rng.choice(company_words)}",
+            'abbreviation': ''.join(chr(ord('A') + rng.randrange(26)) for _ in range(3)),
+            'designer_name': name,
+            'email': f"designer{designer_id}@example.com",
+            'secondary_email': None,
+            'phone': f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        })
+        for _ in range(rng.randint(*sidemarks_per_designer)):
+            sidemarks.append({'id': sidemark_id, 'designer_id': designer_id,
+                              'name': unique_label(sidemark_id, last_names, first_names)})
+            sidemark_id += 1
+        designer_id += 1
+    if designers:
+        connection.execute(insert(Designer.__table__), designers)
+    if sidemarks:
+        connection.execute(insert(Sidemark.__table__), sidemarks)
+    return len(designers), len(sidemarks)
+
+
+def _chunks(seed, first_id, total, chunk_size):
+    for chunk_index, offset in enumerate(range(0, total, chunk_size)):
+        yield seed, chunk_index, first_id + offset, min(chunk_size, total - offset)
+
+
+def generate(engine, seed=0, designers=100, sidemarks_per_designer=(3, 11), inventory=10000,
+             workorders=10000, items_per_workorder=(3, 15), history_days=730, workers=None,
+             chunk_size=5000, load_data=False):
+    """Generate a dataset of the requested size and return the number of rows written per table."""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    workers = os.cpu_count() if workers is None else workers
+    counts = {'designers': 0, 'sidemarks': 0, 'inventory': 0, 'workorders': 0, 'workorder_items': 0}
+    writer = ChunkWriter(engine, load_data)
+
+    with engine.begin() as connection:
+        counts['designers'], counts['sidemarks'] = create_designers(connection, rng, designers, sidemarks_per_designer)
+        designer_ids = array('l', connection.scalars(select(Designer.id)))
+        sidemark_rows = [tuple(row) for row in connection.execute(select(Sidemark.id, Sidemark.designer_id))]
+        first_inventory_id = _next_id(connection, Inventory)
+        first_workorder_id = _next_id(connection, Workorder)
+    logging.info("Created %s designers and %s sidemarks", counts['designers'], counts['sidemarks'])
+
+    if not designer_ids or not sidemark_rows:
+        raise ValueError("Not enough designers or sidemarks available to create workorders.")
+
+    def run(fn, tasks, state):
+        if workers:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)) as executor:
+                _write_all(_bounded_map(executor, fn, tasks, workers * 2))
+        else:
+            _init_worker(state)
+            _write_all(map(fn, tasks))
+
+    def _write_all(results):
+        for table, rows, items in results:
+            writer.write(Inventory.__table__ if table == 'inventory' else Workorder.__table__, rows)
+            writer.write(WorkorderItem.__table__, items)
+            counts[table] += len(rows)
+            counts['workorder_items'] += len(items)
+            logging.info("%s: %s rows written", table, counts[table])
+
+    run(inventory_chunk, _chunks(seed, first_inventory_id, inventory, chunk_size), {'designer_ids': designer_ids})
+
+    with engine.connect() as connection:
+        inventory_ids = array('l', connection.scalars(select(Inventory.id)))
+    if workorders and not inventory_ids:
+        raise ValueError("No inventory available to create workorder items.")
+
+    run(workorder_chunk, _chunks(seed, first_workorder_id, workorders, chunk_size), {
+        'sidemarks': sidemark_rows,
+        'inventory_ids': inventory_ids,
+        'items_per_workorder': items_per_workorder,
+        'history_days': history_days,
+    })
+
+    with engine.begin() as connection:
+        rebuild(connection)
+    logging.info("Billing rollups rebuilt")
+
+    logging.info("Data generation completed in %.1fs: %s", time.perf_counter() - started, counts)
+    return counts
+
+
+def _range(value):
+    low, _, high = value.partition('-')
+    return int(low), int(high or low)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic dataset.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--designers', type=int, default=100)
+    parser.add_argument('--sidemarks-per-designer', type=_range, default=(3, 11), help="range, e.g. 3-11")
+    parser.add_argument('--inventory', type=int, default=10000)
+    parser.add_argument('--workorders', type=int, default=10000)
+    parser.add_argument('--items-per-workorder', type=_range, default=(3, 15), help="range, e.g. 3-15")
+    parser.add_argument('--history-days', type=int, default=730, help="spread of workorder_date")
+    parser.add_argument('--workers', type=int, default=None, help="generator processes, 0 runs inline")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--load-data', action='store_true',
+                        help="stage chunks as CSV and use MySQL LOAD DATA LOCAL INFILE")
+    parser.add_argument('--database-url', default=None, help="defaults to the app's DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or DATABASE_URL
+    if args.load_data:
+        engine = create_engine(url, connect_args={'local_infile': True})
+    elif args.database_url:
+        engine = create_engine(url)
+    else:
+        engine = get_engine()
+
+    generate(engine, seed=args.seed, designers=args.designers, sidemarks_per_designer=args.sidemarks_per_designer,
+             inventory=args.inventory, workorders=args.workorders, items_per_workorder=args.items_per_workorder,
+             history_days=args.history_days, workers=args.workers, chunk_size=args.chunk_size,
+             load_data=args.load_data)
+
+
+if __name__ == "__main__":
+    main()
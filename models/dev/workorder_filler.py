@@ -2,6 +2,7 @@ import logging
 from faker import Faker
 from models import Workorder, WorkorderItem, Designer, Sidemark, Inventory  # replace with actual import paths
 from db.database import DatabaseSession
+from models.dev.generate import furniture_name
 import random
 
 # Configure logging
@@ -18,14 +19,17 @@ furniture_types = ["Chair", "Table", "Sofa", "Bed", "Cabinet", "Desk", "Shelf",
 
 # Function to generate a unique furniture name
 def generate_furniture_name(existing_names):
-    while True:
-        color = random.choice(colors)
-        material = random.choice(materials)
-        furniture_type = random.choice(furniture_types)
-        name = f"{color} {material} {furniture_type}"
-        if name not in existing_names:  # Ensure the name is unique
-            existing_names.add(name)
-            return name
+    color = random.choice(colors)
+    material = random.choice(materials)
+    furniture_type = random.choice(furniture_types)
+    name = f"{color} {material} {furniture_type}"
+    # once the random pick collides, walk the numbered series so the name space never runs out
+    index = len(existing_names)
+    while name in existing_names:
+        name = furniture_name(index)
+        index += 1
+    existing_names.add(name)
+    return name
 
 
 def generate_sku():
@@ -74,7 +78,6 @@ def create_inventory(session, designers, n=100):
             unpacked=random.randint(0, 1),
             assembly_time=random.randint(0, 120)
         )
-        logging.info(f"Generated Inventory: {inventory.item_name}, SKU: {inventory.sku}")
         inventories.append(inventory)
         session.add(inventory)
     session.commit()  # Commit the inventories to ensure IDs are assigned
@@ -95,8 +98,6 @@ def create_workorders(session, sidemarks):
                 sidemark_id=sidemark.id,  # Link to the current sidemark
                 status=fake.random_element(['pending', 'processing', 'completed'])  # Random status
             )
-            logging.info(
-                f"Generated Workorder: {workorder.workorder_id}, Status: {workorder.status}, Sidemark ID: {workorder.sidemark_id}")
             workorders.append(workorder)
             session.add(workorder)
     session.commit()  # Commit the workorders to ensure IDs are assigned
@@ -120,8 +121,6 @@ def create_workorder_items(session, workorders, inventories):
                 assembled=random.randint(0, 1),  # Assembled status
                 total_fee=random.uniform(100.0, 5000.0)  # Random fee
             )
-            logging.info(
-                f"Generated WorkorderItem: Workorder ID: {workorder_item.workorder_id}, Inventory ID: {workorder_item.inventory_id}, Quantity: {workorder_item.quantity}")
             workorder_items.append(workorder_item)
             session.add(workorder_item)
     session.commit()  # Commit the workorder items to ensure IDs are assigned
@@ -1,12 +1,25 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, Index, Enum, DateTime
 from sqlalchemy.orm import relationship
 
-from .base import Base
+from .base import Base, VersionedMixin
 from .orders import WorkorderItem
 
 
-class Inventory(Base):
+class Inventory(VersionedMixin, Base):
     __tablename__ = 'inventory'
+    # the single column index keeps "designer_id = ? ORDER BY id" pages sorted by primary key
+    __table_args__ = (
+        Index('ix_inventory_designer', 'designer_id'),
+        Index('ix_inventory_designer_active', 'designer_id', 'active'),
+        Index('ix_inventory_sku', 'sku'),
+        # a SKU names one item per designer; the import upserts on it
+        Index('uq_inventory_designer_sku', 'designer_id', 'sku', unique=True),
+        # MySQL only, other databases search through services.search.InventoryIndex
+        Index('ft_inventory_search', 'sku', 'item_name', 'manufacture', 'description',
+              mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
     id = Column(Integer, primary_key=True)
     item_name = Column(String(255), nullable=False)
     sku = Column(String(255))
@@ -63,8 +76,23 @@ class Inventory(Base):
         self.photos = photos
 
 
+# Uploaded photos live in services.storage under storage_key, with a thumbnail and one size-bucketed
+# variant generated in the background; rows without a storage_key only carry an external url
 class Photo(Base):
     __tablename__ = 'photo'
+    __table_args__ = (
+        Index('ix_photo_inventory_status', 'inventory_id', 'status'),
+    )
     id = Column(Integer, primary_key=True)
     url = Column(String(500))
     inventory_id = Column(Integer, ForeignKey('inventory.id'))
+    storage_key = Column(String(255))
+    content_type = Column(String(100))
+    size_bytes = Column(Integer)
+    width = Column(Integer)
+    height = Column(Integer)
+    status = Column(Enum('pending', 'ready', 'failed'))
+    thumbnail_key = Column(String(255))
+    variant_key = Column(String(255))
+    variant_width = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
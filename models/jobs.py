@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Text, JSON, Index
+
+from .base import Base
+
+
+# Background job queue, claimed by services.jobs workers with SELECT ... FOR UPDATE SKIP LOCKED
+class Job(Base):
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        Index('ix_jobs_status_run_at', 'status', 'run_at'),
+        Index('ix_jobs_status_kind', 'status', 'kind'),
+    )
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum('queued', 'running', 'done', 'failed'), nullable=False, default='queued')
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String(64))
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
@@ -1,13 +1,18 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Enum, Float, ForeignKey, DateTime, Boolean, func
+from sqlalchemy import Column, Integer, String, Enum, Float, ForeignKey, DateTime, Boolean, Index, func
 from sqlalchemy.orm import relationship
 
-from .base import Base
+from .base import Base, VersionedMixin
 
 
-class Workorder(Base):
+class Workorder(VersionedMixin, Base):
     __tablename__ = 'workorders'
+    __table_args__ = (
+        Index('ix_workorders_designer_sidemark', 'designer_id', 'sidemark_id'),
+        Index('ix_workorders_sidemark_status', 'sidemark_id', 'status'),
+        Index('ix_workorders_status_date', 'status', 'workorder_date'),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     workorder_id = Column(String(255), unique=True)
     designer_id = Column(Integer, ForeignKey('designers.id'))
@@ -24,8 +29,12 @@ class Workorder(Base):
     tagged = Column(Boolean, default=False)
 
 
-class WorkorderItem(Base):
+class WorkorderItem(VersionedMixin, Base):
     __tablename__ = 'workorder_items'
+    # covers the workorder -> inventory join without touching the item rows
+    __table_args__ = (
+        Index('ix_workorder_items_workorder_inventory', 'workorder_id', 'inventory_id'),
+    )
     id = Column(Integer, primary_key=True)
     workorder_id = Column(Integer, ForeignKey('workorders.id'))
     inventory_id = Column(Integer, ForeignKey('inventory.id'))
@@ -54,6 +63,9 @@ class WorkorderItem(Base):
 # Class for grouping inventory that was received together for proper fee calculations
 class Shipment(Base):
     __tablename__ = 'shipments'
+    __table_args__ = (
+        Index('ix_shipments_workorder', 'workorder_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     workorder_id = Column(Integer, ForeignKey('workorders.id'))
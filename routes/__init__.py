@@ -2,4 +2,6 @@ from flask import Blueprint
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
-from . import dashboard_routes
+from . import (dashboard_routes, workorder_routes, billing_routes, summary_routes, search_routes,
+               photo_routes, scan_routes, fee_routes, export_routes, import_routes, tree_routes,
+               archive_routes)
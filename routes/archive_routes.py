@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from flask import jsonify, request
+from sqlalchemy import func
+
+from . import dashboard_bp
+from .params import date_range, keyset_cursor
+from db.database import DatabaseSession
+from models.archive import InventoryArchive, ShipmentArchive, WorkorderArchive, WorkorderItemArchive
+from models.inventory import Inventory
+from services.archive import ARCHIVE_AFTER_DAYS
+from services.jobs import enqueue
+from services.serialization import (ARCHIVED_INVENTORY, ARCHIVED_SHIPMENT, ARCHIVED_WORKORDER,
+                                    ARCHIVED_WORKORDER_ITEM)
+
+ARCHIVE_PAGE_SIZE = 100
+ARCHIVE_PAGE_SIZE_MAX = 1000
+
+
+def _page(session, query, key):
+    """One keyset page of ``query`` after ``?after=``, with the cursor of the next page."""
+    limit = min(max(request.args.get('limit', ARCHIVE_PAGE_SIZE, type=int), 1), ARCHIVE_PAGE_SIZE_MAX)
+    after = keyset_cursor()
+    if after is not None:
+        query = query.where(key > after)
+    # fetch one extra row to know whether another page exists
+    rows = session.execute(query.order_by(key).limit(limit + 1)).all()
+    return rows[:limit], rows[limit - 1].id if len(rows) > limit else None
+
+
+@dashboard_bp.route('/api/archive/designer/<int:designer_id>/workorders', methods=['GET'])
+def view_archived_workorders(designer_id):
+    """
+    Page through a designer's archived workorders by id (``?limit=N&after=ID``), optionally of
+    one ``sidemark_id`` and within ``from``/``to`` workorder dates.
+    """
+    start, end = date_range()
+    query = ARCHIVED_WORKORDER.select('list').where(WorkorderArchive.designer_id == designer_id)
+    sidemark_id = request.args.get('sidemark_id', type=int)
+    if sidemark_id is not None:
+        query = query.where(WorkorderArchive.sidemark_id == sidemark_id)
+    if start:
+        query = query.where(WorkorderArchive.workorder_date >= start)
+    if end:
+        query = query.where(WorkorderArchive.workorder_date < end + timedelta(days=1))
+
+    with DatabaseSession() as session:
+        rows, next_after = _page(session, query, WorkorderArchive.id)
+
+    return jsonify({'items': ARCHIVED_WORKORDER.dump_rows(rows), 'next_after': next_after}), 200
+
+
+@dashboard_bp.route('/api/archive/workorder/<int:workorder_id>', methods=['GET'])
+def view_archived_workorder(workorder_id):
+    """Return an archived workorder with its items and shipments."""
+    items_query = (
+        ARCHIVED_WORKORDER_ITEM.select('detail')
+        # the inventory may still be hot or may have been archived after the workorder
+        .add_columns(func.coalesce(Inventory.sku, InventoryArchive.sku).label('sku'),
+                     func.coalesce(Inventory.item_name, InventoryArchive.item_name).label('item_name'))
+        .outerjoin(Inventory, WorkorderItemArchive.inventory_id == Inventory.id)
+        .outerjoin(InventoryArchive, WorkorderItemArchive.inventory_id == InventoryArchive.id)
+        .where(WorkorderItemArchive.workorder_id == workorder_id)
+        .order_by(WorkorderItemArchive.id)
+    )
+    with DatabaseSession() as session:
+        workorder = ARCHIVED_WORKORDER.dump_rows(session.execute(
+            ARCHIVED_WORKORDER.select('detail').where(WorkorderArchive.id == workorder_id)))
+        if not workorder:
+            return jsonify({'status': 'fail', 'message': 'Archived workorder not found.'}), 404
+        items = ARCHIVED_WORKORDER_ITEM.dump_rows(session.execute(items_query))
+        shipments = ARCHIVED_SHIPMENT.dump_rows(session.execute(
+            ARCHIVED_SHIPMENT.select('detail').where(ShipmentArchive.workorder_id == workorder_id)
+            .order_by(ShipmentArchive.id)))
+
+    return jsonify({'workorder': workorder[0], 'items': items, 'shipments': shipments}), 200
+
+
+@dashboard_bp.route('/api/archive/designer/<int:designer_id>/inventory', methods=['GET'])
+def view_archived_inventory(designer_id):
+    """Page through a designer's archived inventory by id (``?limit=N&after=ID``)."""
+    query = ARCHIVED_INVENTORY.select('list').where(InventoryArchive.designer_id == designer_id)
+    with DatabaseSession() as session:
+        rows, next_after = _page(session, query, InventoryArchive.id)
+
+    return jsonify({'items': ARCHIVED_INVENTORY.dump_rows(rows), 'next_after': next_after}), 200
+
+
+@dashboard_bp.route('/api/archive/run', methods=['POST'])
+def schedule_archive():
+    """Queue the archival job; ``{"days": N}`` overrides the minimum age of archived records."""
+    data = request.get_json(silent=True) or {}
+    days = data.get('days', ARCHIVE_AFTER_DAYS)
+    if not isinstance(days, int) or isinstance(days, bool) or days < 1:
+        return jsonify({'status': 'fail', 'message': 'days must be a positive whole number.'}), 400
+
+    with DatabaseSession() as session:
+        job = enqueue(session, 'archive_records', days=days)
+        session.commit()
+        job_id = job.id
+
+    return jsonify({'status': 'queued', 'job_id': job_id, 'days': days}), 202
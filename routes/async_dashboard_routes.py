@@ -0,0 +1,158 @@
+import asyncio
+import os
+
+from quart import Blueprint, Response, current_app, jsonify, request
+
+from db.async_database import AsyncSessionLocal
+from services.changes import CHANGES_REPLAY_MAX, AsyncSubscription, feed, replay
+from services.photos import with_thumbnails
+from services.serialization import DESIGNER, INVENTORY, SIDEMARK, WORKORDER
+from .params import InvalidParameter, keyset_cursor
+from .queries import (designers_query, designer_exists_query, designer_inventory_query, sidemarks_query,
+                      sidemark_orders_query, designer_sidemark_orders_query, workorder_inventory_query)
+
+# async variant of the dashboard read endpoints, served by asgi.py on the same URLs
+async_dashboard_bp = Blueprint('async_dashboard', __name__)
+
+INVENTORY_PAGE_SIZE = 100
+INVENTORY_PAGE_SIZE_MAX = 1000
+
+# comment lines sent while nothing changes keep proxies from closing idle streams
+CHANGES_HEARTBEAT = float(os.getenv('CHANGES_HEARTBEAT', 15))
+# how long browsers wait before reconnecting, in milliseconds
+CHANGES_RETRY_MS = int(os.getenv('CHANGES_RETRY_MS', 3000))
+
+
+@async_dashboard_bp.errorhandler(InvalidParameter)
+async def invalid_parameter(error):
+    return jsonify({'status': 'fail', 'message': str(error)}), 400
+
+
+async def _fetch_all(schema, query):
+    async with AsyncSessionLocal() as session:
+        return schema.dump_rows((await session.execute(query)).all())
+
+
+async def _fetch_inventory(query):
+    async with AsyncSessionLocal() as session:
+        items = INVENTORY.dump_rows((await session.execute(query)).all())
+        return await session.run_sync(with_thumbnails, items)
+
+
+@async_dashboard_bp.route('/api/designers/', methods=['GET'])
+async def get_designer_names():
+    return jsonify(await _fetch_all(DESIGNER, designers_query())), 200
+
+
+@async_dashboard_bp.route('/api/designer/<int:designer_id>/inventory', methods=['GET'])
+async def view_designer_inventory(designer_id):
+    """Fetch inventory items for a designer, in full or one ``?limit=N&after=ID`` keyset page."""
+    limit = request.args.get('limit', type=int)
+    after = keyset_cursor(request.args)
+
+    if limit is None and after is None:
+        return jsonify(await _fetch_inventory(designer_inventory_query(designer_id))), 200
+
+    limit = min(max(limit or INVENTORY_PAGE_SIZE, 1), INVENTORY_PAGE_SIZE_MAX)
+    rows = await _fetch_inventory(designer_inventory_query(designer_id, after).limit(limit + 1))
+    items = rows[:limit]
+    next_after = items[-1]['id'] if len(rows) > limit else None
+    return jsonify({"items": items, "next_after": next_after}), 200
+
+
+@async_dashboard_bp.route('/api/designer/<int:designer_id>/sidemarks', methods=['GET'])
+async def get_sidemarks_for_designer(designer_id):
+    async with AsyncSessionLocal() as session:
+        if await session.scalar(designer_exists_query(designer_id)) is None:
+            return jsonify({"error": "Designer not found"}), 404
+        sidemark_data = SIDEMARK.dump_rows((await session.execute(sidemarks_query(designer_id))).all())
+
+    return jsonify(sidemark_data), 200
+
+
+@async_dashboard_bp.route('/api/sidemark/<int:sidemark_id>/orders', methods=['GET'])
+async def get_orders_for_sidemark(sidemark_id):
+    return jsonify(await _fetch_all(WORKORDER, sidemark_orders_query(sidemark_id))), 200
+
+
+@async_dashboard_bp.route('/api/designer/<int:designer_id>/sidemark/<int:sidemark_id>/orders', methods=['GET'])
+async def view_orders(designer_id, sidemark_id):
+    """Return the orders for a specific designer and sidemark as JSON."""
+    return jsonify(await _fetch_all(WORKORDER, designer_sidemark_orders_query(designer_id, sidemark_id))), 200
+
+
+@async_dashboard_bp.route('/api/workorder/<int:workorder_id>/inventory', methods=['GET'])
+async def view_workorder_inventory(workorder_id):
+    """Return the inventory of a workorder in JSON format."""
+    return jsonify(await _fetch_inventory(workorder_inventory_query(workorder_id))), 200
+
+
+def _event(change, dumps):
+    return f"id: {change['id']}\nevent: {change['kind']}\ndata: {dumps(change)}\n\n"
+
+
+async def _stream_changes(designer_id, sidemark_id, last_event_id, dumps):
+    """
+    Yield server-sent events: missed changes after ``Last-Event-ID`` first, then live ones. The
+    subscription is made once the body starts, so a stream closed before that leaves none behind.
+    """
+    subscription = AsyncSubscription(asyncio.get_running_loop(), designer_id, sidemark_id)
+    # the feed's database reads block, they run off the event loop
+    await asyncio.to_thread(feed.subscribe, subscription=subscription)
+    try:
+        yield f"retry: {CHANGES_RETRY_MS}\n\n"
+        replayed = set()
+        if last_event_id is not None:
+            missed = await asyncio.to_thread(replay, last_event_id, designer_id, sidemark_id, CHANGES_REPLAY_MAX + 1)
+            if len(missed) > CHANGES_REPLAY_MAX:
+                # too far behind to catch up change by change, the client reloads its data instead
+                yield "event: reset\ndata: {}\n\n"
+                missed = []
+            for change in missed:
+                yield _event(change, dumps)
+                replayed.add(change['id'])
+
+        while not subscription.overflowed:
+            try:
+                change = await asyncio.wait_for(subscription.queue.get(), CHANGES_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            # the subscription was open while replaying, so it may repeat changes the client has
+            if change['id'] in replayed or change['id'] <= (last_event_id or 0):
+                continue
+            yield _event(change, dumps)
+    finally:
+        feed.unsubscribe(subscription)
+
+
+@async_dashboard_bp.route('/api/changes', methods=['GET'])
+async def stream_changes():
+    """
+    Stream workorder status, workorder item and inventory changes as server-sent events,
+    optionally limited with ``?designer_id=`` and ``?sidemark_id=``. Reconnecting clients send
+    ``Last-Event-ID`` and receive what they missed first. An open stream holds no thread, only a
+    queue on the event loop.
+    """
+    try:
+        designer_id = request.args.get('designer_id', type=int)
+        sidemark_id = request.args.get('sidemark_id', type=int)
+        last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+        last_event_id = int(last_event_id) if last_event_id not in (None, '') else None
+    except ValueError:
+        return jsonify({'status': 'fail', 'message': 'Last-Event-ID must be an integer.'}), 400
+
+    response = Response(_stream_changes(designer_id, sidemark_id, last_event_id, current_app.json.dumps),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # nginx would otherwise buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    # the stream stays open until the client leaves
+    response.timeout = None
+    return response
+
+
+@async_dashboard_bp.route('/api/changes/stats', methods=['GET'])
+async def view_change_feed_stats():
+    """Return this process's change feed subscribers and last polled outbox id."""
+    return jsonify({'subscribers': feed.subscriber_count, 'last_id': feed.last_id}), 200
@@ -0,0 +1,66 @@
+from flask import jsonify
+from sqlalchemy import func, select
+
+from . import dashboard_bp
+from .params import date_range
+from db.database import DatabaseSession
+from models.billing import FeeRollup, StorageRollup
+from services.billing import FEE_TOTALS
+
+
+def _fees_by_status(session, *conditions):
+    start, end = date_range()
+    query = (
+        select(FeeRollup.status, *(func.sum(getattr(FeeRollup, total)) for total in FEE_TOTALS))
+        .where(*conditions)
+        .group_by(FeeRollup.status)
+    )
+    if start:
+        query = query.where(FeeRollup.day >= start)
+    if end:
+        query = query.where(FeeRollup.day <= end)
+
+    fees = {status: {'item_count': 0, 'quantity': 0, 'total_fee': 0.0}
+            for status in FeeRollup.__table__.c.status.type.enums}
+    for status, item_count, quantity, total_fee in session.execute(query):
+        fees[status] = {'item_count': int(item_count), 'quantity': int(quantity),
+                        'total_fee': round(float(total_fee), 2)}
+    return fees
+
+
+@dashboard_bp.route('/api/designer/<int:designer_id>/billing', methods=['GET'])
+def view_designer_billing(designer_id):
+    """Return a designer's storage and fee totals from the rollup tables."""
+    start, end = date_range()
+    with DatabaseSession() as session:
+        latest = select(StorageRollup).where(StorageRollup.designer_id == designer_id)
+        item_days = select(func.coalesce(func.sum(StorageRollup.item_days), 0)).where(
+            StorageRollup.designer_id == designer_id)
+        if end:
+            latest = latest.where(StorageRollup.day <= end)
+            item_days = item_days.where(StorageRollup.day <= end)
+        if start:
+            item_days = item_days.where(StorageRollup.day >= start)
+
+        storage = session.scalars(latest.order_by(StorageRollup.day.desc()).limit(1)).first()
+        billing = {
+            'designer_id': designer_id,
+            'storage': {
+                'day': storage.day.isoformat() if storage else None,
+                'items_in_storage': storage.items_in_storage if storage else 0,
+                'cubic_footage': round(storage.cubic_footage, 2) if storage else 0.0,
+            },
+            'item_days': int(session.scalar(item_days)),
+            'fees': _fees_by_status(session, FeeRollup.designer_id == designer_id),
+        }
+
+    return jsonify(billing), 200
+
+
+@dashboard_bp.route('/api/designer/<int:designer_id>/sidemark/<int:sidemark_id>/billing', methods=['GET'])
+def view_sidemark_billing(designer_id, sidemark_id):
+    """Return the fee totals of one sidemark from the rollup tables."""
+    with DatabaseSession() as session:
+        fees = _fees_by_status(session, FeeRollup.designer_id == designer_id, FeeRollup.sidemark_id == sidemark_id)
+
+    return jsonify({'designer_id': designer_id, 'sidemark_id': sidemark_id, 'fees': fees}), 200
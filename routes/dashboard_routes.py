@@ -1,118 +1,141 @@
-from flask import jsonify, request
+from flask import Response, current_app, jsonify, request
 from . import dashboard_bp
+from .params import keyset_cursor
 from db.database import DatabaseSession
+from services.cache import cache, cached_response
+from services.etag import conditional_get, version_aggregates
+from services.photos import with_thumbnails
 from models.designer import Designer, Sidemark
 from models.inventory import Inventory
 from models.orders import Workorder, WorkorderItem
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select
+from services.serialization import DESIGNER, INVENTORY, SIDEMARK, WORKORDER
+from .queries import (designers_query, designer_exists_query, designer_inventory_query, sidemarks_query,
+                      sidemark_orders_query, designer_sidemark_orders_query, workorder_inventory_query)
+
+# keyset pagination and streaming settings for the designer inventory listing
+INVENTORY_PAGE_SIZE = 100
+INVENTORY_PAGE_SIZE_MAX = 1000
+INVENTORY_STREAM_BATCH_SIZE = 1000
+
+
+def _designer_versions():
+    return select(*version_aggregates(Designer)).where(Designer.designer_name.isnot(None))
+
+
+def _workorder_inventory_versions(workorder_id):
+    workorder_version = select(Workorder.version).where(Workorder.id == workorder_id).scalar_subquery()
+    return (
+        select(
+            workorder_version,
+            *version_aggregates(WorkorderItem),
+            func.coalesce(func.sum(Inventory.version), 0),
+            func.max(Inventory.updated_at),
+        )
+        .select_from(WorkorderItem)
+        .join(Inventory, WorkorderItem.inventory_id == Inventory.id)
+        .where(WorkorderItem.workorder_id == workorder_id)
+    )
 
 
 @dashboard_bp.route('/api/designers/', methods=['GET'])
+@conditional_get(_designer_versions)
+@cached_response('designers')
 def get_designer_names():
     with DatabaseSession() as session:
-        designers = session.query(
-            Designer.id,
-            Designer.designer_name,
-            Designer.company,
-            Designer.email,
-            Designer.phone
-        ).filter(Designer.designer_name.isnot(None)).all()
-
-        designer_data = [
-            {
-                "id": designer.id,
-                "designer_name": designer.designer_name,
-                "company": designer.company,
-                "email": designer.email,
-                "phone": designer.phone
-            }
-            for designer in designers
-        ]
-
-        return jsonify(designer_data), 200
+        designer_data = DESIGNER.dump_rows(session.execute(designers_query()))
+
+    return jsonify(designer_data), 200
 
 
 @dashboard_bp.route('/api/designer/<int:designer_id>/inventory', methods=['GET'])
 def view_designer_inventory(designer_id):
-    """Fetch all inventory items for a specific designer in JSON format."""
+    """
+    Fetch inventory items for a specific designer in JSON format.
+
+    ``?limit=N&after=ID`` returns one keyset page ordered by ``Inventory.id`` together with the
+    cursor for the next page, ``?stream=true`` streams the whole list as a JSON array.
+    """
+    limit = request.args.get('limit', type=int)
+    after = keyset_cursor()
+
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return Response(_stream_designer_inventory(designer_id, current_app.json.dumps),
+                        mimetype='application/json')
+
+    if limit is None and after is None:
+        with DatabaseSession() as session:
+            rows = session.execute(designer_inventory_query(designer_id))
+            inventory_data = with_thumbnails(session, INVENTORY.dump_rows(rows))
+        return jsonify(inventory_data), 200
+
+    limit = min(max(limit or INVENTORY_PAGE_SIZE, 1), INVENTORY_PAGE_SIZE_MAX)
+
     with DatabaseSession() as session:
-        designer_inventory = session.query(Inventory).filter_by(designer_id=designer_id).all()
+        # fetch one extra row to know whether another page exists
+        rows = session.execute(designer_inventory_query(designer_id, after).limit(limit + 1)).all()
+        items = with_thumbnails(session, INVENTORY.dump_rows(rows[:limit]))
 
-    inventory_data = [{"id": item.id, "item_name": item.item_name, "quantity": item.quantity} for item in
-                      designer_inventory]
+    next_after = items[-1]['id'] if len(rows) > limit else None
 
-    return jsonify(inventory_data), 200
+    return jsonify({"items": items, "next_after": next_after}), 200
+
+
+def _stream_designer_inventory(designer_id, dumps):
+    """Yield a designer's inventory as a JSON array, reading rows from a server-side cursor in batches."""
+    query = designer_inventory_query(designer_id).execution_options(yield_per=INVENTORY_STREAM_BATCH_SIZE)
+
+    # thumbnails are looked up on a second connection while the first one streams the cursor
+    with DatabaseSession() as session, DatabaseSession() as photo_session:
+        yield '['
+        first = True
+        for batch in session.execute(query).partitions():
+            # one encoder call per batch, without the array brackets
+            items = with_thumbnails(photo_session, INVENTORY.dump_rows(batch))
+            yield ('' if first else ',') + dumps(items)[1:-1]
+            first = False
+        yield ']'
 
 
 @dashboard_bp.route('/api/designer/<int:designer_id>/sidemarks', methods=['GET'])
+@cached_response('designer:{designer_id}:sidemarks')
 def get_sidemarks_for_designer(designer_id):
     with DatabaseSession() as session:
-        # get designer information
-        designer = session.query(Designer).filter_by(id=designer_id).first()
-
-        if designer is None:
+        # check the designer exists without loading the row
+        if session.scalar(designer_exists_query(designer_id)) is None:
             return jsonify({"error": "Designer not found"}), 404
 
         # get sidemarks associated with the designer
-        sidemarks = session.query(Sidemark).filter_by(designer_id=designer_id).all()
-
-        sidemark_data = [{"id": s.id, "name": s.name} for s in sidemarks]
+        sidemark_data = SIDEMARK.dump_rows(session.execute(sidemarks_query(designer_id)))
 
     return jsonify(sidemark_data), 200
 
 
 @dashboard_bp.route('/api/sidemark/<int:sidemark_id>/orders', methods=['GET'])
+@cached_response('sidemark:{sidemark_id}:orders')
 def get_orders_for_sidemark(sidemark_id):
     with DatabaseSession() as session:
-        orders = session.query(Workorder).filter_by(sidemark_id=sidemark_id).all()
-        order_data = [{"id": o.id, "workorder_id": o.workorder_id, "status": o.status} for o in orders]
+        order_data = WORKORDER.dump_rows(session.execute(sidemark_orders_query(sidemark_id)))
     return jsonify(order_data), 200
 
 
 @dashboard_bp.route('/api/designer/<int:designer_id>/sidemark/<int:sidemark_id>/orders', methods=['GET'])
+@cached_response('designer:{designer_id}:sidemark:{sidemark_id}:orders')
 def view_orders(designer_id, sidemark_id):
     """Return the orders for a specific designer and sidemark as JSON."""
     with DatabaseSession() as session:
-        orders = (
-            session.query(Workorder)
-            .options(joinedload(Workorder.sidemark), joinedload(Workorder.designer))
-            .filter(Workorder.sidemark_id == sidemark_id, Workorder.designer_id == designer_id)
-            .all()
-        )
+        order_data = WORKORDER.dump_rows(session.execute(designer_sidemark_orders_query(designer_id, sidemark_id)))
 
-    order_data = [{"id": o.id, "workorder_id": o.workorder_id, "status": o.status} for o in orders]
     return jsonify(order_data), 200
 
 
 @dashboard_bp.route('/api/workorder/<int:workorder_id>/inventory', methods=['GET'])
+@conditional_get(_workorder_inventory_versions)
 def view_workorder_inventory(workorder_id):
     """Return the details of a workorder and its related inventory in JSON format."""
     with DatabaseSession() as session:
-
-        workorder = session.query(Workorder).filter_by(id=workorder_id).first()
-
-        workorder_items = (
-            session.query(WorkorderItem, Inventory)
-            .join(Inventory, WorkorderItem.inventory_id == Inventory.id)
-            .filter(WorkorderItem.workorder_id == workorder_id)
-            .all()
-        )
-
-        inventory_data = [
-            {
-                "id": item.Inventory.id,
-                "item_name": item.Inventory.item_name,
-                "sku": item.Inventory.sku,
-                "manufacture": item.Inventory.manufacture,
-                "quantity": item.Inventory.quantity,
-                "length": item.Inventory.length,
-                "width": item.Inventory.width,
-                "height": item.Inventory.height,
-                "weight": item.Inventory.weight,
-                "description": item.Inventory.description
-            }
-            for item in workorder_items
-        ]
+        rows = session.execute(workorder_inventory_query(workorder_id))
+        inventory_data = with_thumbnails(session, INVENTORY.dump_rows(rows))
 
     return jsonify(inventory_data), 200
 
@@ -132,6 +155,7 @@ def add_sidemark():
                 new_sidemark = Sidemark(name=sidemark_name, designer_id=designer.id)
                 session.add(new_sidemark)
                 session.commit()
+                cache.delete(f"designer:{designer.id}:sidemarks")
 
                 response = {
                     'status': 'success',
@@ -143,32 +167,3 @@ def add_sidemark():
                 return jsonify({'status': 'fail', 'message': 'Designer not found.'}), 400
     else:
         return jsonify({'status': 'fail', 'message': 'Sidemark name or company name is missing.'}), 400
-
-
-@dashboard_bp.route('/api/workorder/<int:workorder_id>/inventory', methods=['GET'])
-def view_workorder(workorder_id):
-    """Return workorder details and associated inventory as JSON."""
-    with DatabaseSession() as session:
-        # query the requested Workorder
-        workorder = session.query(Workorder).filter_by(id=workorder_id).first()
-
-        if not workorder:
-            return jsonify({"status": "fail", "message": "Workorder not found."}), 404
-
-        # get WorkorderItems and associated Inventory
-        workorder_items = (
-            session.query(WorkorderItem, Inventory)
-            .join(Inventory, WorkorderItem.inventory_id == Inventory.id)
-            .filter(WorkorderItem.workorder_id == workorder_id)
-            .all()
-        )
-
-        inventory_data = [
-            {"id": item.Inventory.id, "item_name": item.Inventory.item_name, "quantity": item.WorkorderItem.quantity}
-            for item in workorder_items]
-
-        return jsonify({
-            "status": "success",
-            "workorder_id": workorder_id,
-            "inventory": inventory_data
-        }), 200
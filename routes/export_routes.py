@@ -0,0 +1,52 @@
+from flask import Response, jsonify, request
+
+from . import dashboard_bp
+from .params import date_range
+from .queries import inventory_export_query, workorder_items_export_query, workorders_export_query
+from services.exports import EXPORT_MIMETYPES, export_stream
+
+
+def _export(name, query):
+    """Streams ``query`` as an attachment in the ``?format=`` (csv or xlsx) the client asked for."""
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({'status': 'fail', 'message': f"format must be one of {', '.join(EXPORT_MIMETYPES)}."}), 400
+
+    header = [column.name for column in query.selected_columns]
+    response = Response(export_stream(export_format, header, query, sheet_name=name),
+                        mimetype=EXPORT_MIMETYPES[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}.{export_format}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _dated_name(prefix, start, end):
+    return '_'.join([prefix] + [day.isoformat() for day in (start, end) if day])
+
+
+@dashboard_bp.route('/api/designer/<int:designer_id>/inventory/export', methods=['GET'])
+def export_designer_inventory(designer_id):
+    """Stream a designer's whole inventory as CSV or XLSX."""
+    return _export(f"inventory_designer_{designer_id}", inventory_export_query(designer_id))
+
+
+@dashboard_bp.route('/api/sidemark/<int:sidemark_id>/workorders/export', methods=['GET'])
+def export_sidemark_workorders(sidemark_id):
+    """Stream a sidemark's workorders, optionally within ``from``/``to`` workorder dates."""
+    start, end = date_range()
+    return _export(_dated_name(f"workorders_sidemark_{sidemark_id}", start, end),
+                   workorders_export_query(sidemark_id, start, end))
+
+
+@dashboard_bp.route('/api/sidemark/<int:sidemark_id>/workorder-items/export', methods=['GET'])
+def export_sidemark_workorder_items(sidemark_id):
+    """Stream the items and fees of a sidemark's workorders, optionally within ``from``/``to``."""
+    start, end = date_range()
+    return _export(_dated_name(f"workorder_items_sidemark_{sidemark_id}", start, end),
+                   workorder_items_export_query(sidemark_id, start, end))
+
+
+@dashboard_bp.route('/api/workorder/<int:workorder_id>/items/export', methods=['GET'])
+def export_workorder_items(workorder_id):
+    """Stream one workorder's items with their inventory and fees."""
+    return _export(f"workorder_items_{workorder_id}", workorder_items_export_query(workorder_id=workorder_id))
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from flask import jsonify, request
+
+from . import dashboard_bp
+from db.database import DatabaseSession
+from models.orders import Shipment, Workorder
+from services.fees import (FEE_MINIMUM, RATES, compute_fees, fee_breakdown, receive_shipment, shipment_items,
+                           workorder_items)
+from services.jobs import enqueue
+
+
+@dashboard_bp.route('/api/fees/rates', methods=['GET'])
+def view_fee_rates():
+    """Return the rate table fees are computed with."""
+    return jsonify({'rates': RATES, 'minimum': FEE_MINIMUM}), 200
+
+
+@dashboard_bp.route('/api/shipment/<int:shipment_id>/fees', methods=['GET'])
+def view_shipment_fees(shipment_id):
+    """Return the per-item fee breakdown of a shipment next to the stored fees, without writing."""
+    with DatabaseSession() as session:
+        if session.get(Shipment, shipment_id) is None:
+            return jsonify({'status': 'fail', 'message': 'Shipment not found.'}), 404
+        items = fee_breakdown(session, *shipment_items(shipment_id))
+
+    return jsonify({'shipment_id': shipment_id, 'items': items}), 200
+
+
+@dashboard_bp.route('/api/shipment/<int:shipment_id>/receive', methods=['POST'])
+def receive(shipment_id):
+    """Receive a shipment (optional ISO ``receipt_date``), marking its inventory received and pricing its items."""
+    data = request.get_json(silent=True) or {}
+    try:
+        receipt_date = datetime.fromisoformat(data['receipt_date']) if data.get('receipt_date') else None
+    except (TypeError, ValueError):
+        return jsonify({'status': 'fail', 'message': 'receipt_date must be an ISO 8601 date.'}), 400
+
+    with DatabaseSession() as session:
+        shipment = session.get(Shipment, shipment_id)
+        if shipment is None:
+            return jsonify({'status': 'fail', 'message': 'Shipment not found.'}), 404
+        updated = receive_shipment(session, shipment, receipt_date)
+        session.commit()
+        response = {
+            'shipment_id': shipment_id,
+            'receipt_date': shipment.receipt_date.isoformat(),
+            'updated': updated,
+            'items': fee_breakdown(session, *shipment_items(shipment_id)),
+        }
+
+    return jsonify(response), 200
+
+
+@dashboard_bp.route('/api/workorder/<int:workorder_id>/fees', methods=['POST'])
+def price_workorder(workorder_id):
+    """Recompute the fees of every item of a workorder and return the breakdown."""
+    with DatabaseSession() as session:
+        if session.get(Workorder, workorder_id) is None:
+            return jsonify({'status': 'fail', 'message': 'Workorder not found.'}), 404
+        updated = compute_fees(session, *workorder_items(workorder_id))
+        session.commit()
+        items = fee_breakdown(session, *workorder_items(workorder_id))
+
+    return jsonify({'workorder_id': workorder_id, 'updated': updated, 'items': items}), 200
+
+
+@dashboard_bp.route('/api/fees/recompute', methods=['POST'])
+def schedule_fee_recompute():
+    """Queue the batch job that reprices a whole month (``{"month": "YYYY-MM"}``)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        month = datetime.strptime(data.get('month') or '', '%Y-%m').strftime('%Y-%m')
+    except ValueError:
+        return jsonify({'status': 'fail', 'message': 'month must be given as YYYY-MM.'}), 400
+
+    with DatabaseSession() as session:
+        job = enqueue(session, 'recompute_fees', month=month)
+        session.commit()
+        job_id = job.id
+
+    return jsonify({'status': 'queued', 'job_id': job_id, 'month': month}), 202
@@ -0,0 +1,42 @@
+import csv
+import io
+
+from flask import jsonify, request
+from sqlalchemy import select
+
+from . import dashboard_bp
+from db.database import DatabaseSession
+from models.designer import Designer
+from services.inventory_import import import_inventory
+
+
+@dashboard_bp.route('/api/designer/<int:designer_id>/inventory/import', methods=['POST'])
+def import_designer_inventory(designer_id):
+    """
+    Import a designer's inventory from a CSV sent as the request body (``text/csv``) or as the
+    ``file`` part of a multipart form. ``?dry_run=true`` only validates. Returns counts and the
+    errors of every rejected row by CSV line number.
+    """
+    if request.mimetype.startswith('multipart/'):
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'status': 'fail', 'message': 'The CSV file is missing.'}), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+
+    with DatabaseSession() as session:
+        if session.scalar(select(Designer.id).where(Designer.id == designer_id)) is None:
+            return jsonify({'status': 'fail', 'message': 'Designer not found.'}), 404
+        try:
+            text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+            report = import_inventory(session, designer_id, text, dry_run=dry_run)
+        except ValueError as error:
+            # also covers files that are not UTF-8; chunks before the bad one stay imported
+            return jsonify({'status': 'fail', 'message': str(error)}), 400
+        except csv.Error as error:
+            return jsonify({'status': 'fail', 'message': f'The CSV could not be parsed: {error}'}), 400
+
+    status = 'success' if not report['error_count'] else ('partial' if report['valid'] else 'fail')
+    return jsonify({'status': status, 'dry_run': dry_run, **report}), 200 if report['valid'] or not report['rows'] else 400
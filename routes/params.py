@@ -0,0 +1,36 @@
+"""Query string parsing shared by the dashboard routes."""
+from datetime import date
+
+from flask import jsonify, request
+
+from . import dashboard_bp
+
+
+class InvalidParameter(ValueError):
+    """A query parameter that is present but does not parse; the request is answered with 400."""
+
+
+@dashboard_bp.errorhandler(InvalidParameter)
+def invalid_parameter(error):
+    return jsonify({'status': 'fail', 'message': str(error)}), 400
+
+
+def _parse(args, name, parse, message):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return parse(value)
+    except ValueError:
+        raise InvalidParameter(message) from None
+
+
+def keyset_cursor(args=None):
+    """The ``?after=`` id of keyset pages, None for the first page. ``args`` defaults to the request's."""
+    return _parse(request.args if args is None else args, 'after', int, 'after must be a whole number id.')
+
+
+def date_range():
+    """Parses the optional ``from``/``to`` (YYYY-MM-DD) query parameters."""
+    return tuple(_parse(request.args, name, date.fromisoformat, f'{name} must be a date (YYYY-MM-DD).')
+                 for name in ('from', 'to'))
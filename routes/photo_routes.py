@@ -0,0 +1,116 @@
+import hashlib
+import os
+import posixpath
+
+from flask import current_app, jsonify, request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.wsgi import wrap_file
+
+from . import dashboard_bp
+from db.database import DatabaseSession
+from models.inventory import Inventory, Photo
+from services.photos import (PHOTO_MAX_BYTES, content_type_of, delete_photo, dump_photo, record_upload, schedule,
+                             store_upload)
+from services.storage import StorageLimitExceeded, storage
+
+# stored blobs are never rewritten, so clients and CDNs may keep them for a year
+MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', 365 * 24 * 3600))
+
+
+@dashboard_bp.route('/api/inventory/<int:inventory_id>/photos', methods=['POST'])
+def upload_photo(inventory_id):
+    """
+    Stream a photo into storage, either as the raw request body (``Content-Type: image/...``) or
+    as the ``photo`` part of a multipart form. Thumbnails are generated in the background. The
+    file is stored before the photo row is written, so no transaction stays open during the upload.
+    """
+    if request.content_length is not None and request.content_length > PHOTO_MAX_BYTES:
+        return jsonify({'status': 'fail', 'message': f'Photos are limited to {PHOTO_MAX_BYTES} bytes.'}), 413
+
+    if request.mimetype.startswith('multipart/'):
+        upload = request.files.get('photo')
+        if upload is None:
+            return jsonify({'status': 'fail', 'message': 'The photo file is missing.'}), 400
+        stream, content_type = upload.stream, upload.mimetype
+    else:
+        stream, content_type = request.stream, request.mimetype
+
+    with DatabaseSession() as session:
+        found = session.scalar(select(Inventory.id).where(Inventory.id == inventory_id)) is not None
+        # ends the read transaction, the connection goes back to the pool during the upload
+        session.rollback()
+    if not found:
+        return jsonify({'status': 'fail', 'message': 'Inventory item not found.'}), 404
+
+    try:
+        key, size = store_upload(inventory_id, stream, content_type)
+    except StorageLimitExceeded:
+        return jsonify({'status': 'fail', 'message': f'Photos are limited to {PHOTO_MAX_BYTES} bytes.'}), 413
+    except ValueError as error:
+        return jsonify({'status': 'fail', 'message': str(error)}), 415
+
+    with DatabaseSession() as session:
+        try:
+            photo = record_upload(session, inventory_id, key, content_type, size)
+            session.commit()
+        except IntegrityError:
+            # the item was deleted while the file was uploading
+            session.rollback()
+            storage.delete(key)
+            return jsonify({'status': 'fail', 'message': 'Inventory item not found.'}), 404
+        except BaseException:
+            # without its row the stored file would never be cleaned up
+            session.rollback()
+            storage.delete(key)
+            raise
+        photo_data = dump_photo(photo)
+
+    schedule(photo_data['id'])
+    return jsonify(photo_data), 202
+
+
+@dashboard_bp.route('/api/inventory/<int:inventory_id>/photos', methods=['GET'])
+def view_inventory_photos(inventory_id):
+    """Return every photo of an inventory item with its original, variant and thumbnail URLs."""
+    with DatabaseSession() as session:
+        photos = session.scalars(select(Photo).where(Photo.inventory_id == inventory_id).order_by(Photo.id)).all()
+        photo_data = [dump_photo(photo) for photo in photos]
+
+    return jsonify(photo_data), 200
+
+
+@dashboard_bp.route('/api/photo/<int:photo_id>', methods=['DELETE'])
+def remove_photo(photo_id):
+    with DatabaseSession() as session:
+        photo = session.get(Photo, photo_id)
+        if photo is None:
+            return jsonify({'status': 'fail', 'message': 'Photo not found.'}), 404
+        keys = delete_photo(session, photo)
+        session.commit()
+
+    for key in keys:
+        storage.delete(key)
+    return jsonify({'status': 'success'}), 200
+
+
+@dashboard_bp.route('/media/<path:key>', methods=['GET'])
+def serve_media(key):
+    """Serve a stored photo blob with range request support and immutable cache headers."""
+    # only photo blobs are public; keys are compared after normalizing, so photos/../x is refused
+    if posixpath.normpath(key) != key or '..' in key.split('/') or not key.startswith('photos/'):
+        return jsonify({'status': 'fail', 'message': 'File not found.'}), 404
+    try:
+        size = storage.size(key)
+        handle = storage.open(key)
+    except (KeyError, FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return jsonify({'status': 'fail', 'message': 'File not found.'}), 404
+
+    response = current_app.response_class(wrap_file(request.environ, handle), mimetype=content_type_of(key),
+                                          direct_passthrough=True)
+    response.content_length = size
+    response.set_etag(hashlib.sha1(key.encode('utf-8')).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = MEDIA_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request, accept_ranges=True, complete_length=size)
@@ -0,0 +1,129 @@
+"""
+Column-only SELECTs behind the dashboard read endpoints, shared by the WSGI blueprint and its
+async variant so both serve the same data. Columns come from the model schemas.
+"""
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from models.designer import Designer, Sidemark
+from models.inventory import Inventory
+from models.orders import Workorder, WorkorderItem
+from services.serialization import DESIGNER, INVENTORY, SIDEMARK, WORKORDER, WORKORDER_ITEM
+
+
+def designers_query():
+    return DESIGNER.select('list').where(Designer.designer_name.isnot(None))
+
+
+def designer_exists_query(designer_id):
+    return DESIGNER.select(('id',)).where(Designer.id == designer_id)
+
+
+def designer_inventory_query(designer_id, after=None):
+    query = INVENTORY.select('list').where(Inventory.designer_id == designer_id).order_by(Inventory.id)
+    if after is not None:
+        query = query.where(Inventory.id > after)
+    return query
+
+
+def sidemarks_query(designer_id):
+    return SIDEMARK.select('list').where(Sidemark.designer_id == designer_id)
+
+
+def sidemark_orders_query(sidemark_id):
+    return WORKORDER.select('list').where(Workorder.sidemark_id == sidemark_id)
+
+
+def designer_sidemark_orders_query(designer_id, sidemark_id):
+    return WORKORDER.select('list').where(Workorder.sidemark_id == sidemark_id, Workorder.designer_id == designer_id)
+
+
+def sidemark_nodes_query(designer_id):
+    """A designer's sidemarks with the number of workorders under each."""
+    return (
+        SIDEMARK.select('list')
+        .add_columns(func.count(Workorder.id).label('workorder_count'))
+        .outerjoin(Workorder, Workorder.sidemark_id == Sidemark.id)
+        .where(Sidemark.designer_id == designer_id)
+        .group_by(Sidemark.id)
+        .order_by(Sidemark.id)
+    )
+
+
+def workorder_nodes_query(designer_id, sidemark_ids=None, workorder_ids=()):
+    """
+    A designer's workorders with their item counts: all of them when ``sidemark_ids`` is None,
+    otherwise those of the given sidemarks and of the sidemarks holding ``workorder_ids``.
+    """
+    query = (
+        WORKORDER.select('tree')
+        .add_columns(Workorder.sidemark_id, func.count(WorkorderItem.id).label('item_count'))
+        .outerjoin(WorkorderItem, WorkorderItem.workorder_id == Workorder.id)
+        .where(Workorder.designer_id == designer_id)
+        .group_by(Workorder.id)
+        .order_by(Workorder.id)
+    )
+    if sidemark_ids is not None:
+        holding = select(Workorder.sidemark_id).where(Workorder.id.in_(workorder_ids))
+        query = query.where(Workorder.sidemark_id.in_(sidemark_ids) | Workorder.sidemark_id.in_(holding))
+    return query
+
+
+def workorder_item_nodes_query(workorder_ids):
+    """The items of the given workorders with the SKU and name of their inventory."""
+    return (
+        _with_inventory(WORKORDER_ITEM.select('detail'))
+        .add_columns(WorkorderItem.workorder_id, Inventory.sku, Inventory.item_name)
+        .where(WorkorderItem.workorder_id.in_(workorder_ids))
+        .order_by(WorkorderItem.id)
+    )
+
+
+def _with_inventory(query):
+    """Joins each workorder item to its inventory row, as the workorder inventory listing does."""
+    return query.select_from(WorkorderItem).join(Inventory, WorkorderItem.inventory_id == Inventory.id)
+
+
+def workorder_inventory_query(workorder_id):
+    return _with_inventory(INVENTORY.select('detail')).where(WorkorderItem.workorder_id == workorder_id)
+
+
+def _workorder_date_range(query, start=None, end=None):
+    if start:
+        query = query.where(Workorder.workorder_date >= start)
+    if end:
+        query = query.where(Workorder.workorder_date < end + timedelta(days=1))
+    return query
+
+
+def inventory_export_query(designer_id):
+    return INVENTORY.select('export').where(Inventory.designer_id == designer_id).order_by(Inventory.id)
+
+
+def workorders_export_query(sidemark_id, start=None, end=None):
+    query = (
+        WORKORDER.select('export')
+        .add_columns(Designer.company.label('designer_company'), Sidemark.name.label('sidemark_name'))
+        .outerjoin(Designer, Workorder.designer_id == Designer.id)
+        .outerjoin(Sidemark, Workorder.sidemark_id == Sidemark.id)
+        .where(Workorder.sidemark_id == sidemark_id)
+        .order_by(Workorder.id)
+    )
+    return _workorder_date_range(query, start, end)
+
+
+def workorder_items_export_query(sidemark_id=None, start=None, end=None, workorder_id=None):
+    """Workorder items with their workorder code, inventory SKU and name, and fees."""
+    query = (
+        _with_inventory(WORKORDER_ITEM.select('export'))
+        .add_columns(Workorder.workorder_id.label('workorder_code'), Workorder.status, Inventory.sku,
+                     Inventory.item_name)
+        .join(Workorder, WorkorderItem.workorder_id == Workorder.id)
+        .order_by(WorkorderItem.workorder_id, WorkorderItem.id)
+    )
+    if workorder_id is not None:
+        query = query.where(WorkorderItem.workorder_id == workorder_id)
+    if sidemark_id is not None:
+        query = query.where(Workorder.sidemark_id == sidemark_id)
+    return _workorder_date_range(query, start, end)
@@ -0,0 +1,57 @@
+from flask import jsonify, request
+
+from . import dashboard_bp
+from db.database import DatabaseSession
+from services.scans import SCAN_BATCH_MAX, ScanRejected, apply_scans, validate_scans
+
+
+def _apply_batch(scans):
+    merged, errors = validate_scans(scans)
+    if errors:
+        return jsonify({'status': 'fail', 'errors': errors}), 400
+
+    with DatabaseSession() as session:
+        try:
+            state = apply_scans(session, merged)
+        except ScanRejected as rejected:
+            session.rollback()
+            response = {'status': 'fail', 'message': rejected.message,
+                        'errors': [{'index': rejected.index, 'reason': rejected.reason, 'errors': [rejected.message]}]}
+            return jsonify(response), 404 if rejected.reason == 'not_found' else 409
+        session.commit()
+
+    return jsonify({'status': 'success', **state}), 200
+
+
+@dashboard_bp.route('/api/scans', methods=['POST'])
+def apply_scan_batch():
+    """
+    Apply a batch of scanner deltas in one transaction, e.g.
+    ``{"scans": [{"inventory_id": 4, "quantity": -1}, {"item_id": 9, "unpacked": 1, "version": 3}]}``,
+    and return the new counters and versions of every touched row.
+    """
+    data = request.get_json(silent=True) or {}
+    scans = data.get('scans')
+    if not isinstance(scans, list) or not scans:
+        return jsonify({'status': 'fail', 'message': 'A non-empty scans list is required.'}), 400
+    if len(scans) > SCAN_BATCH_MAX:
+        return jsonify({'status': 'fail', 'message': f'At most {SCAN_BATCH_MAX} scans per request.'}), 400
+    return _apply_batch(scans)
+
+
+@dashboard_bp.route('/api/inventory/<int:inventory_id>/adjust', methods=['POST'])
+def adjust_inventory(inventory_id):
+    """Apply counter deltas (``quantity``, ``assembled``, ...) and an optional version to one inventory item."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'fail', 'message': 'A JSON object of deltas is required.'}), 400
+    return _apply_batch([{**data, 'inventory_id': inventory_id}])
+
+
+@dashboard_bp.route('/api/workorder-item/<int:item_id>/adjust', methods=['POST'])
+def adjust_workorder_item(item_id):
+    """Apply counter deltas and an optional version to one workorder item."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'fail', 'message': 'A JSON object of deltas is required.'}), 400
+    return _apply_batch([{**data, 'item_id': item_id}])
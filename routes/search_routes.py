@@ -0,0 +1,32 @@
+from flask import jsonify, request
+
+from . import dashboard_bp
+from db.database import DatabaseSession
+from services.search import SEARCH_KINDS, search
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_PAGE_SIZE_MAX = 100
+
+
+@dashboard_bp.route('/api/search', methods=['GET'])
+def search_everything():
+    """
+    Ranked search over inventory, designers and workorders. ``?q=`` is the query, ``?type=`` limits
+    it to one kind, ``?designer_id=`` narrows inventory hits, ``?limit=``/``?offset=`` page each kind.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'status': 'fail', 'message': 'Search query is missing.'}), 400
+
+    kind = request.args.get('type')
+    if kind is not None and kind not in SEARCH_KINDS:
+        return jsonify({'status': 'fail', 'message': f"Unknown search type, expected one of {', '.join(SEARCH_KINDS)}."}), 400
+
+    limit = min(max(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_PAGE_SIZE_MAX)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    designer_id = request.args.get('designer_id', type=int)
+
+    with DatabaseSession() as session:
+        results = search(session.connection(), query, (kind,) if kind else SEARCH_KINDS, limit, offset, designer_id)
+
+    return jsonify({'query': query, **results}), 200
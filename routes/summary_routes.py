@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from flask import jsonify, request
+from sqlalchemy import case, func, select
+
+from . import dashboard_bp
+from .params import date_range
+from db.database import DatabaseSession
+from models.designer import Designer, Sidemark
+from models.orders import Workorder, WorkorderItem
+
+STATUSES = tuple(Workorder.__table__.c.status.type.enums)
+SUMMARY_TOTALS = STATUSES + ('workorders', 'item_count', 'quantity', 'total_fee')
+
+
+def summary_query(designer_id=None, start=None, end=None):
+    """
+    One GROUP BY over workorders and their items: workorder counts per status plus item and fee
+    totals for every (designer, sidemark) pair. ``start``/``end`` bound ``workorder_date`` by day.
+    """
+    status_counts = [
+        func.count(func.distinct(case((Workorder.status == status, Workorder.id)))).label(status)
+        for status in STATUSES
+    ]
+    query = (
+        select(
+            Workorder.designer_id, Designer.designer_name, Designer.company,
+            Workorder.sidemark_id, Sidemark.name.label('sidemark_name'),
+            *status_counts,
+            func.count(func.distinct(Workorder.id)).label('workorders'),
+            func.count(WorkorderItem.id).label('item_count'),
+            func.coalesce(func.sum(WorkorderItem.quantity), 0).label('quantity'),
+            func.coalesce(func.sum(WorkorderItem.total_fee), 0).label('total_fee'),
+        )
+        .select_from(Workorder)
+        .outerjoin(WorkorderItem, WorkorderItem.workorder_id == Workorder.id)
+        .outerjoin(Designer, Workorder.designer_id == Designer.id)
+        .outerjoin(Sidemark, Workorder.sidemark_id == Sidemark.id)
+        .group_by(Workorder.designer_id, Designer.designer_name, Designer.company,
+                  Workorder.sidemark_id, Sidemark.name)
+        .order_by(Workorder.designer_id, Workorder.sidemark_id)
+    )
+    if designer_id is not None:
+        query = query.where(Workorder.designer_id == designer_id)
+    if start:
+        query = query.where(Workorder.workorder_date >= start)
+    if end:
+        query = query.where(Workorder.workorder_date < end + timedelta(days=1))
+    return query
+
+
+def _totals(row=None):
+    totals = {name: 0 for name in SUMMARY_TOTALS}
+    totals['total_fee'] = 0.0
+    if row is not None:
+        for name in SUMMARY_TOTALS:
+            totals[name] = int(getattr(row, name)) if name != 'total_fee' else round(float(row.total_fee), 2)
+    return totals
+
+
+def _add_totals(target, totals):
+    for name in SUMMARY_TOTALS:
+        target[name] += totals[name]
+    target['total_fee'] = round(target['total_fee'], 2)
+
+
+def build_summary(rows):
+    """Folds the per-sidemark rows into per-designer entries and overall totals."""
+    designers = {}
+    overall = _totals()
+    for row in rows:
+        sidemark_totals = _totals(row)
+        designer = designers.get(row.designer_id)
+        if designer is None:
+            designer = designers[row.designer_id] = {
+                'designer_id': row.designer_id, 'designer_name': row.designer_name, 'company': row.company,
+                **_totals(), 'sidemarks': [],
+            }
+        designer['sidemarks'].append({'sidemark_id': row.sidemark_id, 'name': row.sidemark_name, **sidemark_totals})
+        _add_totals(designer, sidemark_totals)
+        _add_totals(overall, sidemark_totals)
+    return {'totals': overall, 'designers': list(designers.values())}
+
+
+@dashboard_bp.route('/api/dashboard/summary', methods=['GET'])
+def view_dashboard_summary():
+    """
+    Return workorder status counts, item totals and fee sums per designer and per sidemark.
+    ``?designer_id=`` narrows to one designer, ``?from=``/``?to=`` (YYYY-MM-DD) to a date range.
+    """
+    start, end = date_range()
+    designer_id = request.args.get('designer_id', type=int)
+    with DatabaseSession() as session:
+        rows = session.execute(summary_query(designer_id, start, end)).all()
+
+    summary = build_summary(rows)
+    summary.update({'from': start.isoformat() if start else None, 'to': end.isoformat() if end else None})
+    return jsonify(summary), 200
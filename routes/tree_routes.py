@@ -0,0 +1,100 @@
+import os
+from collections import defaultdict
+
+from flask import jsonify, request
+
+from . import dashboard_bp
+from .queries import sidemark_nodes_query, workorder_item_nodes_query, workorder_nodes_query
+from db.database import DatabaseSession
+from models.designer import Designer
+from services.serialization import DESIGNER, SIDEMARK, WORKORDER, WORKORDER_ITEM
+
+# levels below the designer, in the order ?depth= opens them
+TREE_LEVELS = ('sidemarks', 'workorders', 'items')
+TREE_DEFAULT_DEPTH = 2
+# most workorders whose items one tree response may contain
+TREE_ITEM_WORKORDERS_MAX = int(os.getenv('TREE_ITEM_WORKORDERS_MAX', 500))
+
+
+def parse_expand(raw_expand):
+    """
+    Reads ``?expand=sidemark:3,workorder:17`` into the sidemark and workorder ids to open below
+    the requested depth.
+    """
+    expand = {'sidemark': set(), 'workorder': set()}
+    for token in filter(None, (t.strip() for t in (raw_expand or '').split(','))):
+        kind, _, node_id = token.partition(':')
+        if kind not in expand or not node_id.isdigit():
+            raise ValueError(f"Unknown node: {token}")
+        expand[kind].add(int(node_id))
+    return expand
+
+
+def _workorder_nodes(session, designer_id, depth, expand):
+    """Workorder nodes grouped by sidemark id, for the sidemarks the request opens."""
+    if depth >= 2:
+        query = workorder_nodes_query(designer_id)
+    elif expand['sidemark'] or expand['workorder']:
+        query = workorder_nodes_query(designer_id, expand['sidemark'], expand['workorder'])
+    else:
+        return {}
+
+    by_sidemark = defaultdict(list)
+    for node in WORKORDER.dump_rows(session.execute(query)):
+        by_sidemark[node.pop('sidemark_id')].append(node)
+    return by_sidemark
+
+
+def _item_nodes(session, workorder_ids):
+    """Item nodes grouped by workorder id, one query for all of them."""
+    by_workorder = defaultdict(list)
+    if workorder_ids:
+        for node in WORKORDER_ITEM.dump_rows(session.execute(workorder_item_nodes_query(sorted(workorder_ids)))):
+            by_workorder[node.pop('workorder_id')].append(node)
+    return by_workorder
+
+
+@dashboard_bp.route('/api/designer/<int:designer_id>/tree', methods=['GET'])
+def view_designer_tree(designer_id):
+    """
+    Return a designer with its sidemarks, their workorders and the workorders' items as one
+    nested document. ``?depth=`` opens that many levels for every node (0 designer only,
+    1 sidemarks, 2 workorders, 3 items; default 2) and ``?expand=sidemark:ID,workorder:ID``
+    opens single nodes further. Every node carries the count of its children whether or not
+    they are included, and each level is loaded with one query.
+    """
+    depth = request.args.get('depth', TREE_DEFAULT_DEPTH, type=int)
+    if not 0 <= depth <= len(TREE_LEVELS):
+        return jsonify({'status': 'fail', 'message': f'depth must be between 0 and {len(TREE_LEVELS)}.'}), 400
+    try:
+        expand = parse_expand(request.args.get('expand'))
+    except ValueError as error:
+        return jsonify({'status': 'fail', 'message': str(error)}), 400
+
+    with DatabaseSession() as session:
+        designer = DESIGNER.dump_rows(session.execute(DESIGNER.select('detail').where(Designer.id == designer_id)))
+        if not designer:
+            return jsonify({'status': 'fail', 'message': 'Designer not found.'}), 404
+        tree = designer[0]
+
+        sidemarks = SIDEMARK.dump_rows(session.execute(sidemark_nodes_query(designer_id)))
+        tree['sidemark_count'] = len(sidemarks)
+        if depth >= 1 or expand['sidemark'] or expand['workorder']:
+            workorders = _workorder_nodes(session, designer_id, depth, expand)
+            for sidemark in sidemarks:
+                if sidemark['id'] in workorders or depth >= 2 or sidemark['id'] in expand['sidemark']:
+                    sidemark['workorders'] = workorders.get(sidemark['id'], [])
+            tree['sidemarks'] = sidemarks
+
+            loaded = [node for nodes in workorders.values() for node in nodes]
+            opened = {node['id'] for node in loaded if depth >= 3 or node['id'] in expand['workorder']}
+            if len(opened) > TREE_ITEM_WORKORDERS_MAX:
+                return jsonify({'status': 'fail',
+                                'message': f'Items of {len(opened)} workorders were requested, at most '
+                                           f'{TREE_ITEM_WORKORDERS_MAX} can be expanded at once.'}), 400
+            items = _item_nodes(session, opened)
+            for node in loaded:
+                if node['id'] in opened:
+                    node['items'] = items.get(node['id'], [])
+
+    return jsonify(tree), 200
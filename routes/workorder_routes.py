@@ -0,0 +1,183 @@
+from flask import jsonify, request
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+
+from . import dashboard_bp
+from db.database import DatabaseSession
+from models.orders import Workorder, WorkorderItem
+from services.cache import invalidate_sidemark
+from services.jobs import queue_stats
+from services.serialization import DESIGNER, INVENTORY, SHIPMENT, SIDEMARK, WORKORDER, WORKORDER_ITEM
+from services.workorder_jobs import enqueue_status_jobs
+from services.workorders import BULK_MAX_WORKORDERS, WORKORDER_STATUSES, create_workorders
+
+SECTION_SCHEMAS = {
+    'workorder': WORKORDER,
+    'designer': DESIGNER,
+    'sidemark': SIDEMARK,
+    'shipments': SHIPMENT,
+    'items': WORKORDER_ITEM,
+    'inventory': INVENTORY,
+}
+
+# columns each section of the workorder detail response can return, selectable with ?fields=
+WORKORDER_DETAIL_FIELDS = {section: schema.views['detail'] for section, schema in SECTION_SCHEMAS.items()}
+
+
+def parse_detail_fields(raw_fields):
+    """
+    Maps each requested section to the columns to return. ``?fields=designer,items.quantity``
+    selects whole sections or single ``section.column`` entries; no value selects everything.
+    """
+    if not raw_fields:
+        return {section: WORKORDER_DETAIL_FIELDS[section] for section in WORKORDER_DETAIL_FIELDS}
+
+    selected = {}
+    for token in filter(None, (t.strip() for t in raw_fields.split(','))):
+        section, _, column = token.partition('.')
+        if section not in WORKORDER_DETAIL_FIELDS or (column and column not in WORKORDER_DETAIL_FIELDS[section]):
+            raise ValueError(f"Unknown field: {token}")
+        if not column:
+            selected[section] = WORKORDER_DETAIL_FIELDS[section]
+        elif selected.get(section) != WORKORDER_DETAIL_FIELDS[section]:
+            selected[section] = tuple(selected.get(section, ())) + (column,)
+
+    # the header always identifies the workorder, inventory is nested inside the items
+    selected.setdefault('workorder', ('id', 'workorder_id'))
+    if 'inventory' in selected:
+        selected.setdefault('items', ('id',))
+    return selected
+
+
+def _columns(section, fields):
+    return SECTION_SCHEMAS[section].columns(fields[section])
+
+
+def _loader_options(fields):
+    """Builds eager loading options for the requested sections only, one round trip per collection."""
+    options = [load_only(*_columns('workorder', fields))]
+    if 'designer' in fields:
+        options.append(joinedload(Workorder.designer).load_only(*_columns('designer', fields)))
+    if 'sidemark' in fields:
+        options.append(joinedload(Workorder.sidemark).load_only(*_columns('sidemark', fields)))
+    if 'shipments' in fields:
+        options.append(selectinload(Workorder.shipments).load_only(*_columns('shipments', fields)))
+    if 'items' in fields:
+        items = selectinload(Workorder.workorder_items).load_only(*_columns('items', fields))
+        if 'inventory' in fields:
+            items = items.joinedload(WorkorderItem.inventory_item).load_only(*_columns('inventory', fields))
+        options.append(items)
+    return options
+
+
+def serialize_workorder_detail(workorder, fields):
+    data = WORKORDER.dump(workorder, fields['workorder'])
+    if 'designer' in fields:
+        data['designer'] = DESIGNER.dump(workorder.designer, fields['designer']) if workorder.designer else None
+    if 'sidemark' in fields:
+        data['sidemark'] = SIDEMARK.dump(workorder.sidemark, fields['sidemark']) if workorder.sidemark else None
+    if 'shipments' in fields:
+        data['shipments'] = [SHIPMENT.dump(shipment, fields['shipments']) for shipment in workorder.shipments]
+    if 'items' in fields:
+        items = []
+        for item in workorder.workorder_items:
+            item_data = WORKORDER_ITEM.dump(item, fields['items'])
+            if 'inventory' in fields:
+                inventory = item.inventory_item
+                item_data['inventory'] = INVENTORY.dump(inventory, fields['inventory']) if inventory else None
+            items.append(item_data)
+        data['items'] = items
+    return data
+
+
+@dashboard_bp.route('/api/workorder/<int:workorder_id>', methods=['GET'])
+def view_workorder(workorder_id):
+    """Return a workorder with its designer, sidemark, shipments and items in a fixed number of queries."""
+    try:
+        fields = parse_detail_fields(request.args.get('fields'))
+    except ValueError as error:
+        return jsonify({"status": "fail", "message": str(error)}), 400
+
+    with DatabaseSession() as session:
+        workorder = (
+            session.query(Workorder)
+            .options(*_loader_options(fields))
+            .filter(Workorder.id == workorder_id)
+            .first()
+        )
+
+        if not workorder:
+            return jsonify({"status": "fail", "message": "Workorder not found."}), 404
+
+        workorder_data = serialize_workorder_detail(workorder, fields)
+
+    return jsonify(workorder_data), 200
+
+
+@dashboard_bp.route('/api/workorders/bulk', methods=['POST'])
+def bulk_create_workorders():
+    """Create many workorders with nested shipments and items in one transaction."""
+    data = request.get_json(silent=True) or {}
+    workorders = data.get('workorders')
+
+    if not isinstance(workorders, list) or not workorders:
+        return jsonify({'status': 'fail', 'message': 'A non-empty workorders list is required.'}), 400
+    if len(workorders) > BULK_MAX_WORKORDERS:
+        return jsonify({'status': 'fail',
+                        'message': f'At most {BULK_MAX_WORKORDERS} workorders per request.'}), 400
+
+    with DatabaseSession() as session:
+        created, errors = create_workorders(session, workorders)
+        session.commit()
+
+    for designer_id, sidemark_id in {(w['designer_id'], w['sidemark_id']) for w in created}:
+        invalidate_sidemark(designer_id, sidemark_id)
+
+    response = {
+        'status': 'success' if not errors else ('partial' if created else 'fail'),
+        'created': created,
+        'errors': errors,
+    }
+    return jsonify(response), 201 if not errors else (200 if created else 400)
+
+
+@dashboard_bp.route('/api/workorder/<int:workorder_id>/status', methods=['PATCH'])
+def update_workorder_status(workorder_id):
+    """
+    Move a workorder to another status. Its side effects (tags, service records, completion
+    email) are only queued here and run in the job worker.
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get('status')
+    if status not in WORKORDER_STATUSES:
+        return jsonify({'status': 'fail', 'message': f"status must be one of {', '.join(WORKORDER_STATUSES)}."}), 400
+
+    with DatabaseSession() as session:
+        workorder = session.get(Workorder, workorder_id)
+        if workorder is None:
+            return jsonify({'status': 'fail', 'message': 'Workorder not found.'}), 404
+        if 'version' in data and data['version'] != workorder.version:
+            return jsonify({'status': 'fail', 'message': 'Workorder was changed by someone else.'}), 409
+
+        queued = []
+        if workorder.status != status:
+            workorder.status = status
+            queued = [job.kind for job in enqueue_status_jobs(session, workorder)]
+        try:
+            session.commit()
+        except StaleDataError:
+            session.rollback()
+            return jsonify({'status': 'fail', 'message': 'Workorder was changed by someone else.'}), 409
+        response = {'id': workorder.id, 'status': workorder.status, 'version': workorder.version, 'queued': queued}
+        designer_id, sidemark_id = workorder.designer_id, workorder.sidemark_id
+
+    invalidate_sidemark(designer_id, sidemark_id)
+    return jsonify(response), 200
+
+
+@dashboard_bp.route('/api/jobs/stats', methods=['GET'])
+def view_job_stats():
+    """Return background job counts per kind and status and the oldest due job's age."""
+    with DatabaseSession() as session:
+        stats = queue_stats(session)
+    return jsonify(stats), 200
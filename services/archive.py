@@ -0,0 +1,161 @@
+"""
+Archival of finished records.
+
+Completed or inactive workorders whose workorder date and last update are both older than
+``ARCHIVE_AFTER_DAYS`` move, together with their items and shipments, from the hot tables into
+the ``*_archive`` tables of ``models.archive``. Inactive inventory that is out of storage and that
+no hot workorder item or photo refers to follows after the same age. Each batch of
+``ARCHIVE_BATCH_SIZE`` rows is copied with ``INSERT ... SELECT`` and deleted in one transaction,
+so a record is always in exactly one of the two tables, and the dashboard endpoints only ever
+scan current work. Archived records are read through ``routes.archive_routes``. The fee rollups
+are left as they are, so billing history does not change when work is archived. The jobs
+worker runs the archival every ``ARCHIVE_INTERVAL_HOURS`` (0 turns the schedule off).
+
+    python -m services.archive run [--days 365]
+"""
+import argparse
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, delete, literal, or_, select
+
+from db.database import DatabaseSession
+from models.archive import InventoryArchive, ShipmentArchive, WorkorderArchive, WorkorderItemArchive
+from models.inventory import Inventory, Photo
+from models.orders import Shipment, Workorder, WorkorderItem
+from services.cache import invalidate_sidemark
+from services.changes import append, change_record
+from services.jobs import handler
+
+logger = logging.getLogger('mey.archive')
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+ARCHIVE_INTERVAL_HOURS = float(os.getenv('ARCHIVE_INTERVAL_HOURS', 24))
+
+
+def _untouched_since(model, cutoff):
+    return or_(model.updated_at.is_(None), model.updated_at < cutoff)
+
+
+def archivable_workorders(cutoff):
+    """Ids of completed or inactive workorders dated and last updated before ``cutoff``."""
+    # a shipment that items of another workorder were received with keeps its workorder hot
+    shared_shipment = (
+        select(WorkorderItem.id)
+        .join(Shipment, WorkorderItem.shipment_id == Shipment.id)
+        .where(Shipment.workorder_id == Workorder.id, WorkorderItem.workorder_id != Workorder.id)
+    )
+    return (
+        select(Workorder.id)
+        .where((Workorder.status == 'completed') | Workorder.active.is_(False),
+               Workorder.workorder_date < cutoff, _untouched_since(Workorder, cutoff), ~shared_shipment.exists())
+        .order_by(Workorder.id)
+    )
+
+
+def archivable_inventory(cutoff):
+    """Ids of inactive inventory out of storage, untouched since ``cutoff`` and no longer referenced."""
+    return (
+        select(Inventory.id)
+        .where(Inventory.active.is_(False), Inventory.in_storage.isnot(True), _untouched_since(Inventory, cutoff),
+               ~select(WorkorderItem.id).where(WorkorderItem.inventory_id == Inventory.id).exists(),
+               ~select(Photo.id).where(Photo.inventory_id == Inventory.id).exists())
+        .order_by(Inventory.id)
+    )
+
+
+def _move(connection, source, archive, condition, archived_at):
+    """Copies the matching rows of ``source`` into its archive table and deletes them."""
+    table = source.__table__
+    connection.execute(archive.__table__.insert().from_select(
+        [column.name for column in table.columns] + ['archived_at'],
+        select(*table.columns, literal(archived_at, DateTime)).where(condition),
+    ))
+    connection.execute(delete(table).where(condition))
+
+
+def _archive_workorders(connection, workorder_ids):
+    """Moves one batch of workorders with their items and shipments; returns their owners."""
+    owners = connection.execute(
+        select(Workorder.id, Workorder.designer_id, Workorder.sidemark_id).where(Workorder.id.in_(workorder_ids))
+    ).all()
+    archived_at = datetime.utcnow()
+    # children first, the hot tables keep their foreign keys
+    _move(connection, WorkorderItem, WorkorderItemArchive, WorkorderItem.workorder_id.in_(workorder_ids), archived_at)
+    _move(connection, Shipment, ShipmentArchive, Shipment.workorder_id.in_(workorder_ids), archived_at)
+    _move(connection, Workorder, WorkorderArchive, Workorder.id.in_(workorder_ids), archived_at)
+    append(connection, [change_record('workorder.archived', workorder_id, {}, designer_id, sidemark_id, workorder_id)
+                        for workorder_id, designer_id, sidemark_id in owners])
+    return {(designer_id, sidemark_id) for _, designer_id, sidemark_id in owners}
+
+
+def _archive_inventory(connection, inventory_ids):
+    owners = connection.execute(
+        select(Inventory.id, Inventory.designer_id).where(Inventory.id.in_(inventory_ids))
+    ).all()
+    _move(connection, Inventory, InventoryArchive, Inventory.id.in_(inventory_ids), datetime.utcnow())
+    append(connection, [change_record('inventory.archived', inventory_id, {}, designer_id)
+                        for inventory_id, designer_id in owners])
+
+
+def _batches(session, query, batch_size):
+    """
+    Yields batches of ids matching ``query``, locked until the caller commits. Rows other
+    transactions hold are skipped and picked up by the next run.
+    """
+    while True:
+        ids = session.scalars(query.limit(batch_size).with_for_update(skip_locked=True)).all()
+        if not ids:
+            return
+        yield ids
+
+
+def archive_records(session, days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Moves everything that qualifies for archival, committing after each batch. Workorders go
+    first, so inventory that only their items referred to can follow in the same run. Returns
+    the number of workorders and inventory items archived.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    counts = {'workorders': 0, 'inventory': 0}
+
+    for workorder_ids in _batches(session, archivable_workorders(cutoff), batch_size):
+        owners = _archive_workorders(session.connection(), workorder_ids)
+        session.commit()
+        for designer_id, sidemark_id in owners:
+            invalidate_sidemark(designer_id, sidemark_id)
+        counts['workorders'] += len(workorder_ids)
+
+    for inventory_ids in _batches(session, archivable_inventory(cutoff), batch_size):
+        _archive_inventory(session.connection(), inventory_ids)
+        session.commit()
+        counts['inventory'] += len(inventory_ids)
+    return counts
+
+
+@handler('archive_records', every=ARCHIVE_INTERVAL_HOURS * 3600)
+def archive_records_job(days=ARCHIVE_AFTER_DAYS):
+    """Job form of ``archive_records``."""
+    with DatabaseSession() as session:
+        counts = archive_records(session, days)
+    logger.info("Archived %(workorders)s workorder(s) and %(inventory)s inventory item(s)", counts)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Move finished records to the archive tables.")
+    parser.add_argument('command', choices=('run',))
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS, help="minimum age of archived records")
+    parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    with DatabaseSession() as session:
+        counts = archive_records(session, args.days, args.batch_size)
+    print(json.dumps(counts))
+
+
+if __name__ == '__main__':
+    main()
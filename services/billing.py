@@ -0,0 +1,314 @@
+"""
+Storage and fee rollups.
+
+``fee_rollups`` holds item counts, quantities and fees per designer, sidemark, workorder day and
+status; ``storage_rollups`` holds the cubic footage and items in storage per designer and day.
+Both are kept current incrementally: ORM flushes through ``SessionLocal`` are diffed in
+``before_flush``/``after_flush`` and applied as upsert increments in the same transaction, and
+Core bulk writers call ``record_new_workorders``. ``refresh_storage`` is the daily set-based
+job and ``rebuild`` recomputes everything from the source tables, archived workorders included.
+
+    python -m services.billing refresh-storage
+    python -m services.billing rebuild
+    python -m services.billing check
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import and_, delete, event, func, inspect, select, update
+
+from db.database import SessionLocal, get_engine
+from db.upsert import upsert
+from models.archive import WorkorderArchive, WorkorderItemArchive
+from models.billing import BillingRun, FeeRollup, StorageRollup
+from models.inventory import Inventory
+from models.orders import Workorder, WorkorderItem
+from services.validation import as_date
+
+logger = logging.getLogger('mey.billing')
+
+# rollup key used for workorders without a designer or sidemark
+UNASSIGNED = 0
+
+FEE_TOTALS = ('item_count', 'quantity', 'total_fee')
+STORAGE_TOTALS = ('items_in_storage', 'cubic_footage')
+
+
+def _fee_query(workorder_ids=None, workorder=Workorder, item=WorkorderItem):
+    """Fee totals grouped like ``fee_rollups``, over the hot tables or their archive models."""
+    query = (
+        select(
+            func.coalesce(workorder.designer_id, UNASSIGNED),
+            func.coalesce(workorder.sidemark_id, UNASSIGNED),
+            func.date(workorder.workorder_date),
+            workorder.status,
+            func.count(item.id),
+            func.coalesce(func.sum(item.quantity), 0),
+            func.coalesce(func.sum(item.total_fee), 0),
+        )
+        .select_from(item)
+        .join(workorder, item.workorder_id == workorder.id)
+        .group_by(
+            func.coalesce(workorder.designer_id, UNASSIGNED),
+            func.coalesce(workorder.sidemark_id, UNASSIGNED),
+            func.date(workorder.workorder_date),
+            workorder.status,
+        )
+    )
+    if workorder_ids is not None:
+        query = query.where(workorder.id.in_(workorder_ids))
+    return query
+
+
+def fee_contributions(connection, workorder_ids):
+    """Current fee totals of the given workorders, keyed like ``fee_rollups``."""
+    if not workorder_ids:
+        return {}
+    return {
+        (designer_id, sidemark_id, as_date(day), status): (item_count, quantity, total_fee)
+        for designer_id, sidemark_id, day, status, item_count, quantity, total_fee
+        in connection.execute(_fee_query(list(workorder_ids)))
+    }
+
+
+def apply_fee_deltas(connection, before, after):
+    """Adds ``after - before`` to the fee rollups."""
+    rows = []
+    for key in set(before) | set(after):
+        old, new = before.get(key, (0, 0, 0)), after.get(key, (0, 0, 0))
+        delta = [n - o for n, o in zip(new, old)]
+        if any(delta):
+            designer_id, sidemark_id, day, status = key
+            rows.append(dict(designer_id=designer_id, sidemark_id=sidemark_id, day=day, status=status,
+                             **dict(zip(FEE_TOTALS, delta))))
+    upsert(connection, FeeRollup.__table__, rows, FEE_TOTALS, increment=True)
+
+
+def record_new_workorders(connection, workorder_ids):
+    """Adds workorders inserted outside the ORM (bulk Core inserts) to the fee rollups."""
+    apply_fee_deltas(connection, {}, fee_contributions(connection, workorder_ids))
+
+
+def _seed_storage_day(connection, designer_ids, day):
+    """
+    Starts the ``day`` storage rows of designers that have none yet from their latest earlier
+    totals, so that increments land on a running total instead of on zero.
+    """
+    existing = select(StorageRollup.designer_id).where(StorageRollup.day == day)
+    latest = (
+        select(StorageRollup.designer_id, func.max(StorageRollup.day).label('day'))
+        .where(StorageRollup.designer_id.in_(designer_ids), StorageRollup.day < day,
+               StorageRollup.designer_id.notin_(existing))
+        .group_by(StorageRollup.designer_id)
+        .subquery()
+    )
+    previous = connection.execute(
+        select(StorageRollup.designer_id, StorageRollup.items_in_storage, StorageRollup.cubic_footage)
+        .join(latest, and_(StorageRollup.designer_id == latest.c.designer_id, StorageRollup.day == latest.c.day))
+    )
+    # a row a concurrent writer created in the meantime is left as it is
+    upsert(connection, StorageRollup.__table__, [
+        {'designer_id': designer_id, 'day': day, 'items_in_storage': items, 'cubic_footage': footage, 'item_days': 0}
+        for designer_id, items, footage in previous
+    ], (), set_values={'designer_id': StorageRollup.designer_id})
+
+
+def apply_storage_deltas(connection, deltas, day=None):
+    """Adds per-designer (items, cubic footage) deltas to the storage rollup of ``day``."""
+    day = day or date.today()
+    rows = [
+        dict(designer_id=designer_id, day=day, item_days=0, **dict(zip(STORAGE_TOTALS, delta)))
+        for designer_id, delta in deltas.items() if any(delta)
+    ]
+    if rows:
+        _seed_storage_day(connection, [row['designer_id'] for row in rows], day)
+    upsert(connection, StorageRollup.__table__, rows, STORAGE_TOTALS, increment=True)
+
+
+def _previous(obj, attribute):
+    """Value of an attribute before the pending flush."""
+    history = inspect(obj).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attribute)
+
+
+def storage_share(designer_id, in_storage, quantity, cubic_footage):
+    """The (designer, items, cubic footage) an inventory row contributes to the storage rollup."""
+    if not in_storage:
+        return designer_id, 0, 0.0
+    quantity = quantity or 0
+    return designer_id or UNASSIGNED, quantity, (cubic_footage or 0) * quantity
+
+
+def _touched_workorder_ids(session):
+    ids = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, WorkorderItem):
+            ids.update((obj.workorder_id, _previous(obj, 'workorder_id')))
+        elif isinstance(obj, Workorder):
+            ids.add(obj.id)
+    for obj in session.new:
+        if isinstance(obj, WorkorderItem):
+            ids.add(obj.workorder_id)
+    ids.discard(None)
+    return ids
+
+
+def _before_flush(session, flush_context, instances):
+    connection = session.connection()
+    workorder_ids = _touched_workorder_ids(session)
+
+    storage = defaultdict(lambda: [0, 0.0])
+    for obj in session.new | session.dirty | session.deleted:
+        if not isinstance(obj, Inventory):
+            continue
+        if obj not in session.new:
+            designer_id, items, footage = storage_share(*(_previous(obj, name) for name in
+                                                           ('designer_id', 'in_storage', 'quantity', 'cubic_sq_footage')))
+            storage[designer_id][0] -= items
+            storage[designer_id][1] -= footage
+        if obj not in session.deleted:
+            designer_id, items, footage = storage_share(obj.designer_id, obj.in_storage, obj.quantity,
+                                                         obj.cubic_sq_footage)
+            storage[designer_id][0] += items
+            storage[designer_id][1] += footage
+
+    session.info['billing_pending'] = {
+        'workorder_ids': workorder_ids,
+        'fees_before': fee_contributions(connection, workorder_ids),
+        'storage': dict(storage),
+        'new_items': [obj for obj in session.new if isinstance(obj, WorkorderItem)],
+    }
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop('billing_pending', None)
+    if pending is None:
+        return
+    connection = session.connection()
+    # items of workorders created in this flush only have their workorder_id now
+    workorder_ids = pending['workorder_ids'] | {item.workorder_id for item in pending['new_items']} - {None}
+    apply_fee_deltas(connection, pending['fees_before'], fee_contributions(connection, workorder_ids))
+    apply_storage_deltas(connection, pending['storage'])
+
+
+event.listen(SessionLocal, 'before_flush', _before_flush)
+event.listen(SessionLocal, 'after_flush', _after_flush)
+
+
+def _storage_snapshot(connection):
+    """(designer_id, items, cubic footage) currently in storage, one row per designer."""
+    return connection.execute(
+        select(
+            func.coalesce(Inventory.designer_id, UNASSIGNED),
+            func.coalesce(func.sum(Inventory.quantity), 0),
+            func.coalesce(func.sum(Inventory.cubic_sq_footage * Inventory.quantity), 0),
+        )
+        .where(Inventory.in_storage.is_(True))
+        .group_by(func.coalesce(Inventory.designer_id, UNASSIGNED))
+    ).all()
+
+
+def refresh_storage(connection, day=None):
+    """
+    Daily job: advances ``days_in_storage`` for everything in storage with one UPDATE and writes
+    the day's storage snapshot. Returns False when the job already ran for ``day``.
+    """
+    day = day or date.today()
+    if connection.scalar(select(BillingRun.day).where(BillingRun.day == day)):
+        return False
+
+    connection.execute(
+        update(Inventory)
+        .where(Inventory.in_storage.is_(True))
+        .values(days_in_storage=func.coalesce(Inventory.days_in_storage, 0) + 1,
+                version=Inventory.version + 1, updated_at=datetime.utcnow())
+    )
+    upsert(connection, StorageRollup.__table__, [
+        {'designer_id': designer_id, 'day': day, 'items_in_storage': items, 'cubic_footage': footage,
+         'item_days': items}
+        for designer_id, items, footage in _storage_snapshot(connection)
+    ], STORAGE_TOTALS + ('item_days',))
+    connection.execute(BillingRun.__table__.insert().values(day=day, ran_at=datetime.utcnow()))
+    return True
+
+
+def check_storage(connection):
+    """
+    Compares each designer's latest storage rollup row, the one the billing endpoint reports,
+    with the inventory table. Returns {designer_id: (rollup, snapshot)} for every designer that
+    differs.
+    """
+    latest = (
+        select(StorageRollup.designer_id, func.max(StorageRollup.day).label('day'))
+        .where(StorageRollup.day <= date.today())
+        .group_by(StorageRollup.designer_id)
+        .subquery()
+    )
+    rollup = {
+        designer_id: (items, footage) for designer_id, items, footage in connection.execute(
+            select(StorageRollup.designer_id, StorageRollup.items_in_storage, StorageRollup.cubic_footage)
+            .join(latest, and_(StorageRollup.designer_id == latest.c.designer_id, StorageRollup.day == latest.c.day)))
+    }
+    snapshot = {designer_id: (items, footage) for designer_id, items, footage in _storage_snapshot(connection)}
+
+    mismatches = {}
+    for designer_id in set(rollup) | set(snapshot):
+        stored, actual = rollup.get(designer_id, (0, 0.0)), snapshot.get(designer_id, (0, 0.0))
+        # cubic footage is a FLOAT column on MySQL
+        if stored[0] != actual[0] or abs(stored[1] - actual[1]) > 0.01:
+            mismatches[designer_id] = (stored, actual)
+    return mismatches
+
+
+def rebuild(connection):
+    """
+    Recomputes the fee rollups from the workorder tables with one INSERT ... SELECT, adds the
+    archived workorders on top and resets today's storage totals from the inventory table.
+    """
+    columns = ['designer_id', 'sidemark_id', 'day', 'status', 'item_count', 'quantity', 'total_fee']
+    connection.execute(delete(FeeRollup))
+    connection.execute(FeeRollup.__table__.insert().from_select(columns, _fee_query()))
+    # the archive tables only exist from migration 0009 on
+    if inspect(connection).has_table(WorkorderArchive.__table__.name):
+        archived = connection.execute(_fee_query(workorder=WorkorderArchive, item=WorkorderItemArchive))
+        upsert(connection, FeeRollup.__table__, [
+            dict(zip(columns, (designer_id, sidemark_id, as_date(day), *rest)))
+            for designer_id, sidemark_id, day, *rest in archived
+        ], FEE_TOTALS, increment=True)
+    upsert(connection, StorageRollup.__table__, [
+        {'designer_id': designer_id, 'day': date.today(), 'items_in_storage': items, 'cubic_footage': footage,
+         'item_days': 0}
+        for designer_id, items, footage in _storage_snapshot(connection)
+    ], STORAGE_TOTALS)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Maintain the storage and fee rollups.")
+    parser.add_argument('command', choices=('refresh-storage', 'rebuild', 'check'))
+    parser.add_argument('--day', type=date.fromisoformat, default=None, help="defaults to today")
+    args = parser.parse_args(argv)
+
+    with get_engine().begin() as connection:
+        if args.command == 'rebuild':
+            rebuild(connection)
+            logger.info("Rollups rebuilt")
+        elif args.command == 'check':
+            mismatches = check_storage(connection)
+            for designer_id, (stored, actual) in sorted(mismatches.items()):
+                logger.warning("Designer %s: rollup %s, inventory %s", designer_id, stored, actual)
+            logger.info("Storage rollups checked, %s designer(s) differ", len(mismatches))
+            if mismatches:
+                raise SystemExit(1)
+        elif refresh_storage(connection, args.day):
+            logger.info("Storage refreshed for %s", args.day or date.today())
+        else:
+            logger.info("Storage job already ran for %s", args.day or date.today())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, g, make_response
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_TTL = int(os.getenv('CACHE_TTL', 60))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 2048))
+CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'mey:')
+
+
+class NullCache:
+    """Cache backend that stores nothing, used to switch caching off."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def delete_prefix(self, prefix):
+        pass
+
+
+class MemoryCache:
+    """In-process cache with per-entry TTL and least-recently-used eviction."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+class RedisCache:
+    """Shared cache backend so every worker process sees the same entries and invalidations."""
+
+    def __init__(self, url=CACHE_URL, default_ttl=CACHE_TTL, key_prefix=CACHE_KEY_PREFIX):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        self.client = redis.Redis.from_url(url)
+        self.default_ttl = default_ttl
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        value = self.client.get(self.key_prefix + key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.setex(self.key_prefix + key, ttl or self.default_ttl, value)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.key_prefix + key for key in keys))
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=f"{self.key_prefix}{prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def _create_cache(backend):
+    if backend == 'redis':
+        return RedisCache()
+    if backend == 'none':
+        return NullCache()
+    return MemoryCache()
+
+
+cache = _create_cache(CACHE_BACKEND)
+
+
+def cached_response(key_template, ttl=None):
+    """
+    Caches the JSON body of a successful view response under a key built from the view arguments,
+    e.g. ``cached_response('designer:{designer_id}:sidemarks')``. Under ``conditional_get`` the
+    ETag is appended to the key, so a data version change never serves an old body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = key_template.format(**kwargs)
+            if 'response_etag' in g:
+                key = f"{key}:{g.response_etag}"
+            body = cache.get(key)
+            if body is not None:
+                return Response(body, status=200, mimetype='application/json')
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.set(key, response.get_data(as_text=True), ttl)
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_sidemark(designer_id, sidemark_id):
+    """Drops the cached order listings of one sidemark, e.g. after a workorder mutation."""
+    cache.delete_prefix(f"sidemark:{sidemark_id}:")
+    cache.delete_prefix(f"designer:{designer_id}:sidemark:{sidemark_id}:")
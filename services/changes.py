@@ -0,0 +1,315 @@
+"""
+Change feed for live dashboard updates.
+
+Workorder status changes, workorder item changes and inventory counter changes are appended to
+``change_outbox`` in the transaction that makes them: ORM flushes through ``SessionLocal`` are
+picked up by ``before_flush``/``after_flush`` hooks, Core writers (bulk workorder creation,
+scans) call ``append`` themselves. Each process runs one ``ChangeFeed`` poller thread, only while
+someone is subscribed, that tails the outbox and fans new changes out to in-memory subscriber
+queues, filtered by designer and sidemark. Open dashboard tabs therefore cost one query per
+poll interval and process instead of one per tab.
+
+    python -m services.changes prune --days 7
+"""
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, inspect, or_, select
+
+from db.database import SessionLocal, get_engine
+from models.changes import Change
+from models.inventory import Inventory
+from models.orders import Workorder, WorkorderItem
+from services.serialization import WORKORDER, WORKORDER_ITEM
+
+logger = logging.getLogger('mey.changes')
+
+CHANGES_POLL_INTERVAL = float(os.getenv('CHANGES_POLL_INTERVAL', 1.0))
+CHANGES_BATCH_SIZE = int(os.getenv('CHANGES_BATCH_SIZE', 500))
+CHANGES_QUEUE_SIZE = int(os.getenv('CHANGES_QUEUE_SIZE', 1000))
+CHANGES_REPLAY_MAX = int(os.getenv('CHANGES_REPLAY_MAX', 1000))
+# ids below the newest one seen may still be committed by slower transactions, missing ids are
+# polled for this long before they are taken for rolled back inserts
+CHANGES_GAP_SECONDS = float(os.getenv('CHANGES_GAP_SECONDS', 10))
+CHANGES_RETENTION_DAYS = int(os.getenv('CHANGES_RETENTION_DAYS', 7))
+
+INVENTORY_COUNTERS = ('quantity', 'assembly_time', 'unpacked', 'assembled')
+
+
+def append(connection, changes):
+    """Inserts change rows (dicts of ``Change`` columns) in the caller's transaction."""
+    if changes:
+        connection.execute(insert(Change.__table__), changes)
+
+
+def change_record(kind, entity_id, payload, designer_id=None, sidemark_id=None, workorder_id=None):
+    """One outbox row for ``append``, for writers that build their own change events."""
+    return {'kind': kind, 'entity_id': entity_id, 'designer_id': designer_id, 'sidemark_id': sidemark_id,
+            'workorder_id': workorder_id, 'payload': payload, 'created_at': datetime.utcnow()}
+
+
+def _workorder_owners(connection, workorder_ids):
+    workorder_ids = [workorder_id for workorder_id in set(workorder_ids) if workorder_id is not None]
+    if not workorder_ids:
+        return {}
+    return {workorder_id: (designer_id, sidemark_id) for workorder_id, designer_id, sidemark_id in connection.execute(
+        select(Workorder.id, Workorder.designer_id, Workorder.sidemark_id).where(Workorder.id.in_(workorder_ids)))}
+
+
+def item_changes(connection, items, kind='workorder_item.updated'):
+    """Change rows for dumped workorder items (``WORKORDER_ITEM`` fields including ``workorder_id``)."""
+    owners = _workorder_owners(connection, (item['workorder_id'] for item in items))
+    return [change_record(kind, item['id'], item, *owners.get(item['workorder_id'], (None, None)), item['workorder_id'])
+            for item in items]
+
+
+def inventory_changes(connection, inventory_ids):
+    """Change rows with the current counters of the given inventory items."""
+    if not inventory_ids:
+        return []
+    columns = (Inventory.id, Inventory.designer_id, Inventory.version) + tuple(
+        getattr(Inventory, counter) for counter in INVENTORY_COUNTERS)
+    return [change_record('inventory.updated', row.id, dict(row._mapping), row.designer_id)
+            for row in connection.execute(select(*columns).where(Inventory.id.in_(inventory_ids)))]
+
+
+def workorder_changes(workorders):
+    """Change rows for created workorders or status changes, from (dumped workorder, previous status)."""
+    changes = []
+    for workorder, previous_status in workorders:
+        kind = 'workorder.created' if previous_status is None else 'workorder.status'
+        changes.append(change_record(kind, workorder['id'], {**workorder, 'previous_status': previous_status},
+                               workorder['designer_id'], workorder['sidemark_id'], workorder['id']))
+    return changes
+
+
+def _dump_item(item):
+    return {**WORKORDER_ITEM.dump(item, 'detail'), 'workorder_id': item.workorder_id, 'version': item.version}
+
+
+def _dump_workorder(workorder):
+    return {**WORKORDER.dump(workorder, ('id', 'workorder_id', 'status', 'designer_id', 'sidemark_id')),
+            'version': workorder.version}
+
+
+def _before_flush(session, flush_context, instances):
+    workorders, items, deleted_items = [], [], []
+    for obj in session.new:
+        if isinstance(obj, Workorder):
+            workorders.append((obj, None))
+        elif isinstance(obj, WorkorderItem):
+            items.append((obj, 'workorder_item.created'))
+    for obj in session.dirty:
+        if isinstance(obj, Workorder):
+            history = inspect(obj).attrs.status.history
+            if history.has_changes() and history.deleted and history.deleted[0] != obj.status:
+                workorders.append((obj, history.deleted[0]))
+        elif isinstance(obj, WorkorderItem) and session.is_modified(obj):
+            items.append((obj, 'workorder_item.updated'))
+    for obj in session.deleted:
+        if isinstance(obj, WorkorderItem):
+            deleted_items.append(_dump_item(obj))
+    if workorders or items or deleted_items:
+        session.info['changes_pending'] = (workorders, items, deleted_items)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop('changes_pending', None)
+    if pending is None:
+        return
+    workorders, items, deleted_items = pending
+    connection = session.connection()
+    changes = workorder_changes((_dump_workorder(workorder), previous) for workorder, previous in workorders)
+    for item, kind in items:
+        changes.extend(item_changes(connection, [_dump_item(item)], kind))
+    changes.extend(item_changes(connection, deleted_items, 'workorder_item.deleted'))
+    append(connection, changes)
+
+
+event.listen(SessionLocal, 'before_flush', _before_flush)
+event.listen(SessionLocal, 'after_flush', _after_flush)
+
+
+def dump_change(change):
+    return {'id': change.id, 'kind': change.kind, 'designer_id': change.designer_id,
+            'sidemark_id': change.sidemark_id, 'workorder_id': change.workorder_id,
+            'data': change.payload, 'created_at': change.created_at.isoformat() if change.created_at else None}
+
+
+def _filtered(query, designer_id=None, sidemark_id=None):
+    if designer_id is not None:
+        query = query.where(Change.designer_id == designer_id)
+    if sidemark_id is not None:
+        query = query.where(Change.sidemark_id == sidemark_id)
+    return query
+
+
+def replay(after_id, designer_id=None, sidemark_id=None, limit=CHANGES_REPLAY_MAX):
+    """Changes after ``after_id`` for a reconnecting subscriber, oldest first."""
+    with get_engine().connect() as connection:
+        rows = connection.execute(
+            _filtered(select(Change).where(Change.id > after_id), designer_id, sidemark_id)
+            .order_by(Change.id).limit(limit)
+        ).all()
+    return [dump_change(row) for row in rows]
+
+
+class Subscription:
+    """A subscriber's queue of changes. A subscriber that falls behind is marked ``overflowed``."""
+
+    def __init__(self, designer_id=None, sidemark_id=None, maxsize=CHANGES_QUEUE_SIZE):
+        self.designer_id = designer_id
+        self.sidemark_id = sidemark_id
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def matches(self, change):
+        return ((self.designer_id is None or change['designer_id'] == self.designer_id)
+                and (self.sidemark_id is None or change['sidemark_id'] == self.sidemark_id))
+
+    def offer(self, change):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(change)
+        except queue.Full:
+            # the consumer stops and the client catches up by replaying from its last event id
+            self.overflowed = True
+
+
+class AsyncSubscription(Subscription):
+    """
+    A subscription consumed on an event loop: the poller thread hands changes to the loop, whose
+    ``queue`` is an ``asyncio.Queue`` the stream awaits without holding a thread.
+    """
+
+    def __init__(self, loop, designer_id=None, sidemark_id=None, maxsize=CHANGES_QUEUE_SIZE):
+        super().__init__(designer_id, sidemark_id, maxsize)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def offer(self, change):
+        if not self.overflowed:
+            self.loop.call_soon_threadsafe(self._put, change)
+
+    def _put(self, change):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeFeed:
+    """One poller per process tailing ``change_outbox`` and fanning changes out to subscriptions."""
+
+    def __init__(self, poll_interval=CHANGES_POLL_INTERVAL, batch_size=CHANGES_BATCH_SIZE):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.last_id = None
+        self._gaps = {}
+        self._subscriptions = set()
+        self._lock = threading.Condition()
+        self._thread = None
+
+    def subscribe(self, designer_id=None, sidemark_id=None, subscription=None):
+        """Registers a new ``Subscription``, or the given one, and starts the poller if needed."""
+        subscription = subscription or Subscription(designer_id, sidemark_id)
+        with self._lock:
+            if not self._subscriptions and self.last_id is None:
+                # live delivery starts at the current end of the outbox, earlier changes are replayed
+                self.last_id = self.current_id()
+            self._subscriptions.add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+            self._lock.notify_all()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    @staticmethod
+    def current_id():
+        with get_engine().connect() as connection:
+            return connection.scalar(select(func.coalesce(func.max(Change.id), 0)))
+
+    def poll(self):
+        """Reads changes after the last seen id (and ids still missing below it) and publishes them."""
+        now = time.monotonic()
+        self._gaps = {change_id: seen for change_id, seen in self._gaps.items()
+                      if now - seen < CHANGES_GAP_SECONDS}
+        condition = Change.id > self.last_id
+        if self._gaps:
+            condition = or_(condition, Change.id.in_(list(self._gaps)))
+        with get_engine().connect() as connection:
+            rows = connection.execute(select(Change).where(condition).order_by(Change.id).limit(self.batch_size)).all()
+
+        for row in rows:
+            self._gaps.pop(row.id, None)
+            if row.id > self.last_id:
+                self._gaps.update((missing, now) for missing in range(self.last_id + 1, row.id))
+                self.last_id = row.id
+        changes = [dump_change(row) for row in rows]
+        self.publish(changes)
+        return changes
+
+    def publish(self, changes):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for change in changes:
+            for subscription in subscriptions:
+                if subscription.matches(change):
+                    subscription.offer(change)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._subscriptions:
+                    # idle feeds restart from the end of the outbox
+                    self.last_id = None
+                    self._gaps.clear()
+                    self._lock.wait()
+            try:
+                changes = self.poll()
+            except Exception:
+                logger.exception("Polling the change outbox failed")
+                changes = []
+            if len(changes) < self.batch_size:
+                time.sleep(self.poll_interval)
+
+
+feed = ChangeFeed()
+
+
+def prune(connection, days=CHANGES_RETENTION_DAYS):
+    """Deletes changes older than ``days``; reconnecting clients past that point reload instead."""
+    result = connection.execute(delete(Change).where(Change.created_at < datetime.utcnow() - timedelta(days=days)))
+    return result.rowcount
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Maintain the change outbox.")
+    parser.add_argument('command', choices=('prune',))
+    parser.add_argument('--days', type=int, default=CHANGES_RETENTION_DAYS)
+    args = parser.parse_args(argv)
+
+    with get_engine().begin() as connection:
+        logger.info("Pruned %s change(s) older than %s day(s)", prune(connection, args.days), args.days)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import hashlib
+from functools import wraps
+
+from flask import Response, g, make_response, request
+from sqlalchemy import func
+
+from db.database import DatabaseSession
+
+
+def version_aggregates(model):
+    """
+    Returns the row count, version sum and latest update of a versioned model as select columns.
+    Any insert, update or delete of a matching row changes at least one of them.
+    """
+    return (
+        func.count(model.id),
+        func.coalesce(func.sum(model.version), 0),
+        func.max(model.updated_at),
+    )
+
+
+def conditional_get(version_query):
+    """
+    Answers ``If-None-Match`` with 304 when the ETag, derived from the aggregate row returned by
+    ``version_query(**view_kwargs)``, is unchanged. The view itself only runs on a mismatch.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with DatabaseSession() as session:
+                versions = session.execute(version_query(**kwargs)).one()
+            etag = hashlib.sha1(repr(tuple(versions)).encode('utf-8')).hexdigest()
+            # lets cached_response key its entry on the data version it was built from
+            g.response_etag = etag
+
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
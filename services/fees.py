@@ -0,0 +1,233 @@
+"""
+Receiving and fee engine.
+
+A workorder item's fee is the sum of ``rate * basis`` over the rate table below, with an optional
+per-item minimum. Every basis is a SQL expression over the item and its inventory row, so a whole
+shipment, workorder or month of items is priced by one set-based ``UPDATE ... FROM`` join instead
+of a loop over items. Rates default to ``DEFAULT_RATES`` and can be overridden with ``FEE_RATES``,
+a JSON object of basis -> rate, e.g. ``FEE_RATES='{"weight": 0.08}'``.
+
+    python -m services.fees recompute --month 2026-09
+"""
+import argparse
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, func, literal, select, update
+
+from db.database import DatabaseSession
+from models.inventory import Inventory
+from models.orders import Shipment, Workorder, WorkorderItem
+from services.billing import apply_fee_deltas, fee_contributions
+from services.changes import append, item_changes
+from services.jobs import handler
+
+logger = logging.getLogger('mey.fees')
+
+FEE_BATCH_SIZE = int(os.getenv('FEE_BATCH_SIZE', 1000))
+FEE_MINIMUM = float(os.getenv('FEE_MINIMUM', 0))
+
+# what each rate is charged on, per workorder item
+FEE_BASES = {
+    # cubic feet handled
+    'cubic_footage': func.coalesce(Inventory.cubic_sq_footage, 0) * WorkorderItem.quantity,
+    # pounds handled
+    'weight': func.coalesce(Inventory.weight, 0) * WorkorderItem.quantity,
+    # pieces received by ground carrier and by freight
+    'ground_receive': func.coalesce(Inventory.ground_receive, 0),
+    'freight_receive': func.coalesce(Inventory.freight_receive, 0),
+    # minutes of assembly, the item's own time overrides the inventory estimate
+    'assembly_minutes': func.coalesce(WorkorderItem.assembly_time, Inventory.assembly_time, 0),
+    # cubic foot days spent in storage
+    'storage_cubic_foot_days': (func.coalesce(Inventory.cubic_sq_footage, 0) * WorkorderItem.quantity
+                                * func.coalesce(Inventory.days_in_storage, 0)),
+}
+
+DEFAULT_RATES = {
+    'cubic_footage': 1.25,
+    'weight': 0.05,
+    'ground_receive': 15.0,
+    'freight_receive': 45.0,
+    'assembly_minutes': 1.0,
+    'storage_cubic_foot_days': 0.02,
+}
+
+
+def load_rates(raw=None):
+    """The default rates updated with a JSON object of overrides; unknown bases are rejected."""
+    rates = dict(DEFAULT_RATES)
+    overrides = json.loads(raw) if raw else {}
+    unknown = sorted(set(overrides) - set(FEE_BASES))
+    if unknown:
+        raise ValueError(f"Unknown fee basis: {', '.join(unknown)}")
+    rates.update({basis: float(rate) for basis, rate in overrides.items()})
+    return rates
+
+
+RATES = load_rates(os.getenv('FEE_RATES'))
+
+
+def _components(rates):
+    return {basis: FEE_BASES[basis] * rate for basis, rate in rates.items() if rate}
+
+
+def fee_expression(rates=None):
+    """Total fee of an item as one SQL expression, rounded to cents."""
+    total = sum(_components(RATES if rates is None else rates).values(), literal(0.0))
+    if FEE_MINIMUM:
+        total = case((total < FEE_MINIMUM, FEE_MINIMUM), else_=total)
+    return func.round(total, 2)
+
+
+def fee_breakdown(session, *conditions, rates=None):
+    """Per-item fee components and totals for the items matching ``conditions``, without writing."""
+    rates = RATES if rates is None else rates
+    components = _components(rates)
+    query = (
+        select(WorkorderItem.id, WorkorderItem.inventory_id, WorkorderItem.quantity, WorkorderItem.total_fee,
+               fee_expression(rates).label('fee'), *(func.round(value, 2).label(basis)
+                                                     for basis, value in components.items()))
+        .join(Inventory, WorkorderItem.inventory_id == Inventory.id)
+        .where(*conditions)
+        .order_by(WorkorderItem.id)
+    )
+    return [{
+        'id': row.id,
+        'inventory_id': row.inventory_id,
+        'quantity': row.quantity,
+        'components': {basis: row._mapping[basis] for basis in components},
+        'fee': row.fee,
+        'total_fee': row.total_fee,
+    } for row in session.execute(query)]
+
+
+def _stale_item_ids(session, conditions, fee):
+    """Ids of matching items whose stored fee differs from the computed one by a cent or more."""
+    # total_fee is a single precision FLOAT on MySQL, so exact comparisons would always differ
+    return session.scalars(
+        select(WorkorderItem.id)
+        .join(Inventory, WorkorderItem.inventory_id == Inventory.id)
+        .where(*conditions, WorkorderItem.total_fee.is_(None) | (func.abs(WorkorderItem.total_fee - fee) >= 0.005))
+        .order_by(WorkorderItem.id)
+    ).all()
+
+
+def _apply_fees(session, item_ids, fee):
+    """Writes the fees of one batch of items with a single UPDATE and keeps rollups and feed current."""
+    connection = session.connection()
+    workorder_ids = session.scalars(
+        select(WorkorderItem.workorder_id).where(WorkorderItem.id.in_(item_ids)).distinct()
+    ).all()
+    before = fee_contributions(connection, workorder_ids)
+    session.execute(
+        update(WorkorderItem)
+        .where(WorkorderItem.inventory_id == Inventory.id, WorkorderItem.id.in_(item_ids))
+        .values({WorkorderItem.total_fee: fee, WorkorderItem.version: WorkorderItem.version + 1,
+                 WorkorderItem.updated_at: datetime.utcnow()})
+        .execution_options(synchronize_session=False)
+    )
+    # Core updates bypass the billing and change feed flush hooks
+    apply_fee_deltas(connection, before, fee_contributions(connection, workorder_ids))
+    items = [dict(row._mapping) for row in session.execute(
+        select(WorkorderItem.id, WorkorderItem.workorder_id, WorkorderItem.inventory_id, WorkorderItem.quantity,
+               WorkorderItem.total_fee, WorkorderItem.version)
+        .where(WorkorderItem.id.in_(item_ids))
+    )]
+    append(connection, item_changes(connection, items))
+
+
+def compute_fees(session, *conditions, rates=None):
+    """
+    Recomputes the fees of the items matching ``conditions`` in the caller's transaction. Only
+    items whose fee actually changes are written. Returns the number of items updated.
+    """
+    fee = fee_expression(rates)
+    item_ids = _stale_item_ids(session, conditions, fee)
+    for start in range(0, len(item_ids), FEE_BATCH_SIZE):
+        _apply_fees(session, item_ids[start:start + FEE_BATCH_SIZE], fee)
+    return len(item_ids)
+
+
+def shipment_items(shipment_id):
+    return (WorkorderItem.shipment_id == shipment_id,)
+
+
+def workorder_items(workorder_id):
+    return (WorkorderItem.workorder_id == workorder_id,)
+
+
+def receive_shipment(session, shipment, receipt_date=None):
+    """
+    Books a shipment in: stamps its receipt date, marks its inventory received and prices its
+    items. Returns the number of items whose fee changed.
+    """
+    shipment.receipt_date = receipt_date or datetime.utcnow()
+    inventory_ids = select(WorkorderItem.inventory_id).where(WorkorderItem.shipment_id == shipment.id)
+    session.execute(
+        update(Inventory)
+        .where(Inventory.id.in_(inventory_ids), Inventory.received_by_admin.isnot(True))
+        .values(received_by_admin=True, version=Inventory.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return compute_fees(session, *shipment_items(shipment.id))
+
+
+def month_range(month):
+    """First day of ``month`` (a date) and of the month after it."""
+    start = month.replace(day=1)
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+
+
+def recompute_month(session, month, rates=None):
+    """
+    Batch job: reprices every item received in ``month``, by its shipment's receipt date or, for
+    items without a shipment, by the workorder date. Commits after each batch of items, so a
+    month never holds its row locks in one long transaction. Returns the number of items updated.
+    """
+    start, end = month_range(month)
+    shipped = WorkorderItem.shipment_id.in_(
+        select(Shipment.id).where(Shipment.receipt_date >= start, Shipment.receipt_date < end))
+    unshipped = WorkorderItem.shipment_id.is_(None) & WorkorderItem.workorder_id.in_(
+        select(Workorder.id).where(Workorder.workorder_date >= start, Workorder.workorder_date < end))
+
+    fee = fee_expression(rates)
+    updated = 0
+    for condition in (shipped, unshipped):
+        item_ids = _stale_item_ids(session, (condition,), fee)
+        for batch_start in range(0, len(item_ids), FEE_BATCH_SIZE):
+            _apply_fees(session, item_ids[batch_start:batch_start + FEE_BATCH_SIZE], fee)
+            session.commit()
+        updated += len(item_ids)
+    return updated
+
+
+@handler('recompute_fees')
+def recompute_fees(month):
+    """Job form of ``recompute_month``, with the month as ``YYYY-MM``."""
+    with DatabaseSession() as session:
+        updated = recompute_month(session, _month(month))
+    logger.info("Repriced %s item(s) for %s", updated, month)
+
+
+def _month(value):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Recompute workorder item fees.")
+    parser.add_argument('command', choices=('recompute',))
+    parser.add_argument('--month', type=_month, default=None, help="YYYY-MM, defaults to the previous month")
+    args = parser.parse_args(argv)
+
+    month = args.month or (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+    with DatabaseSession() as session:
+        updated = recompute_month(session, month)
+    logger.info("Repriced %s item(s) for %s with rates %s", updated, month.strftime('%Y-%m'), RATES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+"""
+Bulk inventory import from CSV.
+
+The upload is parsed as a stream and cut into chunks of ``IMPORT_CHUNK_SIZE`` rows. Chunks are
+validated and normalized on a process pool (``IMPORT_WORKERS``, with at most two chunks per
+worker in flight so memory stays flat) while the request thread writes finished chunks. The pool
+is started once per process with the forkserver method, its workers never inherit the threads,
+locks and connections of a threaded gunicorn worker, and is shared by concurrent imports. Rows are
+deduplicated on SKU per designer: the first row of a SKU in the file wins, and a SKU the designer
+already has updates that item instead of adding another one. Each chunk is written and committed
+on its own: new items with one executemany INSERT, existing ones with one upsert on the unique
+(designer, SKU) key of the columns present in the file. When a concurrent import added one of
+the new SKUs first, the INSERT hits that key and the chunk is rolled back and written again.
+
+    python -m services.inventory_import <designer_id> inventory.csv [--dry-run]
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from db.database import DatabaseSession
+from db.upsert import upsert
+from models.inventory import Inventory
+from services.billing import apply_storage_deltas, storage_share
+from services.changes import append, change_record
+
+logger = logging.getLogger('mey.imports')
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 2000))
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', os.cpu_count() or 1))
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 1000))
+# times a chunk is written again after losing a race for a new SKU to a concurrent import
+IMPORT_WRITE_ATTEMPTS = int(os.getenv('IMPORT_WRITE_ATTEMPTS', 3))
+# forkserver where the platform has it; fork would copy the request threads' state into workers
+IMPORT_START_METHOD = os.getenv(
+    'IMPORT_START_METHOD', 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+TEXT_COLUMNS = ('item_name', 'sku', 'manufacture', 'description', 'size')
+INTEGER_COLUMNS = ('quantity', 'length', 'width', 'height', 'weight', 'days_in_storage', 'ground_receive',
+                   'freight_receive', 'assembled', 'unpacked', 'assembly_time')
+BOOLEAN_COLUMNS = ('active', 'in_storage', 'received_by_admin')
+IMPORT_COLUMNS = TEXT_COLUMNS + INTEGER_COLUMNS + BOOLEAN_COLUMNS
+REQUIRED_COLUMNS = ('item_name', 'quantity')
+DIMENSIONS = ('length', 'width', 'height')
+
+# values of columns missing from the file, for new items only
+DEFAULTS = {
+    'active': True, 'in_storage': False, 'received_by_admin': False, 'days_in_storage': 0,
+    'assembled': 0, 'unpacked': 0, 'assembly_time': 0,
+}
+TEXT_LIMITS = {name: Inventory.__table__.c[name].type.length for name in TEXT_COLUMNS}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 't', 'x')
+FALSE_VALUES = ('0', 'false', 'no', 'n', 'f', '')
+
+
+def normalize_header(header):
+    return [name.strip().lower().replace(' ', '_').replace('-', '_') for name in header]
+
+
+def _parse_integer(value):
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError
+    return int(number)
+
+
+def _validate_row(header, values):
+    """Normalizes one CSV row into inventory columns. Returns (record, errors)."""
+    raw = {name: value.strip() for name, value in zip(header, values) if name in IMPORT_COLUMNS}
+    record, errors = {}, []
+    for name, value in raw.items():
+        if name in TEXT_COLUMNS:
+            if len(value) > TEXT_LIMITS[name]:
+                errors.append(f"{name} is longer than {TEXT_LIMITS[name]} characters")
+            record[name] = value or None
+        elif name in INTEGER_COLUMNS:
+            if not value:
+                record[name] = None
+                continue
+            try:
+                record[name] = _parse_integer(value.replace(',', ''))
+            except ValueError:
+                errors.append(f"{name} must be a whole number")
+                continue
+            if record[name] < 0:
+                errors.append(f"{name} must not be negative")
+        elif value.lower() in TRUE_VALUES:
+            record[name] = True
+        elif value.lower() in FALSE_VALUES:
+            record[name] = False
+        else:
+            errors.append(f"{name} must be yes or no")
+
+    for name in REQUIRED_COLUMNS:
+        if record.get(name) is None and not any(error.startswith(name) for error in errors):
+            errors.append(f"{name} is required")
+    if len(values) > len(header):
+        errors.append("row has more fields than the header")
+
+    if all(record.get(name) is not None for name in DIMENSIONS):
+        cubic_inches = record['length'] * record['width'] * record['height']
+        record['cubic_sq_inches'] = float(cubic_inches)
+        record['cubic_sq_footage'] = round(cubic_inches / 1728, 2)
+    elif any(name in record for name in DIMENSIONS):
+        record['cubic_sq_inches'] = record['cubic_sq_footage'] = None
+    return record, errors
+
+
+def validate_chunk(task):
+    """Validates one chunk of (line number, values) rows; runs in a worker process."""
+    header, rows = task
+    valid, errors = [], []
+    for line, values in rows:
+        record, row_errors = _validate_row(header, values)
+        if row_errors:
+            errors.append({'row': line, 'errors': row_errors})
+        else:
+            valid.append((line, record))
+    return valid, errors
+
+
+def _chunks(reader, header):
+    rows = []
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        rows.append((reader.line_num, values))
+        if len(rows) >= IMPORT_CHUNK_SIZE:
+            yield header, rows
+            rows = []
+    if rows:
+        yield header, rows
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers):
+    """The process pool of ``workers`` processes shared by the imports of this process."""
+    key = (os.getpid(), workers)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(IMPORT_START_METHOD))
+        return _pools[key]
+
+
+def _discard_pool(workers, executor):
+    with _pools_lock:
+        if _pools.get((os.getpid(), workers)) is executor:
+            del _pools[(os.getpid(), workers)]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _validated(tasks, workers):
+    """Validated chunks in file order, on a process pool once the file is larger than one chunk."""
+    first = next(tasks, None)
+    if first is None:
+        return
+    second = next(tasks, None)
+    if second is None or workers <= 1:
+        yield validate_chunk(first)
+        if second is not None:
+            yield validate_chunk(second)
+            yield from map(validate_chunk, tasks)
+        return
+
+    executor = _pool(workers)
+    pending = deque()
+    try:
+        pending.extend([executor.submit(validate_chunk, first), executor.submit(validate_chunk, second)])
+        for task in tasks:
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+            pending.append(executor.submit(validate_chunk, task))
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        # a worker died; the next import starts a fresh pool
+        _discard_pool(workers, executor)
+        raise
+    finally:
+        # an import that stopped early does not leave its chunks queued for the other imports
+        for future in pending:
+            future.cancel()
+
+
+class ImportReport:
+    """Counts and per-row errors of one import, capped at ``IMPORT_MAX_ERRORS`` reported rows."""
+
+    def __init__(self):
+        self.rows = self.valid = self.created = self.updated = self.error_count = 0
+        self.errors = []
+
+    def add_errors(self, errors):
+        self.error_count += len(errors)
+        self.errors.extend(errors[:max(0, IMPORT_MAX_ERRORS - len(self.errors))])
+
+    def as_dict(self):
+        return {'rows': self.rows, 'valid': self.valid, 'created': self.created, 'updated': self.updated,
+                'error_count': self.error_count, 'errors': sorted(self.errors, key=lambda error: error['row'])}
+
+
+def _write_chunk(session, designer_id, columns, records):
+    """
+    Inserts new items and upserts the ones whose SKU the designer already has, then adds the
+    storage changes to the billing rollups. Returns (created, updated).
+    """
+    skus = [record['sku'] for record in records if record.get('sku')]
+    existing = {}
+    if skus:
+        # locked, so the storage shares subtracted below are still current when the upsert runs
+        for row in session.execute(
+                select(Inventory.id, Inventory.sku, Inventory.in_storage, Inventory.quantity, Inventory.cubic_sq_footage)
+                .where(Inventory.designer_id == designer_id, Inventory.sku.in_(skus))
+                .with_for_update()):
+            existing[row.sku] = row
+
+    now = datetime.utcnow()
+    storage = defaultdict(lambda: [0, 0.0])
+    new_rows, update_rows = [], []
+    for record in records:
+        row = {**DEFAULTS, **{name: None for name in IMPORT_COLUMNS}, 'cubic_sq_inches': None,
+               'cubic_sq_footage': None, **record, 'designer_id': designer_id, 'updated_at': now}
+        current = existing.get(record.get('sku'))
+        if current is None:
+            new_rows.append({**row, 'version': 1})
+        else:
+            # values the item keeps for columns the file does not have
+            for name in ('in_storage', 'quantity', 'cubic_sq_footage'):
+                if name not in columns:
+                    row[name] = getattr(current, name)
+            update_rows.append({**row, 'version': 1})
+            before = storage_share(designer_id, current.in_storage, current.quantity, current.cubic_sq_footage)
+            storage[before[0]][0] -= before[1]
+            storage[before[0]][1] -= before[2]
+        after = storage_share(designer_id, row['in_storage'], row['quantity'], row['cubic_sq_footage'])
+        storage[after[0]][0] += after[1]
+        storage[after[0]][1] += after[2]
+
+    connection = session.connection()
+    if new_rows:
+        connection.execute(insert(Inventory.__table__), new_rows)
+    if update_rows:
+        table = Inventory.__table__
+        upsert(connection, table, update_rows, sorted(columns) + ['updated_at'],
+               conflict_columns=['designer_id', 'sku'], set_values={'version': table.c.version + 1})
+    apply_storage_deltas(connection, dict(storage))
+    return len(new_rows), len(update_rows)
+
+
+def import_inventory(session, designer_id, stream, dry_run=False, workers=IMPORT_WORKERS):
+    """
+    Imports a CSV text stream into a designer's inventory, committing chunk by chunk. Raises
+    ValueError when the header is unusable; row problems end up in the returned report.
+    """
+    reader = csv.reader(stream)
+    header = normalize_header(next(reader, []))
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"The CSV header is missing: {', '.join(missing)}")
+    columns = {name for name in header if name in IMPORT_COLUMNS}
+    if columns & set(DIMENSIONS):
+        columns |= {'cubic_sq_inches', 'cubic_sq_footage'}
+
+    report = ImportReport()
+    seen = {}
+    for valid, errors in _validated(_chunks(reader, header), workers):
+        report.rows += len(valid) + len(errors)
+        report.add_errors(errors)
+        records = []
+        for line, record in valid:
+            sku = record.get('sku')
+            if sku and sku in seen:
+                report.add_errors([{'row': line, 'errors': [f"duplicate sku {sku}, first used on row {seen[sku]}"]}])
+                continue
+            if sku:
+                seen[sku] = line
+            records.append(record)
+
+        report.valid += len(records)
+        if dry_run or not records:
+            continue
+        for attempt in range(1, IMPORT_WRITE_ATTEMPTS + 1):
+            try:
+                created, updated = _write_chunk(session, designer_id, columns, records)
+                session.commit()
+                break
+            except IntegrityError:
+                # a concurrent import committed one of the new SKUs; it is an update now
+                session.rollback()
+                if attempt == IMPORT_WRITE_ATTEMPTS:
+                    raise
+        report.created += created
+        report.updated += updated
+
+    if not dry_run and (report.created or report.updated):
+        # one feed entry per import rather than one per row
+        append(session.connection(), [change_record('inventory.imported', designer_id,
+                                              {'created': report.created, 'updated': report.updated},
+                                              designer_id)])
+        session.commit()
+    return report.as_dict()
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Import a designer's inventory from CSV.")
+    parser.add_argument('designer_id', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--dry-run', action='store_true', help="validate only")
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS)
+    args = parser.parse_args(argv)
+
+    with open(args.path, newline='', encoding='utf-8-sig') as handle, DatabaseSession() as session:
+        report = import_inventory(session, args.designer_id, handle, args.dry_run, args.workers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Database-backed background jobs.
+
+Requests only ``enqueue`` a row into ``jobs`` inside their own transaction. Worker processes
+claim due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of them can poll the
+same table without handing a job out twice, and run the registered handler on a thread pool.
+Failures are retried with exponential backoff until ``max_attempts``; jobs whose worker died
+are reclaimed once their lease ran out. Handlers must be idempotent, a job can run again after
+a crash between the handler's commit and the job being marked done. Workers delete jobs that
+finished more than ``JOB_KEEP_DONE_DAYS`` ago, so the table only holds recent history.
+Handlers registered with ``every`` are periodic: a working worker enqueues one whenever no job
+of that kind was queued within the interval.
+
+    python -m services.jobs work --threads 4
+    python -m services.jobs drain          # run everything that is due, then exit
+    python -m services.jobs prune          # delete old finished jobs once
+"""
+import argparse
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, or_, select, update
+
+from db.database import DatabaseSession, get_engine
+from models.jobs import Job
+
+logger = logging.getLogger('mey.jobs')
+
+JOB_THREADS = int(os.getenv('JOB_THREADS', 4))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+JOB_BACKOFF_BASE = float(os.getenv('JOB_BACKOFF_BASE', 5))
+JOB_BACKOFF_MAX = float(os.getenv('JOB_BACKOFF_MAX', 3600))
+# a running job whose worker has not finished it within the lease is handed out again
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 600))
+JOB_KEEP_DONE_DAYS = float(os.getenv('JOB_KEEP_DONE_DAYS', 7))
+JOB_PRUNE_INTERVAL = float(os.getenv('JOB_PRUNE_INTERVAL', 3600))
+# how often a worker checks whether a periodic job is due
+JOB_SCHEDULE_INTERVAL = float(os.getenv('JOB_SCHEDULE_INTERVAL', 60))
+# open states counted by queue_stats; done jobs are pruned and not part of the backlog
+OPEN_STATUSES = ('queued', 'running', 'failed')
+
+HANDLERS = {}
+# kind -> seconds between runs of periodic jobs
+SCHEDULES = {}
+
+
+def handler(kind, every=None):
+    """
+    Registers the function that runs jobs of ``kind``; it receives the job payload as kwargs.
+    With ``every`` (seconds) workers also enqueue the job periodically, without a payload.
+    """
+    def decorator(function):
+        HANDLERS[kind] = function
+        if every:
+            SCHEDULES[kind] = every
+        return function
+    return decorator
+
+
+def enqueue(session, kind, run_at=None, max_attempts=JOB_MAX_ATTEMPTS, **payload):
+    """Adds a job to the session; it becomes visible to workers when the caller commits."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(kind=kind, payload=payload, status='queued', attempts=0, max_attempts=max_attempts,
+              run_at=run_at or datetime.utcnow())
+    session.add(job)
+    return job
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts``, doubling each time with up to 10% jitter."""
+    delay = min(JOB_BACKOFF_BASE * 2 ** (attempts - 1), JOB_BACKOFF_MAX)
+    return delay * (1 + random.random() * 0.1)
+
+
+def claim(limit, worker_id):
+    """
+    Marks up to ``limit`` due jobs as running for this worker and returns them. The UPDATE is
+    re-checked against the claimed state, so databases without SKIP LOCKED stay safe too.
+    """
+    now = datetime.utcnow()
+    due = or_(
+        and_(Job.status == 'queued', Job.run_at <= now),
+        and_(Job.status == 'running', Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS)),
+    )
+    token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    with get_engine().begin() as connection:
+        ids = connection.scalars(
+            select(Job.id).where(due).order_by(Job.run_at, Job.id).limit(limit).with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return []
+        connection.execute(
+            update(Job).where(Job.id.in_(ids), due)
+            .values(status='running', locked_by=token, locked_at=now, attempts=Job.attempts + 1)
+        )
+        return connection.execute(
+            select(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts, Job.locked_by)
+            .where(Job.locked_by == token)
+        ).all()
+
+
+def _finish(job, **values):
+    """
+    Records the outcome of a claimed job. A worker whose lease ran out and whose job was claimed
+    again no longer holds the token, and its outcome is dropped in favour of the newer claim.
+    """
+    with get_engine().begin() as connection:
+        finished = connection.execute(
+            update(Job).where(Job.id == job.id, Job.locked_by == job.locked_by).values(locked_by=None, **values)
+        ).rowcount
+    if not finished:
+        logger.warning("Job %s (%s) was claimed again after its lease ran out, outcome dropped", job.id, job.kind)
+
+
+def prune(days=JOB_KEEP_DONE_DAYS):
+    """Deletes jobs that finished successfully more than ``days`` ago. Returns the number deleted."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    with get_engine().begin() as connection:
+        return connection.execute(delete(Job).where(Job.status == 'done', Job.finished_at < cutoff)).rowcount
+
+
+def enqueue_scheduled(now=None):
+    """
+    Enqueues each periodic kind whose latest job, in any state, is older than its interval.
+    A queued, running or failed job counts as latest, so a slow or failing kind is not stacked
+    up. Two workers checking at the same moment can both enqueue; handlers are idempotent.
+    Returns the kinds enqueued.
+    """
+    now = now or datetime.utcnow()
+    due = []
+    with DatabaseSession() as session:
+        for kind, every in SCHEDULES.items():
+            latest = session.scalar(select(func.max(Job.run_at)).where(Job.kind == kind))
+            if latest is None or latest <= now - timedelta(seconds=every):
+                enqueue(session, kind, run_at=now)
+                due.append(kind)
+        session.commit()
+    return due
+
+
+def run_job(job):
+    """Runs one claimed job and records the outcome. Returns True when the handler succeeded."""
+    try:
+        HANDLERS[job.kind](**job.payload)
+    except Exception as error:
+        if job.attempts >= job.max_attempts:
+            logger.exception("Job %s (%s) failed for good after %s attempts", job.id, job.kind, job.attempts)
+            _finish(job, status='failed', finished_at=datetime.utcnow(), last_error=traceback.format_exc())
+        else:
+            delay = backoff(job.attempts)
+            logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job.id, job.kind, delay, error)
+            _finish(job, status='queued', run_at=datetime.utcnow() + timedelta(seconds=delay),
+                    last_error=traceback.format_exc())
+        return False
+    _finish(job, status='done', finished_at=datetime.utcnow(), last_error=None)
+    return True
+
+
+class Worker:
+    """Polls the queue and keeps up to ``threads`` jobs running at a time."""
+
+    def __init__(self, threads=JOB_THREADS, poll_interval=JOB_POLL_INTERVAL, worker_id=None):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        # hostname:pid:claim is stored in jobs.locked_by (64 characters), long hostnames are cut
+        self.worker_id = worker_id or f"{socket.gethostname()[:40]}:{os.getpid()}"
+        self.pruned_at = None
+        self.scheduled_at = None
+        self.running = 0
+        self._stopping = False
+        self._changed = threading.Condition()
+
+    def stop(self, *args):
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+
+    def _done(self, future):
+        with self._changed:
+            self.running -= 1
+            self._changed.notify_all()
+
+    def run(self, drain=False):
+        """Processes jobs until stopped, or with ``drain`` until nothing is due. Returns jobs run."""
+        processed = 0
+        with ThreadPoolExecutor(self.threads, thread_name_prefix='job') as executor:
+            while not self._stopping:
+                if self.pruned_at is None or time.monotonic() - self.pruned_at >= JOB_PRUNE_INTERVAL:
+                    self.pruned_at = time.monotonic()
+                    logger.info("Pruned %s finished job(s)", prune())
+                # draining runs what is due now and does not start periodic jobs of its own
+                if not drain and (self.scheduled_at is None
+                                  or time.monotonic() - self.scheduled_at >= JOB_SCHEDULE_INTERVAL):
+                    self.scheduled_at = time.monotonic()
+                    for kind in enqueue_scheduled():
+                        logger.info("Enqueued periodic job %s", kind)
+                jobs = claim(self.threads - self.running, self.worker_id) if self.running < self.threads else []
+                with self._changed:
+                    self.running += len(jobs)
+                for job in jobs:
+                    executor.submit(run_job, job).add_done_callback(self._done)
+                processed += len(jobs)
+
+                with self._changed:
+                    if drain and not jobs and not self.running:
+                        break
+                    if not jobs or self.running >= self.threads:
+                        # woken early when a job finishes or the worker is stopped
+                        self._changed.wait(self.poll_interval)
+        return processed
+
+
+def queue_stats(session):
+    """
+    Counts of queued, running and failed jobs per kind and status, plus the age of the oldest
+    due job in seconds. Done jobs are left out, the count reads only the open part of
+    ``ix_jobs_status_kind``.
+    """
+    now = datetime.utcnow()
+    counts = {}
+    for status, kind, count in session.execute(
+            select(Job.status, Job.kind, func.count()).where(Job.status.in_(OPEN_STATUSES))
+            .group_by(Job.status, Job.kind)):
+        counts.setdefault(kind, {})[status] = count
+    oldest = session.scalar(select(func.min(Job.run_at)).where(Job.status == 'queued', Job.run_at <= now))
+    return {'jobs': counts, 'oldest_due_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0}
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run background jobs.")
+    parser.add_argument('command', choices=('work', 'drain', 'prune'))
+    parser.add_argument('--threads', type=int, default=JOB_THREADS)
+    parser.add_argument('--poll-interval', type=float, default=JOB_POLL_INTERVAL)
+    parser.add_argument('--keep-days', type=float, default=JOB_KEEP_DONE_DAYS, help="for prune")
+    args = parser.parse_args(argv)
+
+    if args.command == 'prune':
+        logger.info("Pruned %s finished job(s)", prune(args.keep_days))
+        return
+
+    from services.mail import MAIL_BACKEND, MAIL_HOST
+    if MAIL_BACKEND == 'smtp' and not MAIL_HOST:
+        parser.error("MAIL_HOST is not set; completion emails need an SMTP host (or MAIL_BACKEND=memory)")
+
+    # registers the workorder and archival handlers
+    import services.workorder_jobs  # noqa: F401
+    import services.archive  # noqa: F401
+
+    from services.cache import CACHE_BACKEND
+    if CACHE_BACKEND == 'memory':
+        logger.warning("CACHE_BACKEND=memory: cache invalidations of jobs do not reach the web processes")
+
+    worker = Worker(args.threads, args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    logger.info("Worker %s started with %s thread(s)", worker.worker_id, args.threads)
+    processed = worker.run(drain=args.command == 'drain')
+    logger.info("Worker %s stopped after %s job(s)", worker.worker_id, processed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Outgoing mail. ``MAIL_BACKEND=smtp`` (the default) sends through ``MAIL_HOST`` and fails while no
+host is configured, so a job that sends mail is retried instead of reporting it sent. Local runs
+and tests opt in to ``memory``, which keeps messages in the mailer instead.
+"""
+import os
+import smtplib
+import threading
+from email.message import EmailMessage
+
+MAIL_HOST = os.getenv('MAIL_HOST')
+MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
+MAIL_USER = os.getenv('MAIL_USER')
+MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+MAIL_FROM = os.getenv('MAIL_FROM', 'no-reply@mey.local')
+MAIL_TIMEOUT = float(os.getenv('MAIL_TIMEOUT', 10))
+MAIL_BACKEND = os.getenv('MAIL_BACKEND', 'smtp')
+
+
+class MemoryMailbox:
+    """Local stand-in mail sink that keeps every sent message in a list."""
+
+    def __init__(self):
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            self.messages.append(message)
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+
+
+class SMTPMailer:
+    def send(self, message):
+        if not MAIL_HOST:
+            raise RuntimeError("MAIL_BACKEND=smtp requires MAIL_HOST")
+        with smtplib.SMTP(MAIL_HOST, MAIL_PORT, timeout=MAIL_TIMEOUT) as client:
+            if MAIL_USE_TLS:
+                client.starttls()
+            if MAIL_USER:
+                client.login(MAIL_USER, MAIL_PASSWORD)
+            client.send_message(message)
+
+
+def _create_mailer(backend):
+    if backend == 'smtp':
+        return SMTPMailer()
+    if backend == 'memory':
+        return MemoryMailbox()
+    raise RuntimeError(f"Unknown MAIL_BACKEND: {backend}")
+
+
+mailer = _create_mailer(MAIL_BACKEND)
+
+
+def send_mail(to, subject, body):
+    message = EmailMessage()
+    message['From'] = MAIL_FROM
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    mailer.send(message)
+    return message
@@ -0,0 +1,214 @@
+"""
+Inventory photo uploads.
+
+Uploads are streamed into ``services.storage`` before any database work, so a slow client never
+holds a pooled connection, and then recorded as ``pending`` photos; a thread pool
+then writes a thumbnail and one size-bucketed variant (the largest of ``PHOTO_VARIANT_WIDTHS``
+that does not upscale) and marks the photo ``ready``. Stored blobs never change, so they are
+served with long-lived immutable cache headers under ``MEDIA_URL``.
+
+    python -m services.photos process   # (re)process pending and failed photos
+"""
+import argparse
+import io
+import logging
+import mimetypes
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from db.database import DatabaseSession
+from models.inventory import Inventory, Photo
+from services.serialization import PHOTO
+from services.storage import storage
+
+logger = logging.getLogger('mey.photos')
+
+MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
+PHOTO_MAX_BYTES = int(os.getenv('PHOTO_MAX_BYTES', 25 * 1024 * 1024))
+PHOTO_WORKERS = int(os.getenv('PHOTO_WORKERS', 2))
+PHOTO_THUMBNAIL_SIZE = int(os.getenv('PHOTO_THUMBNAIL_SIZE', 256))
+PHOTO_VARIANT_WIDTHS = tuple(int(width) for width in os.getenv('PHOTO_VARIANT_WIDTHS', '640,1280,1920').split(','))
+PHOTO_JPEG_QUALITY = int(os.getenv('PHOTO_JPEG_QUALITY', 85))
+
+PHOTO_CONTENT_TYPES = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def media_url(key):
+    return f"{MEDIA_URL}{key}" if key else None
+
+
+def photo_urls(photo):
+    """Original, variant and thumbnail URLs of a photo row or object."""
+    original = media_url(photo.storage_key) if photo.storage_key else photo.url
+    return {
+        'url': original,
+        'variant_url': media_url(photo.variant_key) or original,
+        'thumbnail_url': media_url(photo.thumbnail_key),
+    }
+
+
+def dump_photo(photo):
+    return {**PHOTO.dump(photo, 'detail'), **photo_urls(photo)}
+
+
+def store_upload(inventory_id, stream, content_type):
+    """
+    Streams an upload into storage and returns its (key, size). Raises ValueError for
+    unsupported types and ``StorageLimitExceeded`` above ``PHOTO_MAX_BYTES``.
+    """
+    extension = PHOTO_CONTENT_TYPES.get(content_type)
+    if extension is None:
+        raise ValueError(f"Unsupported photo type: {content_type or 'unknown'}")
+
+    key = f"photos/{inventory_id}/{uuid.uuid4().hex}{extension}"
+    return key, storage.save(key, stream, max_bytes=PHOTO_MAX_BYTES)
+
+
+def record_upload(session, inventory_id, key, content_type, size):
+    """Adds a stored upload to the session as a pending photo."""
+    photo = Photo(inventory_id=inventory_id, storage_key=key, content_type=content_type, size_bytes=size,
+                  status='pending', url=media_url(key))
+    session.add(photo)
+    return photo
+
+
+def _executor_instance():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(PHOTO_WORKERS, thread_name_prefix='photo')
+        return _executor
+
+
+def schedule(photo_id):
+    """Queues a photo for thumbnail and variant generation on the worker pool."""
+    return _executor_instance().submit(process_photo, photo_id)
+
+
+def variant_width(width):
+    """Largest configured width not above the original, or the smallest one for small images."""
+    fitting = [bucket for bucket in PHOTO_VARIANT_WIDTHS if bucket <= width]
+    return max(fitting) if fitting else min(PHOTO_VARIANT_WIDTHS)
+
+
+def _encode_jpeg(image):
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG', quality=PHOTO_JPEG_QUALITY, optimize=True)
+    buffer.seek(0)
+    return buffer
+
+
+def render_variants(source):
+    """Decodes an image once and returns (width, height, bucket width, thumbnail JPEG, variant JPEG)."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        bucket = variant_width(width)
+
+        variant = image.copy()
+        if width > bucket:
+            variant = variant.resize((bucket, max(1, round(height * bucket / width))), Image.LANCZOS)
+        thumbnail = variant.copy()
+        thumbnail.thumbnail((PHOTO_THUMBNAIL_SIZE, PHOTO_THUMBNAIL_SIZE), Image.LANCZOS)
+        return width, height, min(bucket, width), _encode_jpeg(thumbnail), _encode_jpeg(variant)
+
+
+def process_photo(photo_id):
+    """Writes a photo's thumbnail and variant, then marks it ready and bumps its inventory version."""
+    with DatabaseSession() as session:
+        photo = session.get(Photo, photo_id)
+        if photo is None or photo.storage_key is None or photo.status == 'ready':
+            return False
+        try:
+            with storage.open(photo.storage_key) as source:
+                width, height, bucket, thumbnail, variant = render_variants(source)
+            stem = photo.storage_key.rsplit('.', 1)[0]
+            thumbnail_key, variant_key = f"{stem}.thumb.jpg", f"{stem}.w{bucket}.jpg"
+            storage.save(thumbnail_key, thumbnail)
+            storage.save(variant_key, variant)
+        except Exception:
+            logger.exception("Processing photo %s failed", photo_id)
+            photo.status = 'failed'
+            session.commit()
+            return False
+
+        photo.width, photo.height, photo.variant_width = width, height, bucket
+        photo.thumbnail_key, photo.variant_key, photo.status = thumbnail_key, variant_key, 'ready'
+        # listings embed thumbnails, so their ETags have to change with them
+        session.execute(
+            update(Inventory)
+            .where(Inventory.id == photo.inventory_id)
+            .values(version=Inventory.version + 1, updated_at=datetime.utcnow())
+        )
+        session.commit()
+        return True
+
+
+def delete_photo(session, photo):
+    """Removes a photo row; its blobs are deleted once the caller committed."""
+    keys = [key for key in (photo.storage_key, photo.thumbnail_key, photo.variant_key) if key]
+    session.delete(photo)
+    session.execute(
+        update(Inventory)
+        .where(Inventory.id == photo.inventory_id)
+        .values(version=Inventory.version + 1, updated_at=datetime.utcnow())
+    )
+    return keys
+
+
+def thumbnail_urls(session, inventory_ids):
+    """First ready thumbnail per inventory item, in one query for a whole listing."""
+    if not inventory_ids:
+        return {}
+    urls = {}
+    rows = session.execute(
+        select(Photo.inventory_id, Photo.thumbnail_key)
+        .where(Photo.inventory_id.in_(inventory_ids), Photo.status == 'ready')
+        .order_by(Photo.inventory_id, Photo.id)
+    )
+    for inventory_id, thumbnail_key in rows:
+        urls.setdefault(inventory_id, media_url(thumbnail_key))
+    return urls
+
+
+def with_thumbnails(session, items):
+    """Adds ``thumbnail_url`` to dumped inventory rows."""
+    urls = thumbnail_urls(session, [item['id'] for item in items])
+    for item in items:
+        item['thumbnail_url'] = urls.get(item['id'])
+    return items
+
+
+def content_type_of(key):
+    return mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Generate photo thumbnails and variants.")
+    parser.add_argument('command', choices=('process',))
+    parser.add_argument('--retry-failed', action='store_true', help="also retry photos that failed before")
+    args = parser.parse_args(argv)
+
+    statuses = ('pending', 'failed') if args.retry_failed else ('pending',)
+    with DatabaseSession() as session:
+        photo_ids = session.scalars(
+            select(Photo.id).where(Photo.status.in_(statuses), Photo.storage_key.isnot(None)).order_by(Photo.id)
+        ).all()
+    with ThreadPoolExecutor(PHOTO_WORKERS, thread_name_prefix='photo') as executor:
+        processed = sum(executor.map(process_photo, photo_ids))
+    logger.info("Processed %s of %s photo(s)", processed, len(photo_ids))
+
+
+if __name__ == '__main__':
+    main()
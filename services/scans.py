@@ -0,0 +1,173 @@
+"""
+Warehouse scans: counter deltas applied to inventory and workorder items.
+
+Every row is changed with one atomic ``UPDATE ... SET quantity = quantity + :delta`` that also
+bumps ``version``, so parallel scanners never lose each other's updates and nobody holds a row
+lock longer than the statement. A scan may carry the ``version`` it was made against; the UPDATE
+then only matches that version and a stale scan is rejected instead of applied. Counters never
+drop below zero. A batch is applied in one transaction and is all or nothing.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+from models.inventory import Inventory
+from models.orders import Workorder, WorkorderItem
+from services.billing import UNASSIGNED, apply_fee_deltas, apply_storage_deltas
+from services.changes import append, inventory_changes, item_changes
+from services.validation import as_date, is_int
+from services.workorders import ITEM_COUNTERS
+
+SCAN_BATCH_MAX = int(os.getenv('SCAN_BATCH_MAX', 500))
+
+SCAN_COUNTERS = ('quantity',) + ITEM_COUNTERS
+
+# scan key -> (model, name in responses)
+SCAN_TARGETS = {
+    'inventory_id': (Inventory, 'inventory'),
+    'item_id': (WorkorderItem, 'items'),
+}
+
+
+class ScanRejected(Exception):
+    """A scan could not be applied; the whole batch has to be rolled back."""
+
+    def __init__(self, index, reason, message):
+        super().__init__(message)
+        self.index = index
+        self.reason = reason
+        self.message = message
+
+
+def _is_delta(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_scans(scans):
+    """
+    Checks the shape of a scan batch and merges scans of the same row. Returns
+    ({(key, id): {'deltas': {...}, 'version': ..., 'index': first index}}, errors).
+    """
+    merged, errors = {}, []
+    for index, scan in enumerate(scans):
+        if not isinstance(scan, dict):
+            errors.append({'index': index, 'errors': ["scan must be an object"]})
+            continue
+        scan_errors = []
+        targets = [key for key in SCAN_TARGETS if key in scan]
+        if len(targets) != 1:
+            scan_errors.append(f"exactly one of {', '.join(SCAN_TARGETS)} is required")
+        elif not is_int(scan[targets[0]], 1):
+            scan_errors.append(f"{targets[0]} must be a positive integer")
+        deltas = {counter: scan[counter] for counter in SCAN_COUNTERS if counter in scan}
+        if not deltas:
+            scan_errors.append(f"at least one of {', '.join(SCAN_COUNTERS)} is required")
+        scan_errors.extend(f"{counter} must be an integer delta" for counter, delta in deltas.items()
+                           if not _is_delta(delta))
+        version = scan.get('version')
+        if version is not None and not is_int(version, 1):
+            scan_errors.append("version must be a positive integer")
+        if scan_errors:
+            errors.append({'index': index, 'errors': scan_errors})
+            continue
+
+        entry = merged.setdefault((targets[0], scan[targets[0]]), {'deltas': {}, 'version': None, 'index': index})
+        if version is not None:
+            if entry['version'] not in (None, version):
+                errors.append({'index': index, 'errors': ["scans of one row must carry the same version"]})
+                continue
+            entry['version'] = version
+        for counter, delta in deltas.items():
+            entry['deltas'][counter] = entry['deltas'].get(counter, 0) + delta
+    return merged, errors
+
+
+def _apply(session, model, row_id, deltas, version, index):
+    values = {getattr(model, counter): func.coalesce(getattr(model, counter), 0) + delta
+              for counter, delta in deltas.items()}
+    values.update({model.version: model.version + 1, model.updated_at: datetime.utcnow()})
+    conditions = [model.id == row_id]
+    if version is not None:
+        conditions.append(model.version == version)
+    conditions.extend(func.coalesce(getattr(model, counter), 0) + delta >= 0
+                      for counter, delta in deltas.items() if delta < 0)
+
+    result = session.execute(update(model).where(*conditions).values(values)
+                             .execution_options(synchronize_session=False))
+    if result.rowcount:
+        return
+
+    # nothing matched, find out why for the error report
+    current = session.execute(
+        select(model.version, *(getattr(model, counter) for counter in deltas)).where(model.id == row_id)
+    ).first()
+    label = f"{model.__tablename__} {row_id}"
+    if current is None:
+        raise ScanRejected(index, 'not_found', f"{label} not found")
+    if version is not None and current[0] != version:
+        raise ScanRejected(index, 'version_conflict', f"{label} is at version {current[0]}, not {version}")
+    short = [counter for counter, value in zip(deltas, current[1:]) if (value or 0) + deltas[counter] < 0]
+    raise ScanRejected(index, 'insufficient', f"{label} would drop below zero: {', '.join(short)}")
+
+
+def _record_rollups(session, inventory_deltas, item_deltas):
+    """
+    Core UPDATEs bypass the billing flush hooks, so the quantity deltas are added to the storage
+    and fee rollups here, in the same transaction.
+    """
+    connection = session.connection()
+    if inventory_deltas:
+        storage = defaultdict(lambda: [0, 0.0])
+        for inventory_id, designer_id, footage in session.execute(
+                select(Inventory.id, Inventory.designer_id, Inventory.cubic_sq_footage)
+                .where(Inventory.id.in_(inventory_deltas), Inventory.in_storage.is_(True))):
+            delta = inventory_deltas[inventory_id]
+            storage[designer_id or UNASSIGNED][0] += delta
+            storage[designer_id or UNASSIGNED][1] += (footage or 0) * delta
+        apply_storage_deltas(connection, dict(storage))
+
+    if item_deltas:
+        fees = defaultdict(int)
+        for item_id, designer_id, sidemark_id, day, status in session.execute(
+                select(WorkorderItem.id, func.coalesce(Workorder.designer_id, UNASSIGNED),
+                       func.coalesce(Workorder.sidemark_id, UNASSIGNED), func.date(Workorder.workorder_date),
+                       Workorder.status)
+                .join(Workorder, WorkorderItem.workorder_id == Workorder.id)
+                .where(WorkorderItem.id.in_(item_deltas))):
+            fees[(designer_id, sidemark_id, as_date(day), status)] += item_deltas[item_id]
+        apply_fee_deltas(connection, {}, {key: (0, quantity, 0) for key, quantity in fees.items()})
+
+
+def apply_scans(session, merged):
+    """
+    Applies validated scans inside the caller's transaction and returns the new counters and
+    versions of every touched row. Rows are updated in primary key order, so concurrent batches
+    lock them in the same order and cannot deadlock. Raises ``ScanRejected`` on the first scan
+    that does not apply; the caller rolls back.
+    """
+    touched = defaultdict(set)
+    quantity_deltas = defaultdict(dict)
+    for (key, row_id), entry in sorted(merged.items()):
+        model, name = SCAN_TARGETS[key]
+        _apply(session, model, row_id, entry['deltas'], entry['version'], entry['index'])
+        touched[key].add(row_id)
+        if entry['deltas'].get('quantity'):
+            quantity_deltas[key][row_id] = entry['deltas']['quantity']
+
+    _record_rollups(session, quantity_deltas['inventory_id'], quantity_deltas['item_id'])
+
+    state = {}
+    for key, row_ids in touched.items():
+        model, name = SCAN_TARGETS[key]
+        columns = (model.id, model.version) + tuple(getattr(model, counter) for counter in SCAN_COUNTERS)
+        if model is WorkorderItem:
+            columns += (WorkorderItem.workorder_id,)
+        state[name] = [dict(row._mapping) for row in
+                       session.execute(select(*columns).where(model.id.in_(row_ids)).order_by(model.id))]
+
+    connection = session.connection()
+    append(connection, inventory_changes(connection, touched['inventory_id']) +
+           item_changes(connection, state.get('items', [])))
+    return state
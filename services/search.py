@@ -0,0 +1,245 @@
+"""
+Ranked search over inventory, designers and workorders.
+
+Inventory text (SKU, item name, manufacturer, description) is matched with the MySQL FULLTEXT
+index ``ft_inventory_search`` in boolean mode, every term as a prefix. Other databases (SQLite
+in local runs and benchmarks) use ``InventoryIndex``, an in-process token/trigram index that is
+rebuilt whenever the inventory version aggregates change. Designers and workorders are small,
+indexed prefix lookups on both.
+"""
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import NamedTuple
+
+from sqlalchemy import and_, case, or_, select
+from sqlalchemy.dialects.mysql import match
+
+from models.designer import Designer
+from models.inventory import Inventory
+from models.orders import Workorder
+from services.etag import version_aggregates
+from services.serialization import DESIGNER, INVENTORY, WORKORDER
+
+# auto: FULLTEXT on MySQL, the in-process index elsewhere; fulltext/memory force one of them
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto').lower()
+
+SEARCH_KINDS = ('inventory', 'designers', 'workorders')
+INVENTORY_RESULT_COLUMNS = INVENTORY.columns('search')
+INVENTORY_TEXT_COLUMNS = (Inventory.sku, Inventory.item_name, Inventory.manufacture, Inventory.description)
+
+# how much a hit in each column counts towards the in-process ranking
+FIELD_WEIGHTS = {'sku': 4.0, 'item_name': 3.0, 'manufacture': 2.0, 'description': 1.0}
+PREFIX_MATCH_FACTOR = 0.75
+TRIGRAM_MATCH_FACTOR = 0.5
+TRIGRAM_MIN_SIMILARITY = 0.4
+
+_TERMS = re.compile(r"\w+")
+
+# read by benchmarks.explain_check: these statements scan the inventory on purpose
+INDEX_REFRESH_OPTIONS = {'allow_full_scan': 'in-process search index refresh'}
+
+
+def search_terms(query):
+    """Lowercased word terms of a query; FULLTEXT boolean operators are dropped."""
+    return _TERMS.findall(query.lower())
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class IndexSnapshot(NamedTuple):
+    """One build of the inventory index; never changed after it is published."""
+    version: tuple
+    rows: dict
+    postings: dict
+    tokens: list
+    token_trigrams: dict
+
+
+class InventoryIndex:
+    """
+    Token and trigram postings over the inventory text columns, kept in process memory. A rebuild
+    publishes a new ``IndexSnapshot`` with one assignment, and each search reads a single snapshot,
+    so concurrent searches never mix rows and postings of different builds.
+    """
+
+    def __init__(self):
+        self.snapshot = IndexSnapshot(None, {}, {}, [], {})
+        self._lock = threading.Lock()
+
+    def refresh(self, connection):
+        """Rebuilds the index when the inventory changed since the last build."""
+        version = tuple(connection.execute(
+            select(*version_aggregates(Inventory)).execution_options(**INDEX_REFRESH_OPTIONS)).one())
+        if version == self.snapshot.version:
+            return
+        with self._lock:
+            if version == self.snapshot.version:
+                return
+            self.snapshot = self._build(connection, version)
+
+    def _build(self, connection, version):
+        rows, postings = {}, defaultdict(dict)
+        result = connection.execute(
+            select(*INVENTORY_RESULT_COLUMNS, Inventory.description)
+            .execution_options(yield_per=5000, **INDEX_REFRESH_OPTIONS))
+        for row in result:
+            mapping = row._mapping
+            rows[row.id] = {column.key: mapping[column.key] for column in INVENTORY_RESULT_COLUMNS}
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in search_terms(mapping[field] or ''):
+                    documents = postings[token]
+                    documents[row.id] = max(documents.get(row.id, 0.0), weight)
+
+        token_trigrams = defaultdict(set)
+        for token in postings:
+            for trigram in trigrams(token):
+                token_trigrams[trigram].add(token)
+        return IndexSnapshot(version, rows, dict(postings), sorted(postings), dict(token_trigrams))
+
+    @staticmethod
+    def _prefix_tokens(snapshot, term):
+        start = bisect_left(snapshot.tokens, term)
+        end = bisect_left(snapshot.tokens, term + '\uffff', start)
+        return snapshot.tokens[start:end]
+
+    @staticmethod
+    def _similar_tokens(snapshot, term):
+        """Tokens sharing enough trigrams with a term, for typos and infixes."""
+        wanted = trigrams(term)
+        shared = defaultdict(int)
+        for trigram in wanted:
+            for token in snapshot.token_trigrams.get(trigram, ()):
+                shared[token] += 1
+        for token, count in shared.items():
+            similarity = count / len(wanted | trigrams(token))
+            if similarity >= TRIGRAM_MIN_SIMILARITY:
+                yield token, similarity
+
+    def _term_scores(self, snapshot, term):
+        scores = defaultdict(float)
+        matches = [(token, 1.0 if token == term else PREFIX_MATCH_FACTOR)
+                   for token in self._prefix_tokens(snapshot, term)]
+        if not matches and len(term) >= 3:
+            matches = [(token, similarity * TRIGRAM_MATCH_FACTOR)
+                       for token, similarity in self._similar_tokens(snapshot, term)]
+        for token, factor in matches:
+            for document, weight in snapshot.postings[token].items():
+                scores[document] = max(scores[document], weight * factor)
+        return scores
+
+    def search(self, terms, designer_id=None):
+        """Rows matching every term, best first, as (score, row) pairs."""
+        snapshot = self.snapshot
+        scores = None
+        for term in terms:
+            term_scores = self._term_scores(snapshot, term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {document: score + term_scores[document]
+                          for document, score in scores.items() if document in term_scores}
+            if not scores:
+                return []
+        ranked = [(score, snapshot.rows[document]) for document, score in (scores or {}).items()
+                  if designer_id is None or snapshot.rows[document]['designer_id'] == designer_id]
+        ranked.sort(key=lambda entry: (-entry[0], entry[1]['id']))
+        return ranked
+
+
+inventory_index = InventoryIndex()
+
+
+def use_fulltext(connection):
+    if SEARCH_BACKEND in ('fulltext', 'memory'):
+        return SEARCH_BACKEND == 'fulltext'
+    return connection.dialect.name == 'mysql'
+
+
+def _page(items, limit, offset):
+    """Cuts one page out of ``limit + 1`` fetched rows."""
+    return {'items': items[:limit], 'next_offset': offset + limit if len(items) > limit else None}
+
+
+def search_inventory(connection, query, limit, offset, designer_id=None):
+    terms = search_terms(query)
+    if not terms:
+        return _page([], limit, offset)
+
+    if not use_fulltext(connection):
+        inventory_index.refresh(connection)
+        ranked = inventory_index.search(terms, designer_id)[offset:offset + limit + 1]
+        return _page([dict(row, score=round(score, 3)) for score, row in ranked], limit, offset)
+
+    score = match(*INVENTORY_TEXT_COLUMNS, against=' '.join(f"+{term}*" for term in terms)).in_boolean_mode()
+    statement = (
+        select(*INVENTORY_RESULT_COLUMNS, score.label('score'))
+        .where(score)
+        .order_by(case((Inventory.sku == query.strip(), 1), else_=0).desc(), score.desc(), Inventory.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    if designer_id is not None:
+        statement = statement.where(Inventory.designer_id == designer_id)
+    items = [dict(row._mapping, score=round(float(row.score), 3)) for row in connection.execute(statement)]
+    return _page(items, limit, offset)
+
+
+def starts_with(connection, column, prefix):
+    """
+    ``column LIKE 'prefix%'``. SQLite cannot use an index for that, so there the LIKE is narrowed
+    by a range over every ASCII case variant of the prefix, which its index can answer.
+    """
+    condition = column.startswith(prefix, autoescape=True)
+    if connection.dialect.name != 'sqlite':
+        return condition
+    low = ''.join(char.upper() if char.isascii() else char for char in prefix)
+    high = ''.join(char.lower() if char.isascii() else char for char in prefix)
+    return and_(column >= low, column < high + '\U0010ffff', condition)
+
+
+def search_designers(connection, query, limit, offset):
+    query = query.strip()
+    statement = (
+        DESIGNER.select('search')
+        .where(or_(starts_with(connection, Designer.designer_name, query),
+                   starts_with(connection, Designer.company, query)))
+        .order_by(case((or_(Designer.designer_name == query, Designer.company == query), 0), else_=1),
+                  Designer.designer_name, Designer.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    return _page(DESIGNER.dump_rows(connection.execute(statement)), limit, offset)
+
+
+def search_workorders(connection, query, limit, offset):
+    """Prefix search on ``workorder_id``; ``abcde`` also finds ``WO-ABCDE-12345``."""
+    code = query.strip().upper()
+    prefixes = {code}
+    if not code.startswith('WO-'):
+        prefixes.add(f"WO-{code}")
+    statement = (
+        WORKORDER.select('search')
+        .where(or_(*(Workorder.workorder_id.startswith(prefix, autoescape=True) for prefix in prefixes)))
+        .order_by(Workorder.workorder_id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    return _page(WORKORDER.dump_rows(connection.execute(statement)), limit, offset)
+
+
+def search(connection, query, kinds=SEARCH_KINDS, limit=20, offset=0, designer_id=None):
+    """Runs the query against each requested kind and returns one result page per kind."""
+    results = {}
+    if 'inventory' in kinds:
+        results['inventory'] = search_inventory(connection, query, limit, offset, designer_id)
+    if 'designers' in kinds:
+        results['designers'] = search_designers(connection, query, limit, offset)
+    if 'workorders' in kinds:
+        results['workorders'] = search_workorders(connection, query, limit, offset)
+    return results
@@ -0,0 +1,184 @@
+"""
+Model schemas and the JSON encoder behind every response.
+
+Each model declares one ``Schema``: the fields it may expose plus named views (``list``,
+``detail``, ...) that endpoints project. Queries select those columns as plain Core rows and
+``Schema.dump_rows`` turns them into dicts without hydrating ORM objects. Responses are
+encoded with orjson when it is installed (``JSON_BACKEND=auto``/``orjson``), or with Flask's
+stdlib encoder (``JSON_BACKEND=json``).
+"""
+import os
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, select
+
+from models.archive import InventoryArchive, ShipmentArchive, WorkorderArchive, WorkorderItemArchive
+from models.designer import Designer, Sidemark
+from models.inventory import Inventory, Photo
+from models.orders import Shipment, Workorder, WorkorderItem
+
+try:
+    import orjson
+except ImportError:  # optional, responses fall back to the stdlib encoder
+    orjson = None
+
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+
+
+class Schema:
+    """Declared JSON fields of a model, selectable as columns and dumped from rows or objects."""
+
+    def __init__(self, model, fields, **views):
+        self.model = model
+        self.fields = tuple(fields)
+        self.views = {name: tuple(view) for name, view in views.items()}
+        # dates are sent as ISO 8601 strings
+        self.temporal_fields = frozenset(
+            name for name in self.fields if isinstance(getattr(model, name).type, (Date, DateTime))
+        )
+
+    def resolve(self, fields=None):
+        """Field names of a view name, an explicit field list, or every declared field."""
+        if fields is None:
+            return self.fields
+        if isinstance(fields, str):
+            return self.views[fields]
+        unknown = [name for name in fields if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown field: {', '.join(unknown)}")
+        return tuple(fields)
+
+    def columns(self, fields=None):
+        return tuple(getattr(self.model, name) for name in self.resolve(fields))
+
+    def select(self, fields=None):
+        return select(*self.columns(fields))
+
+    def _temporal(self, value):
+        return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+    def dump(self, obj, fields=None):
+        """Dumps an ORM object, reading only the requested attributes."""
+        return {name: self._temporal(getattr(obj, name)) if name in self.temporal_fields else getattr(obj, name)
+                for name in self.resolve(fields)}
+
+    def dump_rows(self, rows):
+        """Dumps Core rows selected from this schema's columns, keyed by their column names."""
+        items, keys, temporal = [], None, ()
+        for row in rows:
+            if keys is None:
+                keys = row._fields
+                temporal = [key for key in keys if key in self.temporal_fields]
+            item = dict(zip(keys, row))
+            for key in temporal:
+                item[key] = self._temporal(item[key])
+            items.append(item)
+        return items
+
+
+DESIGNER = Schema(
+    Designer,
+    ('id', 'designer_name', 'company', 'abbreviation', 'email', 'secondary_email', 'phone'),
+    list=('id', 'designer_name', 'company', 'email', 'phone'),
+    detail=('id', 'designer_name', 'company', 'email', 'phone'),
+    search=('id', 'designer_name', 'company'),
+)
+SIDEMARK = Schema(
+    Sidemark,
+    ('id', 'name', 'designer_id'),
+    list=('id', 'name'),
+    detail=('id', 'name'),
+)
+INVENTORY = Schema(
+    Inventory,
+    ('id', 'item_name', 'sku', 'manufacture', 'quantity', 'description', 'designer_id', 'active',
+     'length', 'width', 'height', 'weight', 'size', 'cubic_sq_inches', 'cubic_sq_footage', 'in_storage',
+     'days_in_storage', 'received_by_admin', 'ground_receive', 'freight_receive', 'assembled', 'unpacked',
+     'assembly_time', 'updated_at'),
+    list=('id', 'item_name', 'quantity'),
+    detail=('id', 'item_name', 'sku', 'manufacture', 'quantity', 'length', 'width', 'height', 'weight',
+            'description'),
+    search=('id', 'sku', 'item_name', 'manufacture', 'quantity', 'designer_id'),
+    export=('id', 'sku', 'item_name', 'manufacture', 'quantity', 'description', 'length', 'width', 'height',
+            'weight', 'size', 'cubic_sq_inches', 'cubic_sq_footage', 'in_storage', 'days_in_storage',
+            'received_by_admin', 'ground_receive', 'freight_receive', 'assembled', 'unpacked', 'assembly_time',
+            'active', 'updated_at'),
+)
+PHOTO = Schema(
+    Photo,
+    ('id', 'inventory_id', 'url', 'storage_key', 'content_type', 'size_bytes', 'width', 'height', 'status',
+     'thumbnail_key', 'variant_key', 'variant_width', 'created_at'),
+    detail=('id', 'inventory_id', 'content_type', 'size_bytes', 'width', 'height', 'variant_width', 'status',
+            'created_at'),
+)
+WORKORDER = Schema(
+    Workorder,
+    ('id', 'workorder_id', 'status', 'workorder_date', 'active', 'services_recorded', 'email_sent', 'tagged',
+     'designer_id', 'sidemark_id', 'updated_at'),
+    list=('id', 'workorder_id', 'status'),
+    detail=('id', 'workorder_id', 'status', 'workorder_date', 'active', 'services_recorded', 'email_sent',
+            'tagged'),
+    search=('id', 'workorder_id', 'status', 'designer_id', 'sidemark_id'),
+    export=('id', 'workorder_id', 'status', 'workorder_date', 'designer_id', 'sidemark_id', 'active',
+            'services_recorded', 'email_sent', 'tagged'),
+    tree=('id', 'workorder_id', 'status', 'workorder_date', 'active'),
+)
+WORKORDER_ITEM = Schema(
+    WorkorderItem,
+    ('id', 'workorder_id', 'inventory_id', 'shipment_id', 'quantity', 'assembly_time', 'unpacked', 'assembled',
+     'total_fee'),
+    detail=('id', 'inventory_id', 'shipment_id', 'quantity', 'assembly_time', 'unpacked', 'assembled',
+            'total_fee'),
+    export=('id', 'workorder_id', 'inventory_id', 'shipment_id', 'quantity', 'assembly_time', 'unpacked',
+            'assembled', 'total_fee'),
+)
+SHIPMENT = Schema(
+    Shipment,
+    ('id', 'workorder_id', 'receipt_date'),
+    detail=('id', 'receipt_date'),
+)
+
+# archived rows keep the columns of their hot tables, plus when they were archived
+ARCHIVED_WORKORDER = Schema(
+    WorkorderArchive,
+    WORKORDER.fields + ('archived_at',),
+    list=('id', 'workorder_id', 'status', 'workorder_date', 'sidemark_id', 'archived_at'),
+    detail=WORKORDER.views['detail'] + ('designer_id', 'sidemark_id', 'archived_at'),
+)
+ARCHIVED_WORKORDER_ITEM = Schema(WorkorderItemArchive, WORKORDER_ITEM.fields, detail=WORKORDER_ITEM.views['detail'])
+ARCHIVED_SHIPMENT = Schema(ShipmentArchive, SHIPMENT.fields, detail=SHIPMENT.views['detail'])
+ARCHIVED_INVENTORY = Schema(
+    InventoryArchive,
+    INVENTORY.fields + ('archived_at',),
+    list=INVENTORY.views['detail'] + ('archived_at',),
+)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider encoding with orjson. Output matches the default provider: sorted keys,
+    and anything orjson does not handle natively (datetimes, decimals, ...) goes through Flask's
+    own ``default``.
+    """
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=self.options),
+                                        mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Installs the configured JSON backend on the Flask app."""
+    if JSON_BACKEND == 'json' or (JSON_BACKEND == 'auto' and orjson is None):
+        return
+    if orjson is None:
+        raise RuntimeError("JSON_BACKEND=orjson requires the 'orjson' package")
+    app.json = ORJSONProvider(app)
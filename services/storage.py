@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+STORAGE_ROOT = os.getenv('STORAGE_ROOT', os.path.join(os.getcwd(), 'media'))
+# internal documents (tag sheets, service records); unlike STORAGE_ROOT never served over HTTP
+DOCUMENT_ROOT = os.getenv('DOCUMENT_ROOT', os.path.join(os.getcwd(), 'documents'))
+STORAGE_CHUNK_SIZE = int(os.getenv('STORAGE_CHUNK_SIZE', 64 * 1024))
+
+
+class StorageLimitExceeded(ValueError):
+    """Raised when a stream is larger than the size allowed for it."""
+
+
+class LocalStorage:
+    """
+    Stores blobs as files below a root directory. Writes go to a temporary file in the same
+    directory first and are renamed into place, so readers never see partial files.
+
+    Backends provide ``save(key, stream, max_bytes)``, ``open(key)`` (a seekable binary file),
+    ``size(key)``, ``exists(key)`` and ``delete(key)``.
+    """
+
+    def __init__(self, root=STORAGE_ROOT, chunk_size=STORAGE_CHUNK_SIZE):
+        self.root = os.path.abspath(root)
+        self.chunk_size = chunk_size
+
+    def path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise KeyError(key)
+        return path
+
+    def save(self, key, stream, max_bytes=None):
+        """Copies a stream into storage chunk by chunk and returns the number of bytes written."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.upload-')
+        written = 0
+        try:
+            with os.fdopen(handle, 'wb') as target:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if max_bytes is not None and written > max_bytes:
+                        raise StorageLimitExceeded(f"{key} is larger than {max_bytes} bytes")
+                    target.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return written
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+def _create_storage(backend, root):
+    if backend == 'local':
+        return LocalStorage(root)
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+storage = _create_storage(STORAGE_BACKEND, STORAGE_ROOT)
+documents = _create_storage(STORAGE_BACKEND, DOCUMENT_ROOT)
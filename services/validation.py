@@ -0,0 +1,16 @@
+"""Value checks and coercions shared by the services that validate request payloads and rows."""
+from datetime import date, datetime
+
+
+def is_int(value, minimum=0):
+    """True for an int (not a bool) of at least ``minimum``."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+
+def as_date(value):
+    """The date of a date, datetime or ISO string, as databases return workorder days differently."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
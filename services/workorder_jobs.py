@@ -0,0 +1,137 @@
+"""
+Workorder side effects run by the job worker. Each handler checks its workorder flag first and
+sets it last, so a retried or duplicated job does nothing once the work is done (sending is at
+least once: a crash between sending and committing the flag sends the email again).
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload, selectinload
+
+from db.database import DatabaseSession
+from models.orders import Workorder, WorkorderItem
+from services.fees import compute_fees, workorder_items
+from services.jobs import enqueue, handler
+from services.mail import send_mail
+from services.storage import documents
+
+logger = logging.getLogger('mey.jobs')
+
+# jobs queued when a workorder moves into a status
+STATUS_JOBS = {
+    'processing': ('tag_workorder',),
+    'completed': ('record_services', 'send_completion_email'),
+}
+
+
+def enqueue_status_jobs(session, workorder):
+    """Queues the side effects of the workorder's current status in the caller's transaction."""
+    return [enqueue(session, kind, workorder_id=workorder.id) for kind in STATUS_JOBS.get(workorder.status, ())]
+
+
+def _set_flag(session, workorder_id, flag):
+    """
+    Sets a workorder flag with a plain conditional UPDATE instead of a versioned ORM flush, so
+    handlers running side by side for the same workorder don't fail each other's version check.
+    """
+    column = getattr(Workorder, flag)
+    session.execute(
+        update(Workorder)
+        .where(Workorder.id == workorder_id, column.isnot(True))
+        .values({column: True, Workorder.version: Workorder.version + 1, Workorder.updated_at: datetime.utcnow()})
+    )
+    session.commit()
+
+
+def _load_workorder(session, workorder_id):
+    return session.scalars(
+        select(Workorder)
+        .options(joinedload(Workorder.designer), joinedload(Workorder.sidemark),
+                 selectinload(Workorder.workorder_items).joinedload(WorkorderItem.inventory_item))
+        .where(Workorder.id == workorder_id)
+    ).first()
+
+
+@handler('send_completion_email')
+def send_completion_email(workorder_id):
+    with DatabaseSession() as session:
+        workorder = _load_workorder(session, workorder_id)
+        if workorder is None or workorder.email_sent or workorder.status != 'completed':
+            return
+        designer = workorder.designer
+        if designer is None or not designer.email:
+            logger.warning("Workorder %s has no designer email, completion email skipped", workorder_id)
+            return
+
+        project = workorder.sidemark.name if workorder.sidemark else 'your project'
+        lines = [f"Workorder {workorder.workorder_id} for {project} has been completed.", "", "Items:"]
+        for item in workorder.workorder_items:
+            name = item.inventory_item.item_name if item.inventory_item else f"item {item.inventory_id}"
+            lines.append(f"  {item.quantity} x {name}")
+        send_mail(designer.email, f"Workorder {workorder.workorder_id} completed", "\n".join(lines))
+
+        _set_flag(session, workorder_id, 'email_sent')
+
+
+@handler('tag_workorder')
+def tag_workorder(workorder_id):
+    """Writes the printable tag sheet (one row per item) to storage and marks the workorder tagged."""
+    with DatabaseSession() as session:
+        workorder = _load_workorder(session, workorder_id)
+        if workorder is None or workorder.tagged:
+            return
+
+        sheet = io.StringIO()
+        writer = csv.writer(sheet)
+        writer.writerow(('workorder', 'designer', 'sidemark', 'inventory_id', 'sku', 'item_name', 'quantity'))
+        for item in workorder.workorder_items:
+            inventory = item.inventory_item
+            writer.writerow((
+                workorder.workorder_id,
+                workorder.designer.company if workorder.designer else '',
+                workorder.sidemark.name if workorder.sidemark else '',
+                item.inventory_id,
+                inventory.sku if inventory else '',
+                inventory.item_name if inventory else '',
+                item.quantity,
+            ))
+        documents.save(f"tags/{workorder.workorder_id}.csv", io.BytesIO(sheet.getvalue().encode('utf-8')))
+
+        _set_flag(session, workorder_id, 'tagged')
+
+
+@handler('record_services')
+def record_services(workorder_id):
+    """Prices the workorder's items, writes the services performed to the document store and flags them recorded."""
+    with DatabaseSession() as session:
+        workorder = _load_workorder(session, workorder_id)
+        if workorder is None or workorder.services_recorded:
+            return
+        if compute_fees(session, *workorder_items(workorder_id)):
+            session.commit()
+            workorder = _load_workorder(session, workorder_id)
+
+        items = [{
+            'item_id': item.id,
+            'inventory_id': item.inventory_id,
+            'quantity': item.quantity,
+            'unpacked': item.unpacked or 0,
+            'assembled': item.assembled or 0,
+            'assembly_time': item.assembly_time or 0,
+            'total_fee': item.total_fee or 0.0,
+        } for item in workorder.workorder_items]
+        record = {
+            'workorder_id': workorder.workorder_id,
+            'designer_id': workorder.designer_id,
+            'sidemark_id': workorder.sidemark_id,
+            'items': items,
+            'totals': {name: sum(item[name] for item in items)
+                       for name in ('unpacked', 'assembled', 'assembly_time', 'total_fee')},
+        }
+        documents.save(f"services/{workorder.workorder_id}.json", io.BytesIO(json.dumps(record).encode('utf-8')))
+
+        _set_flag(session, workorder_id, 'services_recorded')
@@ -0,0 +1,226 @@
+import os
+import random
+import string
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from models.designer import Designer, Sidemark
+from models.inventory import Inventory
+from models.orders import Shipment, Workorder, WorkorderItem
+from services.billing import record_new_workorders
+from services.changes import append, workorder_changes
+from services.validation import is_int
+
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))
+BULK_MAX_WORKORDERS = int(os.getenv('BULK_MAX_WORKORDERS', 5000))
+WORKORDER_STATUSES = tuple(Workorder.__table__.c.status.type.enums)
+
+ITEM_COUNTERS = ('assembly_time', 'unpacked', 'assembled')
+
+
+def generate_workorder_id():
+    """Generate a readable workorder ID in the format 'WO-ABCDE-12345'."""
+    letters = ''.join(random.choices(string.ascii_uppercase, k=5))
+    return f"WO-{letters}-{random.randint(10000, 99999)}"
+
+
+def _parse_datetime(value, field, errors):
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        errors.append(f"{field} must be an ISO 8601 date")
+        return None
+
+
+def _validate_item(item, position, shipment_count, errors):
+    prefix = f"items[{position}]"
+    if not isinstance(item, dict):
+        errors.append(f"{prefix} must be an object")
+        return None
+
+    if not is_int(item.get('inventory_id'), 1):
+        errors.append(f"{prefix}.inventory_id is required")
+    if not is_int(item.get('quantity'), 1):
+        errors.append(f"{prefix}.quantity must be a positive integer")
+    for counter in ITEM_COUNTERS:
+        if item.get(counter) is not None and not is_int(item[counter]):
+            errors.append(f"{prefix}.{counter} must be a non-negative integer")
+    total_fee = item.get('total_fee', 0)
+    if isinstance(total_fee, bool) or not isinstance(total_fee, (int, float)) or total_fee < 0:
+        errors.append(f"{prefix}.total_fee must be a non-negative number")
+    shipment = item.get('shipment')
+    if shipment is not None and not (is_int(shipment) and shipment < shipment_count):
+        errors.append(f"{prefix}.shipment must index the workorder's shipments")
+
+    return {
+        'inventory_id': item.get('inventory_id'),
+        'quantity': item.get('quantity'),
+        'assembly_time': item.get('assembly_time'),
+        'unpacked': item.get('unpacked') or 0,
+        'assembled': item.get('assembled') or 0,
+        'total_fee': total_fee,
+        'shipment': shipment,
+    }
+
+
+def _validate_record(record):
+    """Checks the shape of one workorder payload and returns (normalized record, errors)."""
+    if not isinstance(record, dict):
+        return None, ["workorder must be an object"]
+
+    errors = []
+    if not is_int(record.get('designer_id'), 1):
+        errors.append("designer_id is required")
+    if not is_int(record.get('sidemark_id'), 1):
+        errors.append("sidemark_id is required")
+    status = record.get('status', 'pending')
+    if status not in WORKORDER_STATUSES:
+        errors.append(f"status must be one of {', '.join(WORKORDER_STATUSES)}")
+    workorder_id = record.get('workorder_id')
+    if workorder_id is not None and not (isinstance(workorder_id, str) and 0 < len(workorder_id) <= 255):
+        errors.append("workorder_id must be a string of at most 255 characters")
+
+    shipments = record.get('shipments') or []
+    items = record.get('items') or []
+    if not isinstance(shipments, list) or not isinstance(items, list):
+        return None, errors + ["shipments and items must be lists"]
+
+    normalized_shipments = []
+    for position, shipment in enumerate(shipments):
+        if not isinstance(shipment, dict):
+            errors.append(f"shipments[{position}] must be an object")
+            continue
+        receipt_date = _parse_datetime(shipment.get('receipt_date'), f"shipments[{position}].receipt_date", errors)
+        normalized_shipments.append({'receipt_date': receipt_date or datetime.utcnow()})
+
+    normalized_items = [_validate_item(item, position, len(shipments), errors) for position, item in enumerate(items)]
+
+    normalized = {
+        'workorder_id': workorder_id,
+        'designer_id': record.get('designer_id'),
+        'sidemark_id': record.get('sidemark_id'),
+        'status': status,
+        'workorder_date': _parse_datetime(record.get('workorder_date'), 'workorder_date', errors) or datetime.utcnow(),
+        'shipments': normalized_shipments,
+        'items': normalized_items,
+    }
+    return normalized, errors
+
+
+def _check_references(session, records, errors_by_index):
+    """Resolves designer, sidemark, inventory and workorder_id references with one IN query each."""
+    designer_ids = {r['designer_id'] for r in records.values()}
+    sidemark_ids = {r['sidemark_id'] for r in records.values()}
+    inventory_ids = {item['inventory_id'] for r in records.values() for item in r['items']}
+    workorder_ids = [r['workorder_id'] for r in records.values() if r['workorder_id']]
+
+    known_designers = set(session.scalars(select(Designer.id).where(Designer.id.in_(designer_ids))))
+    sidemark_owners = dict(session.execute(
+        select(Sidemark.id, Sidemark.designer_id).where(Sidemark.id.in_(sidemark_ids))
+    ).all())
+    known_inventory = set(session.scalars(select(Inventory.id).where(Inventory.id.in_(inventory_ids))))
+    taken_ids = set(session.scalars(select(Workorder.workorder_id).where(Workorder.workorder_id.in_(workorder_ids))))
+
+    seen_ids = set()
+    for index, record in records.items():
+        errors = errors_by_index.setdefault(index, [])
+        if record['designer_id'] not in known_designers:
+            errors.append(f"designer {record['designer_id']} not found")
+        if sidemark_owners.get(record['sidemark_id']) != record['designer_id']:
+            errors.append(f"sidemark {record['sidemark_id']} not found for designer {record['designer_id']}")
+        missing = sorted({item['inventory_id'] for item in record['items']} - known_inventory)
+        if missing:
+            errors.append(f"inventory not found: {', '.join(map(str, missing))}")
+        if record['workorder_id'] in taken_ids or record['workorder_id'] in seen_ids:
+            errors.append(f"workorder_id {record['workorder_id']} already exists")
+        if record['workorder_id']:
+            seen_ids.add(record['workorder_id'])
+
+    for record in records.values():
+        while not record['workorder_id'] or record['workorder_id'] in taken_ids:
+            record['workorder_id'] = generate_workorder_id()
+            if record['workorder_id'] in seen_ids:
+                record['workorder_id'] = None
+        seen_ids.add(record['workorder_id'])
+        taken_ids.add(record['workorder_id'])
+
+
+def _insert_chunk(session, records):
+    """
+    Inserts one chunk of validated workorders with three Core executemany INSERTs (against the
+    tables, so rows with different NULL columns still go out as one batch). MySQL has no
+    INSERT ... RETURNING, so generated ids are read back by workorder_id, and shipment ids by
+    insertion order within their brand new workorder.
+    """
+    session.execute(insert(Workorder.__table__), [
+        {key: record[key] for key in ('workorder_id', 'designer_id', 'sidemark_id', 'status', 'workorder_date')}
+        for record in records
+    ])
+    ids = dict(session.execute(
+        select(Workorder.workorder_id, Workorder.id)
+        .where(Workorder.workorder_id.in_([record['workorder_id'] for record in records]))
+    ).all())
+    for record in records:
+        record['id'] = ids[record['workorder_id']]
+
+    shipment_rows = [
+        {'workorder_id': record['id'], 'receipt_date': shipment['receipt_date']}
+        for record in records for shipment in record['shipments']
+    ]
+    shipment_ids = {}
+    if shipment_rows:
+        session.execute(insert(Shipment.__table__), shipment_rows)
+        for shipment_id, workorder_pk in session.execute(
+            select(Shipment.id, Shipment.workorder_id)
+            .where(Shipment.workorder_id.in_([record['id'] for record in records]))
+            .order_by(Shipment.id)
+        ):
+            shipment_ids.setdefault(workorder_pk, []).append(shipment_id)
+
+    item_rows = []
+    for record in records:
+        for item in record['items']:
+            row = {key: value for key, value in item.items() if key != 'shipment'}
+            row['workorder_id'] = record['id']
+            row['shipment_id'] = shipment_ids[record['id']][item['shipment']] if item['shipment'] is not None else None
+            item_rows.append(row)
+    if item_rows:
+        session.execute(insert(WorkorderItem.__table__), item_rows)
+    record_new_workorders(session.connection(), [record['id'] for record in records])
+    append(session.connection(), workorder_changes(
+        ({'id': record['id'], 'workorder_id': record['workorder_id'], 'status': record['status'],
+          'designer_id': record['designer_id'], 'sidemark_id': record['sidemark_id'], 'version': 1}, None)
+        for record in records
+    ))
+
+
+def create_workorders(session, payload):
+    """
+    Validates a list of workorder payloads and inserts the valid ones in chunks inside the
+    caller's transaction. Returns (created, errors) where errors are reported per input index.
+    """
+    records, errors_by_index = {}, {}
+    for index, record in enumerate(payload):
+        normalized, errors = _validate_record(record)
+        if errors:
+            errors_by_index[index] = errors
+        else:
+            records[index] = normalized
+
+    if records:
+        _check_references(session, records, errors_by_index)
+    errors = [{'index': index, 'errors': errors} for index, errors in sorted(errors_by_index.items()) if errors]
+    valid = [(index, record) for index, record in records.items() if not errors_by_index.get(index)]
+
+    for start in range(0, len(valid), BULK_CHUNK_SIZE):
+        _insert_chunk(session, [record for _, record in valid[start:start + BULK_CHUNK_SIZE]])
+
+    created = [
+        {'index': index, 'id': record['id'], 'workorder_id': record['workorder_id'],
+         'designer_id': record['designer_id'], 'sidemark_id': record['sidemark_id']}
+        for index, record in valid
+    ]
+    return created, errors
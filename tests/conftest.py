@@ -0,0 +1,76 @@
+"""
+Shared fixtures. The settings modules read the environment at import time, so it points at a
+throwaway SQLite database and storage directories before anything from the app is imported.
+"""
+import os
+import shutil
+import tempfile
+
+TEST_ROOT = tempfile.mkdtemp(prefix='mey-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(TEST_ROOT, 'test.db')}",
+    'STORAGE_ROOT': os.path.join(TEST_ROOT, 'media'),
+    'DOCUMENT_ROOT': os.path.join(TEST_ROOT, 'documents'),
+    'CACHE_BACKEND': 'memory',
+    'MAIL_BACKEND': 'memory',
+    'IMPORT_WORKERS': '1',
+})
+
+import pytest  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from db import migrations  # noqa: E402
+from db.database import dispose_engine, get_engine  # noqa: E402
+from models.base import Base  # noqa: E402
+from models.designer import Designer, Sidemark  # noqa: E402
+from models.inventory import Inventory  # noqa: E402
+from services.cache import cache  # noqa: E402
+from services.storage import DOCUMENT_ROOT, STORAGE_ROOT  # noqa: E402
+
+
+@pytest.fixture(scope='session', autouse=True)
+def schema():
+    migrations.upgrade(get_engine())
+    yield
+    dispose_engine()
+    shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Every test starts with empty tables, an empty cache and no stored files."""
+    yield
+    with get_engine().begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(delete(table))
+    cache.delete_prefix('')
+    for root in (STORAGE_ROOT, DOCUMENT_ROOT):
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@pytest.fixture
+def app():
+    return create_app({'TESTING': True})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_inventory(connection, inventory_id, designer_id=1, **values):
+    row = {'id': inventory_id, 'item_name': f'Item {inventory_id}', 'sku': f'SKU-{inventory_id}', 'quantity': 1,
+           'designer_id': designer_id, 'length': 10, 'width': 10, 'height': 10, 'in_storage': True,
+           'active': True, 'version': 1, **values}
+    connection.execute(insert(Inventory.__table__).values(**row))
+
+
+@pytest.fixture
+def designer():
+    """Designer 1 with sidemark 1 and inventory item 1; returns their ids."""
+    with get_engine().begin() as connection:
+        connection.execute(insert(Designer.__table__).values(id=1, designer_name='Dana', company='Acme', version=1))
+        connection.execute(insert(Sidemark.__table__).values(id=1, designer_id=1, name='Lobby', version=1))
+        add_inventory(connection, 1, quantity=5)
+    return {'designer_id': 1, 'sidemark_id': 1, 'inventory_id': 1}
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+import services.archive  # noqa: F401  registers the archival job
+from conftest import add_inventory
+from db.database import SessionLocal, get_engine
+from models.archive import InventoryArchive, ShipmentArchive, WorkorderArchive, WorkorderItemArchive
+from models.billing import FeeRollup
+from models.changes import Change
+from models.inventory import Inventory
+from models.jobs import Job
+from models.orders import Shipment, Workorder, WorkorderItem
+from services import billing, jobs
+from services.archive import archive_records
+
+
+def add_workorder(connection, workorder_pk, age_days, status='completed', inventory_ids=(1,), **values):
+    """A workorder dated and last updated ``age_days`` ago, with one shipment and an item per inventory id."""
+    dated = datetime.utcnow() - timedelta(days=age_days)
+    connection.execute(insert(Workorder.__table__).values(**{
+        'id': workorder_pk, 'workorder_id': f'WO-{workorder_pk}', 'designer_id': 1, 'sidemark_id': 1,
+        'status': status, 'workorder_date': dated, 'updated_at': dated, 'active': True, 'version': 1, **values}))
+    connection.execute(insert(Shipment.__table__).values(id=workorder_pk, workorder_id=workorder_pk, receipt_date=dated))
+    for inventory_id in inventory_ids:
+        connection.execute(insert(WorkorderItem.__table__).values(
+            workorder_id=workorder_pk, inventory_id=inventory_id, quantity=2, total_fee=10.0,
+            shipment_id=workorder_pk, updated_at=dated, version=1))
+
+
+def ids(model):
+    with get_engine().connect() as connection:
+        return sorted(connection.scalars(select(model.id)))
+
+
+def fee_totals():
+    with get_engine().connect() as connection:
+        return connection.execute(select(func.sum(FeeRollup.quantity), func.sum(FeeRollup.total_fee))).one()
+
+
+def run_archive(days=365):
+    with SessionLocal() as session:
+        return archive_records(session, days=days, batch_size=2)
+
+
+def test_archive_moves_old_finished_work_and_leaves_current_work(designer):
+    old = datetime.utcnow() - timedelta(days=800)
+    with get_engine().begin() as connection:
+        add_inventory(connection, 2, active=False, in_storage=False, updated_at=old)
+        add_inventory(connection, 3, active=False, in_storage=False, updated_at=old)
+        add_inventory(connection, 4, active=False, in_storage=True, updated_at=old)
+        add_workorder(connection, 1, 800, inventory_ids=(1, 2))
+        add_workorder(connection, 2, 800, status='pending', active=False)
+        add_workorder(connection, 3, 800, status='pending')
+        add_workorder(connection, 4, 10)
+        add_workorder(connection, 5, 800, inventory_ids=(3,))
+        add_workorder(connection, 6, 800, status='processing', inventory_ids=(3,))
+        billing.rebuild(connection)
+    totals = fee_totals()
+
+    counts = run_archive()
+
+    # the open workorder 6 keeps inventory 3 hot; inventory 4 is still in storage
+    assert counts == {'workorders': 3, 'inventory': 1}
+    assert ids(Workorder) == [3, 4, 6]
+    assert ids(WorkorderArchive) == [1, 2, 5]
+    assert ids(ShipmentArchive) == [1, 2, 5]
+    assert ids(Shipment) == [3, 4, 6]
+    assert ids(Inventory) == [1, 3, 4]
+    assert ids(InventoryArchive) == [2]
+    with get_engine().connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(WorkorderItem).where(
+            WorkorderItem.workorder_id.in_([1, 2, 5]))) == 0
+        assert connection.scalar(select(func.count()).select_from(WorkorderItemArchive)) == 4
+        kinds = connection.scalars(select(Change.kind).order_by(Change.id)).all()
+    assert kinds == ['workorder.archived'] * 3 + ['inventory.archived']
+
+    # billing history is unchanged, also when the rollups are rebuilt from both tables
+    assert fee_totals() == totals
+    with get_engine().begin() as connection:
+        billing.rebuild(connection)
+    assert fee_totals() == totals
+
+    assert run_archive() == {'workorders': 0, 'inventory': 0}
+
+
+def test_shipment_shared_with_a_hot_workorder_keeps_its_workorder(designer):
+    with get_engine().begin() as connection:
+        add_workorder(connection, 1, 800)
+        add_workorder(connection, 2, 10)
+        connection.execute(insert(WorkorderItem.__table__).values(
+            workorder_id=2, inventory_id=1, quantity=1, shipment_id=1, version=1))
+
+    assert run_archive() == {'workorders': 0, 'inventory': 0}
+    assert ids(Workorder) == [1, 2]
+
+
+def test_archived_records_are_read_through_the_archive_endpoints(client, designer):
+    with get_engine().begin() as connection:
+        add_workorder(connection, 1, 800, inventory_ids=(1,))
+    assert [order['id'] for order in client.get('/api/designer/1/sidemark/1/orders').get_json()] == [1]
+
+    run_archive()
+
+    # the cached order listing was invalidated
+    assert client.get('/api/designer/1/sidemark/1/orders').get_json() == []
+    listing = client.get('/api/archive/designer/1/workorders').get_json()
+    assert [workorder['id'] for workorder in listing['items']] == [1]
+    detail = client.get('/api/archive/workorder/1').get_json()
+    assert detail['workorder']['workorder_id'] == 'WO-1'
+    assert [(item['inventory_id'], item['sku']) for item in detail['items']] == [(1, 'SKU-1')]
+    assert len(detail['shipments']) == 1
+    assert client.get('/api/archive/workorder/2').status_code == 404
+
+
+def test_archive_run_endpoint_queues_the_job(client, designer):
+    with get_engine().begin() as connection:
+        add_workorder(connection, 1, 40)
+
+    assert client.post('/api/archive/run', json={'days': 0}).status_code == 400
+    response = client.post('/api/archive/run', json={'days': 30})
+    assert response.status_code == 202
+
+    assert jobs.Worker(threads=1, poll_interval=0.01).run(drain=True) == 1
+    assert ids(WorkorderArchive) == [1]
+
+
+def test_workers_enqueue_the_archive_job_once_per_interval():
+    assert jobs.SCHEDULES['archive_records'] == services.archive.ARCHIVE_INTERVAL_HOURS * 3600
+    now = datetime.utcnow()
+
+    assert jobs.enqueue_scheduled(now) == ['archive_records']
+    # already queued, and then recently run, so nothing is added until the interval has passed
+    assert jobs.enqueue_scheduled(now) == []
+    assert jobs.Worker(threads=1, poll_interval=0.01).run(drain=True) == 1
+    assert jobs.enqueue_scheduled(now + timedelta(hours=1)) == []
+    assert jobs.enqueue_scheduled(now + timedelta(hours=services.archive.ARCHIVE_INTERVAL_HOURS)) == [
+        'archive_records']
+
+    with get_engine().connect() as connection:
+        assert connection.execute(select(Job.kind, Job.status).order_by(Job.id)).all() == [
+            ('archive_records', 'done'), ('archive_records', 'queued')]
@@ -0,0 +1,101 @@
+from sqlalchemy import func, select
+
+from db.database import get_engine
+from models.changes import Change
+from models.orders import Shipment, Workorder, WorkorderItem
+
+
+def count(model):
+    with get_engine().connect() as connection:
+        return connection.scalar(select(func.count()).select_from(model))
+
+
+def workorder(designer, **values):
+    return {'designer_id': designer['designer_id'], 'sidemark_id': designer['sidemark_id'],
+            'shipments': [{}], 'items': [{'inventory_id': designer['inventory_id'], 'quantity': 2, 'shipment': 0}],
+            **values}
+
+
+def test_bulk_create_writes_valid_workorders_and_reports_the_rest(client, designer):
+    response = client.post('/api/workorders/bulk', json={'workorders': [
+        workorder(designer, workorder_id='WO-GOOD-1'),
+        workorder(designer, sidemark_id=99),
+        workorder(designer, items=[{'inventory_id': 999, 'quantity': 1}], shipments=[]),
+        workorder(designer, status='lost'),
+        workorder(designer, workorder_id='WO-GOOD-2'),
+    ]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'partial'
+    assert [(created['index'], created['workorder_id']) for created in body['created']] == [
+        (0, 'WO-GOOD-1'), (4, 'WO-GOOD-2')]
+    assert [error['index'] for error in body['errors']] == [1, 2, 3]
+    assert 'sidemark 99 not found for designer 1' in body['errors'][0]['errors']
+    assert 'inventory not found: 999' in body['errors'][1]['errors']
+
+    assert (count(Workorder), count(Shipment), count(WorkorderItem)) == (2, 2, 2)
+    with get_engine().connect() as connection:
+        items = connection.execute(select(WorkorderItem.workorder_id, WorkorderItem.shipment_id)).all()
+        shipments = dict(connection.execute(select(Shipment.id, Shipment.workorder_id)).all())
+        kinds = connection.scalars(select(Change.kind)).all()
+    # every item is attached to the shipment of its own workorder
+    assert all(shipments[shipment_id] == workorder_pk for workorder_pk, shipment_id in items)
+    assert kinds == ['workorder.created', 'workorder.created']
+
+
+def test_bulk_create_rejects_duplicate_workorder_ids(client, designer):
+    first = client.post('/api/workorders/bulk', json={'workorders': [workorder(designer, workorder_id='WO-1')]})
+    assert first.status_code == 201
+
+    response = client.post('/api/workorders/bulk', json={'workorders': [
+        workorder(designer, workorder_id='WO-1'),
+        workorder(designer, workorder_id='WO-2'),
+        workorder(designer, workorder_id='WO-2'),
+    ]})
+
+    body = response.get_json()
+    assert body['status'] == 'partial'
+    assert [created['workorder_id'] for created in body['created']] == ['WO-2']
+    assert [error['index'] for error in body['errors']] == [0, 2]
+    assert count(Workorder) == 2
+
+
+def test_bulk_create_writes_nothing_when_every_workorder_fails(client, designer):
+    response = client.post('/api/workorders/bulk', json={'workorders': [
+        workorder(designer, designer_id=99), 'not an object',
+    ]})
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['status'] == 'fail'
+    assert body['created'] == []
+    assert [error['index'] for error in body['errors']] == [0, 1]
+    assert count(Workorder) == 0
+
+
+def test_bulk_create_validates_the_request(client, designer, monkeypatch):
+    assert client.post('/api/workorders/bulk', json={'workorders': []}).status_code == 400
+    monkeypatch.setattr('routes.workorder_routes.BULK_MAX_WORKORDERS', 1)
+    response = client.post('/api/workorders/bulk', json={'workorders': [workorder(designer)] * 2})
+    assert response.status_code == 400
+    assert count(Workorder) == 0
+
+
+def test_bulk_create_across_chunks_keeps_items_with_their_workorders(client, designer, monkeypatch):
+    monkeypatch.setattr('services.workorders.BULK_CHUNK_SIZE', 2)
+    response = client.post('/api/workorders/bulk', json={'workorders': [
+        workorder(designer, workorder_id=f'WO-{number}', shipments=[{}, {}],
+                  items=[{'inventory_id': 1, 'quantity': number, 'shipment': 1}])
+        for number in range(1, 6)
+    ]})
+
+    assert response.status_code == 201
+    ids = {created['workorder_id']: created['id'] for created in response.get_json()['created']}
+    with get_engine().connect() as connection:
+        items = connection.execute(
+            select(WorkorderItem.workorder_id, WorkorderItem.quantity, Shipment.workorder_id)
+            .join(Shipment, WorkorderItem.shipment_id == Shipment.id)
+        ).all()
+    assert sorted(items) == sorted((ids[f'WO-{number}'], number, ids[f'WO-{number}']) for number in range(1, 6))
+    assert count(Shipment) == 10
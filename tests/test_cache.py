@@ -0,0 +1,85 @@
+import importlib.util
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import services.cache
+from services.cache import MemoryCache
+
+
+def orders(client):
+    return client.get('/api/designer/1/sidemark/1/orders').get_json()
+
+
+def create_workorder(client, designer):
+    response = client.post('/api/workorders/bulk', json={'workorders': [
+        {'designer_id': designer['designer_id'], 'sidemark_id': designer['sidemark_id'],
+         'items': [{'inventory_id': designer['inventory_id'], 'quantity': 1}]},
+    ]})
+    assert response.status_code == 201
+    return response.get_json()['created'][0]
+
+
+def test_bulk_create_invalidates_cached_orders(client, designer):
+    assert orders(client) == []
+    assert client.get('/api/sidemark/1/orders').get_json() == []
+
+    created = create_workorder(client, designer)
+
+    assert [order['id'] for order in orders(client)] == [created['id']]
+    assert [order['id'] for order in client.get('/api/sidemark/1/orders').get_json()] == [created['id']]
+
+
+def test_status_change_invalidates_cached_orders(client, designer):
+    created = create_workorder(client, designer)
+    assert orders(client)[0]['status'] == 'pending'
+
+    response = client.patch(f"/api/workorder/{created['id']}/status", json={'status': 'processing'})
+    assert response.status_code == 200
+
+    assert orders(client)[0]['status'] == 'processing'
+
+
+def test_add_sidemark_invalidates_cached_sidemarks(client, designer):
+    assert [sidemark['name'] for sidemark in client.get('/api/designer/1/sidemarks').get_json()] == ['Lobby']
+
+    response = client.post('/api/add-sidemark', json={'sidemarkName': 'Suite', 'company': 'Acme'})
+    assert response.status_code == 200
+
+    names = [sidemark['name'] for sidemark in client.get('/api/designer/1/sidemarks').get_json()]
+    assert sorted(names) == ['Lobby', 'Suite']
+
+
+def test_invalidate_sidemark_leaves_other_sidemarks_cached():
+    services.cache.cache.set('sidemark:1:orders', '[1]')
+    services.cache.cache.set('sidemark:12:orders', '[12]')
+    services.cache.cache.set('designer:1:sidemark:1:orders', '[1]')
+
+    services.cache.invalidate_sidemark(1, 1)
+
+    assert services.cache.cache.get('sidemark:1:orders') is None
+    assert services.cache.cache.get('designer:1:sidemark:1:orders') is None
+    assert services.cache.cache.get('sidemark:12:orders') == '[12]'
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    cache.get('a')
+    cache.set('c', '3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+
+
+def test_gunicorn_refuses_memory_cache_with_several_workers():
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py')
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', path)
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+
+    config.on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+    with pytest.raises(RuntimeError):
+        config.on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=2)))
@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+from sqlalchemy import insert, select
+
+from asgi import app as asgi_app
+from db.database import get_engine
+from models.changes import Change
+from services import changes
+from services.changes import ChangeFeed, Subscription, change_record, replay
+
+
+def add_changes(*records):
+    with get_engine().begin() as connection:
+        changes.append(connection, list(records))
+    with get_engine().connect() as connection:
+        return connection.scalars(select(Change.id).order_by(Change.id)).all()
+
+
+def create_workorder(client):
+    response = client.post('/api/workorders/bulk', json={'workorders': [
+        {'designer_id': 1, 'sidemark_id': 1, 'items': [{'inventory_id': 1, 'quantity': 1}]},
+    ]})
+    return response.get_json()['created'][0]['id']
+
+
+def test_workorder_writes_are_recorded_in_the_outbox(client, designer):
+    workorder_id = create_workorder(client)
+    client.patch(f'/api/workorder/{workorder_id}/status', json={'status': 'processing'})
+
+    recorded = replay(0)
+    assert [change['kind'] for change in recorded] == ['workorder.created', 'workorder.status']
+    status = recorded[1]
+    assert (status['designer_id'], status['sidemark_id'], status['workorder_id']) == (1, 1, workorder_id)
+    assert (status['data']['status'], status['data']['previous_status']) == ('processing', 'pending')
+
+
+def test_replay_returns_later_changes_of_the_subscription_only():
+    ids = add_changes(
+        change_record('workorder.status', 1, {}, designer_id=1, sidemark_id=1, workorder_id=1),
+        change_record('workorder.status', 2, {}, designer_id=1, sidemark_id=2, workorder_id=2),
+        change_record('workorder.status', 3, {}, designer_id=2, sidemark_id=3, workorder_id=3),
+        change_record('inventory.updated', 4, {}, designer_id=1),
+    )
+
+    assert [change['id'] for change in replay(ids[0])] == ids[1:]
+    assert [change['id'] for change in replay(0, designer_id=1)] == [ids[0], ids[1], ids[3]]
+    assert [change['id'] for change in replay(ids[0], designer_id=1, sidemark_id=1)] == []
+    assert [change['id'] for change in replay(0, limit=2)] == ids[:2]
+
+
+def test_feed_publishes_matching_changes_and_fills_gaps():
+    feed = ChangeFeed()
+    feed.last_id = 0
+    everything, sidemark = Subscription(), Subscription(designer_id=1, sidemark_id=1)
+    feed._subscriptions.update((everything, sidemark))
+
+    with get_engine().begin() as connection:
+        connection.execute(insert(Change.__table__), [
+            {**change_record('workorder.status', 1, {}, 1, 1, 1), 'id': 1},
+            {**change_record('workorder.status', 3, {}, 1, 2, 3), 'id': 3},
+        ])
+    assert [change['id'] for change in feed.poll()] == [1, 3]
+
+    # id 2 belonged to a transaction that committed after id 3
+    with get_engine().begin() as connection:
+        connection.execute(insert(Change.__table__).values(
+            id=2, **change_record('workorder.status', 2, {}, 1, 1, 2)))
+    assert [change['id'] for change in feed.poll()] == [2]
+    assert feed.poll() == []
+
+    assert [everything.queue.get_nowait()['id'] for _ in range(3)] == [1, 3, 2]
+    assert [sidemark.queue.get_nowait()['id'] for _ in range(2)] == [1, 2]
+    assert sidemark.queue.empty()
+
+
+def test_subscription_overflows_instead_of_blocking():
+    subscription = Subscription(maxsize=1)
+    subscription.offer({'id': 1})
+    subscription.offer({'id': 2})
+    assert subscription.overflowed
+    assert subscription.queue.qsize() == 1
+
+
+async def read_events(path, headers, count):
+    """The first ``count`` events of an event stream, as (event, data) pairs."""
+    events, buffer = [], ''
+    async with asgi_app.test_app():
+        async with asgi_app.test_client().request(path, headers=headers) as connection:
+            await connection.send_complete()
+            while len(events) < count:
+                buffer += (await asyncio.wait_for(connection.receive(), 5)).decode('utf-8')
+                *blocks, buffer = buffer.split('\n\n')
+                for block in blocks:
+                    fields = dict(line.split(': ', 1) for line in block.split('\n') if ': ' in line)
+                    if 'event' in fields:
+                        events.append((fields['event'], json.loads(fields['data'])))
+            await connection.disconnect()
+    return events
+
+
+def test_stream_replays_changes_missed_since_last_event_id():
+    ids = add_changes(*(change_record('workorder.status', number, {'number': number}, 1, 1, number)
+                        for number in range(1, 5)))
+    add_changes(change_record('workorder.status', 9, {}, 2, 2, 9))
+
+    events = asyncio.run(read_events('/api/changes?designer_id=1', {'Last-Event-ID': str(ids[1])}, 2))
+
+    assert [(kind, data['id'], data['data']) for kind, data in events] == [
+        ('workorder.status', ids[2], {'number': 3}), ('workorder.status', ids[3], {'number': 4})]
+
+
+def test_stream_resets_clients_that_are_too_far_behind(monkeypatch):
+    monkeypatch.setattr('routes.async_dashboard_routes.CHANGES_REPLAY_MAX', 2)
+    add_changes(*(change_record('workorder.status', number, {}, 1, 1, number) for number in range(1, 5)))
+
+    events = asyncio.run(read_events('/api/changes', {'Last-Event-ID': '0'}, 1))
+
+    assert events == [('reset', {})]
+
+
+def test_stream_refuses_a_malformed_last_event_id():
+    async def request():
+        async with asgi_app.test_app():
+            return await asgi_app.test_client().get('/api/changes', headers={'Last-Event-ID': 'abc'})
+
+    assert asyncio.run(request()).status_code == 400
@@ -0,0 +1,151 @@
+import importlib
+import io
+
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import IntegrityError
+
+from conftest import add_inventory
+from db.database import SessionLocal, get_engine
+from db.migrations import index_exists
+from models.inventory import Inventory
+from services import billing, inventory_import
+from services.inventory_import import import_inventory
+
+
+@pytest.fixture
+def rollups(designer):
+    with get_engine().begin() as connection:
+        billing.rebuild(connection)
+
+
+def inventory():
+    with get_engine().connect() as connection:
+        return {row.sku: row for row in connection.execute(select(Inventory).order_by(Inventory.id))}
+
+
+def run_import(text, **options):
+    with SessionLocal() as session:
+        return import_inventory(session, 1, io.StringIO(text), workers=1, **options)
+
+
+def assert_storage_rollup_matches():
+    with get_engine().connect() as connection:
+        assert billing.check_storage(connection) == {}
+
+
+def test_import_creates_new_skus_and_updates_existing_ones(client, rollups):
+    csv = ("Item Name,SKU,Quantity,In Storage,Length,Width,Height\n"
+           "Chair,SKU-1,7,yes,12,12,12\n"
+           "Table,SKU-2,2,yes,24,24,24\n"
+           "Lamp,SKU-3,many,yes,,,\n"
+           "Table again,SKU-2,4,no,,,\n")
+
+    response = client.post('/api/designer/1/inventory/import', data=csv, content_type='text/csv')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'partial'
+    assert (body['rows'], body['valid'], body['created'], body['updated']) == (4, 2, 1, 1)
+    assert [error['row'] for error in body['errors']] == [4, 5]
+    assert 'quantity must be a whole number' in body['errors'][0]['errors']
+    assert 'duplicate sku SKU-2, first used on row 3' in body['errors'][1]['errors']
+
+    items = inventory()
+    assert sorted(items) == ['SKU-1', 'SKU-2']
+    assert (items['SKU-1'].id, items['SKU-1'].item_name, items['SKU-1'].quantity) == (1, 'Chair', 7)
+    assert items['SKU-1'].version == 2
+    assert items['SKU-1'].cubic_sq_footage == 1.0
+    assert (items['SKU-2'].quantity, items['SKU-2'].in_storage, items['SKU-2'].version) == (2, True, 1)
+    assert_storage_rollup_matches()
+
+
+def test_import_keeps_columns_the_file_does_not_have(rollups):
+    report = run_import("item_name,sku,quantity\nRenamed,SKU-1,3\n")
+
+    assert (report['created'], report['updated']) == (0, 1)
+    item = inventory()['SKU-1']
+    assert (item.item_name, item.quantity, item.in_storage, item.length) == ('Renamed', 3, True, 10)
+    assert_storage_rollup_matches()
+
+
+def test_repeated_import_updates_instead_of_duplicating(rollups, monkeypatch):
+    monkeypatch.setattr(inventory_import, 'IMPORT_CHUNK_SIZE', 2)
+    csv = "item_name,sku,quantity,in_storage\n" + "".join(f"Item {n},NEW-{n},{n},yes\n" for n in range(1, 6))
+
+    first = run_import(csv)
+    second = run_import(csv.replace(',yes', ',no'))
+
+    assert (first['created'], first['updated']) == (5, 0)
+    assert (second['created'], second['updated']) == (0, 5)
+    items = inventory()
+    assert len(items) == 6
+    assert not any(items[f'NEW-{n}'].in_storage for n in range(1, 6))
+    assert_storage_rollup_matches()
+
+
+def test_import_retries_a_chunk_when_a_concurrent_import_added_its_sku(rollups, monkeypatch):
+    engine = get_engine()
+    inserts = []
+
+    def before_execute(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO inventory '):
+            inserts.append(statement)
+            if len(inserts) == 1:
+                # another import commits the same new SKU between this one's lookup and its INSERT
+                with engine.begin() as other:
+                    add_inventory(other, 50, sku='SKU-NEW', quantity=1)
+                    billing.refresh_storage(other)
+
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        report = run_import("item_name,sku,quantity,in_storage\nNew item,SKU-NEW,4,yes\n")
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+
+    # the failed INSERT, the competing one, then the retried chunk's upsert
+    assert len(inserts) == 3
+    assert (report['created'], report['updated']) == (0, 1)
+    items = [item for item in inventory().values() if item.sku == 'SKU-NEW']
+    assert [(item.id, item.item_name, item.quantity) for item in items] == [(50, 'New item', 4)]
+    assert_storage_rollup_matches()
+
+
+def test_designer_sku_is_unique(designer):
+    with pytest.raises(IntegrityError), get_engine().begin() as connection:
+        add_inventory(connection, 2, sku='SKU-1')
+
+
+def test_dry_run_only_validates(client, designer):
+    response = client.post('/api/designer/1/inventory/import?dry_run=true',
+                           data="item_name,sku,quantity\nChair,SKU-1,9\nSofa,SKU-9,1\n", content_type='text/csv')
+
+    body = response.get_json()
+    assert (body['dry_run'], body['valid'], body['created'], body['updated']) == (True, 2, 0, 0)
+    assert sorted(inventory()) == ['SKU-1']
+    assert inventory()['SKU-1'].quantity == 5
+
+
+def test_import_rejects_unusable_uploads(client, designer):
+    missing = client.post('/api/designer/1/inventory/import', data="sku\nSKU-1\n", content_type='text/csv')
+    assert missing.status_code == 400
+    assert 'item_name, quantity' in missing.get_json()['message']
+
+    unknown = client.post('/api/designer/9/inventory/import', data="item_name,quantity\nA,1\n",
+                          content_type='text/csv')
+    assert unknown.status_code == 404
+
+
+def test_sku_migration_renames_existing_duplicates(designer):
+    migration = importlib.import_module('db.migrations.0011_inventory_sku_unique')
+    with get_engine().begin() as connection:
+        connection.execute(text('DROP INDEX uq_inventory_designer_sku'))
+        add_inventory(connection, 2, sku='SKU-1')
+        add_inventory(connection, 3, sku='SKU-1')
+        add_inventory(connection, 4, designer_id=2, sku='SKU-1')
+        migration.upgrade(connection)
+
+    with get_engine().connect() as connection:
+        skus = dict(connection.execute(select(Inventory.id, Inventory.sku)).all())
+        assert index_exists(connection, 'inventory', 'uq_inventory_designer_sku')
+    assert skus == {1: 'SKU-1', 2: 'SKU-1-DUP2', 3: 'SKU-1-DUP3', 4: 'SKU-1'}
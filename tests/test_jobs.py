@@ -0,0 +1,130 @@
+import os
+
+import pytest
+from sqlalchemy import select, update
+
+import services.workorder_jobs  # noqa: F401  registers the workorder handlers
+from db.database import SessionLocal, get_engine
+from models.designer import Designer
+from models.jobs import Job
+from models.orders import Workorder
+from services import jobs, mail
+from services.storage import DOCUMENT_ROOT, STORAGE_ROOT
+
+
+@pytest.fixture
+def failing():
+    calls = []
+
+    @jobs.handler('test_failing')
+    def fail(**payload):
+        calls.append(payload)
+        raise RuntimeError('boom')
+
+    yield calls
+    jobs.HANDLERS.pop('test_failing')
+
+
+def enqueue(kind, **payload):
+    with SessionLocal() as session:
+        job = jobs.enqueue(session, kind, **payload)
+        session.commit()
+        return job.id
+
+
+def job_row(job_id):
+    with get_engine().connect() as connection:
+        return connection.execute(select(Job).where(Job.id == job_id)).one()
+
+
+def drain():
+    return jobs.Worker(threads=2, poll_interval=0.01).run(drain=True)
+
+
+def create_workorder(client, designer):
+    response = client.post('/api/workorders/bulk', json={'workorders': [
+        {'designer_id': 1, 'sidemark_id': 1, 'workorder_id': 'WO-1', 'items': [{'inventory_id': 1, 'quantity': 2}]},
+    ]})
+    return response.get_json()['created'][0]['id']
+
+
+def test_status_changes_run_their_side_effects_in_the_worker(client, designer):
+    with get_engine().begin() as connection:
+        connection.execute(update(Designer).values(email='dana@example.com'))
+    workorder_id = create_workorder(client, designer)
+    mail.mailer.clear()
+
+    response = client.patch(f'/api/workorder/{workorder_id}/status', json={'status': 'processing'})
+    assert response.get_json()['queued'] == ['tag_workorder']
+    response = client.patch(f'/api/workorder/{workorder_id}/status', json={'status': 'completed'})
+    assert response.get_json()['queued'] == ['record_services', 'send_completion_email']
+    assert drain() == 3
+
+    with get_engine().connect() as connection:
+        workorder = connection.execute(select(Workorder).where(Workorder.id == workorder_id)).one()
+        statuses = connection.scalars(select(Job.status)).all()
+    assert (workorder.tagged, workorder.services_recorded, workorder.email_sent) == (True, True, True)
+    assert statuses == ['done'] * 3
+    # internal documents are written to the document root, never below the served media root
+    assert os.path.exists(os.path.join(DOCUMENT_ROOT, 'tags', 'WO-1.csv'))
+    assert os.path.exists(os.path.join(DOCUMENT_ROOT, 'services', 'WO-1.json'))
+    assert not os.path.exists(os.path.join(STORAGE_ROOT, 'tags'))
+    assert [message['To'] for message in mail.mailer.messages] == ['dana@example.com']
+
+    # handlers are idempotent, a repeated job does not send the email again
+    enqueue('send_completion_email', workorder_id=workorder_id)
+    assert drain() == 1
+    assert len(mail.mailer.messages) == 1
+
+
+def test_failed_jobs_are_retried_with_backoff_until_max_attempts(failing):
+    job_id = enqueue('test_failing', value=1)
+
+    assert drain() == 1
+    job = job_row(job_id)
+    assert (job.status, job.attempts, job.locked_by) == ('queued', 1, None)
+    assert 'boom' in job.last_error
+    assert job.run_at > job.created_at
+
+    # make the retry due right away, the last attempt fails the job for good
+    with get_engine().begin() as connection:
+        connection.execute(update(Job).where(Job.id == job_id).values(run_at=job.created_at, max_attempts=2))
+    assert drain() == 1
+    job = job_row(job_id)
+    assert (job.status, job.attempts) == ('failed', 2)
+    assert failing == [{'value': 1}, {'value': 1}]
+
+
+def test_outcome_of_a_reclaimed_job_is_dropped(failing):
+    job_id = enqueue('test_failing')
+    (stale,) = jobs.claim(1, 'worker-a')
+    # the lease of worker-a ran out and worker-b claimed the job again
+    with get_engine().begin() as connection:
+        connection.execute(update(Job).where(Job.id == job_id).values(locked_by='worker-b:token'))
+
+    jobs.run_job(stale)
+
+    job = job_row(job_id)
+    assert (job.status, job.locked_by, job.last_error) == ('running', 'worker-b:token', None)
+
+
+def test_claim_hands_each_job_out_once():
+    ids = {enqueue('tag_workorder', workorder_id=number) for number in range(5)}
+
+    first = jobs.claim(3, 'worker-a')
+    second = jobs.claim(3, 'worker-b')
+
+    assert len(first) == 3 and len(second) == 2
+    assert {job.id for job in first} | {job.id for job in second} == ids
+    assert jobs.claim(3, 'worker-c') == []
+
+
+def test_enqueue_refuses_unknown_kinds():
+    with SessionLocal() as session, pytest.raises(ValueError):
+        jobs.enqueue(session, 'no_such_job')
+
+
+def test_smtp_mailer_needs_a_host(monkeypatch):
+    monkeypatch.setattr(mail, 'MAIL_HOST', None)
+    with pytest.raises(RuntimeError):
+        mail.SMTPMailer().send(object())
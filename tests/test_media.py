@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+from services.storage import LocalStorage, documents, storage
+
+
+@pytest.fixture
+def stored():
+    storage.save('photos/1/original.jpg', io.BytesIO(b'0123456789'))
+    storage.save('private.txt', io.BytesIO(b'not a photo'))
+    documents.save('tags/WO-1.csv', io.BytesIO(b'workorder,sku'))
+
+
+def test_serves_stored_photos_with_ranges(client, stored):
+    response = client.get('/media/photos/1/original.jpg')
+    assert response.status_code == 200
+    assert response.data == b'0123456789'
+    assert response.mimetype == 'image/jpeg'
+    assert 'immutable' in response.headers['Cache-Control']
+
+    partial = client.get('/media/photos/1/original.jpg', headers={'Range': 'bytes=2-4'})
+    assert partial.status_code == 206
+    assert partial.data == b'234'
+
+
+@pytest.mark.parametrize('path', [
+    '/media/private.txt',
+    '/media/tags/WO-1.csv',
+    '/media/photos/../private.txt',
+    '/media/photos/%2e%2e/private.txt',
+    '/media/photos/..%2fprivate.txt',
+    '/media/photos/1/../../private.txt',
+    '/media/photos/../../documents/tags/WO-1.csv',
+    '/media/photos//1/original.jpg',
+    '/media/photos/./1/original.jpg',
+    '/media/photos/1',
+    '/media/photos/1/missing.jpg',
+])
+def test_refuses_keys_outside_the_photos(client, stored, path):
+    response = client.get(path)
+    assert response.status_code == 404
+    assert response.data != b'not a photo'
+
+
+def test_documents_are_kept_out_of_the_media_root():
+    assert documents.root != storage.root
+    assert not documents.root.startswith(storage.root + '/')
+
+
+def test_local_storage_refuses_keys_outside_its_root(tmp_path):
+    local = LocalStorage(str(tmp_path / 'root'))
+    for key in ('../outside.txt', 'photos/../../outside.txt', '/etc/passwd'):
+        with pytest.raises(KeyError):
+            local.path(key)